@@ -17,8 +17,10 @@ from pyk.proof.tui import APRProofViewer
 
 from .cargo import CargoProject
 from .kmir import KMIR, KMIRAPRNodePrinter
-from .linker import link
+from .kompile import KompileCache
+from .linker import link_files
 from .options import (
+    ConvertOpts,
     InfoOpts,
     LinkOpts,
     ProveOpts,
@@ -29,6 +31,7 @@ from .options import (
     ViewOpts,
 )
 from .smir import SMIRInfo, Ty
+from .smir_file import is_smir_binary
 from .utils import render_leaf_k_cells, render_rules, render_statistics
 
 if TYPE_CHECKING:
@@ -53,6 +56,8 @@ def _kmir_run(opts: RunOpts) -> None:
         # target = opts.bin if opts.bin else cargo.default_target
         smir_info = cargo.smir_for_project(clean=False)
 
+    kompile_cache = KompileCache(opts.kompile_cache_dir) if opts.kompile_cache else None
+
     def run(target_dir: Path):
         kmir = KMIR.from_kompiled_kore(
             smir_info,
@@ -61,6 +66,7 @@ def _kmir_run(opts: RunOpts) -> None:
             haskell_target=opts.haskell_target,
             llvm_lib_target=opts.llvm_lib_target,
             llvm_target=opts.llvm_target,
+            kompile_cache=kompile_cache,
         )
         result = kmir.run_smir(smir_info, start_symbol=opts.start_symbol, depth=opts.depth)
         print(kmir.kore_to_pretty(result))
@@ -73,6 +79,14 @@ def _kmir_run(opts: RunOpts) -> None:
 
 
 def _kmir_prove(opts: ProveOpts) -> None:
+    if opts.start_symbols:
+        proofs = KMIR.prove_programs(opts)
+        for proof in proofs.values():
+            print(str(proof.summary))
+        if not all(proof.passed for proof in proofs.values()):
+            sys.exit(1)
+        return
+
     proof = KMIR.prove_program(opts)
     print(str(proof.summary))
     if not proof.passed:
@@ -247,8 +261,17 @@ def _kmir_info(opts: InfoOpts) -> None:
 
 
 def _kmir_link(opts: LinkOpts) -> None:
-    result = link([SMIRInfo.from_file(f) for f in opts.smir_files])
-    result.dump(opts.output_file)
+    link_files(opts.smir_files, opts.output_file, jobs=opts.jobs, deduplicate=opts.deduplicate)
+
+
+def _kmir_convert(opts: ConvertOpts) -> None:
+    if is_smir_binary(opts.smir_file):
+        output_file = opts.output_file or opts.smir_file.with_suffix('.json')
+        SMIRInfo.from_binary_file(opts.smir_file).dump(output_file)
+    else:
+        output_file = opts.output_file or opts.smir_file.with_suffix('.bin')
+        SMIRInfo.from_file(opts.smir_file).dump_binary(output_file)
+    _LOGGER.info(f'Wrote {output_file}')
 
 
 def kmir(args: Sequence[str]) -> None:
@@ -272,6 +295,8 @@ def kmir(args: Sequence[str]) -> None:
             _kmir_prove(opts)
         case LinkOpts():
             _kmir_link(opts)
+        case ConvertOpts():
+            _kmir_convert(opts)
         case _:
             raise AssertionError()
 
@@ -282,7 +307,24 @@ def _arg_parser() -> ArgumentParser:
     command_parser = parser.add_subparsers(dest='command', required=True)
     kcli_args = KCLIArgs()
 
-    run_parser = command_parser.add_parser('run', help='run stable MIR programs', parents=[kcli_args.logging_args])
+    kompile_cache_args = ArgumentParser(add_help=False)
+    kompile_cache_args.add_argument(
+        '--no-kompile-cache',
+        dest='kompile_cache',
+        action='store_false',
+        default=True,
+        help='Kompile into the target directory instead of sharing kompiled SMIR through the kompile cache',
+    )
+    kompile_cache_args.add_argument(
+        '--kompile-cache-dir',
+        type=Path,
+        metavar='DIR',
+        help='Kompile cache directory (default: $XDG_CACHE_HOME/kmir/kompiled)',
+    )
+
+    run_parser = command_parser.add_parser(
+        'run', help='run stable MIR programs', parents=[kcli_args.logging_args, kompile_cache_args]
+    )
     run_target_selection = run_parser.add_mutually_exclusive_group()
     run_target_selection.add_argument(
         '--bin', metavar='TARGET', help='Cargo binary target name to run (mutually exclusive with --file)'
@@ -543,7 +585,10 @@ def _arg_parser() -> ArgumentParser:
     section_edge_parser.add_argument('--llvm-lib-target', metavar='TARGET', help='LLVM lib target to use')
 
     prove_parser = command_parser.add_parser(
-        'prove', help='Prove a Rust program', aliases=['prove-rs'], parents=[kcli_args.logging_args, prove_args]
+        'prove',
+        help='Prove a Rust program',
+        aliases=['prove-rs'],
+        parents=[kcli_args.logging_args, prove_args, kompile_cache_args],
     )
     prove_parser.add_argument('rs_file', type=Path, metavar='FILE', help='Rust file with the spec function (e.g. main)')
     prove_parser.add_argument(
@@ -553,6 +598,21 @@ def _arg_parser() -> ArgumentParser:
     prove_parser.add_argument(
         '--start-symbol', type=str, metavar='SYMBOL', default='main', help='Symbol name to begin execution from'
     )
+    prove_parser.add_argument(
+        '--start-symbols',
+        metavar='SYMBOLS',
+        help='Comma-separated symbol names to prove in one batch, sharing the kompiled SMIR (overrides --start-symbol)',
+    )
+    prove_parser.add_argument(
+        '--batch-reduction-threshold',
+        metavar='RATIO',
+        type=float,
+        default=0.5,
+        help=(
+            'In a batch, prove a symbol against its own reduced SMIR only if that has at least RATIO fewer items '
+            'than the SMIR shared by the batch. Default: 0.5'
+        ),
+    )
     prove_parser.add_argument(
         '--add-module',
         type=Path,
@@ -562,6 +622,21 @@ def _arg_parser() -> ArgumentParser:
     prove_parser.add_argument(
         '--max-workers', metavar='N', type=int, help='Maximum number of workers for parallel exploration'
     )
+    prove_parser.add_argument(
+        '--llvm-opt-level',
+        metavar='LEVEL',
+        type=int,
+        choices=[0, 1, 2, 3],
+        default=2,
+        help='Optimization level for the LLVM interpreter kompiled from the SMIR. Default: 2',
+    )
+    prove_parser.add_argument(
+        '--kompile-jobs',
+        metavar='N',
+        type=int,
+        default=2,
+        help='Number of kompilation steps (LLVM and Haskell backend) to run concurrently. Default: 2',
+    )
 
     link_parser = command_parser.add_parser(
         'link', help='Link together 2 or more SMIR JSON files', parents=[kcli_args.logging_args]
@@ -574,6 +649,30 @@ def _arg_parser() -> ArgumentParser:
         help='Output file (default: linker_output.smir.json)',
         default='linker_output.smir.json',
     )
+    link_parser.add_argument(
+        '--jobs',
+        '-j',
+        metavar='N',
+        type=int,
+        default=1,
+        help='Number of SMIR JSON files to qualify and offset in parallel. Default: 1',
+    )
+    link_parser.add_argument(
+        '--deduplicate',
+        action='store_true',
+        help='Merge equivalent types, allocs, spans and items of the linked crates, renumbering all IDs densely',
+    )
+
+    convert_parser = command_parser.add_parser(
+        'convert', help='Convert between SMIR JSON and the binary SMIR format', parents=[kcli_args.logging_args]
+    )
+    convert_parser.add_argument('smir_file', metavar='FILE', help='SMIR JSON or binary SMIR file to convert')
+    convert_parser.add_argument(
+        '--output-file',
+        '-o',
+        metavar='FILE',
+        help='Output file (default: FILE with suffix .bin for SMIR JSON, .json for binary SMIR)',
+    )
 
     return parser
 
@@ -588,6 +687,8 @@ def _parse_args(ns: Namespace) -> KMirOpts:
                 depth=ns.depth,
                 start_symbol=ns.start_symbol,
                 symbolic=ns.symbolic,
+                kompile_cache=ns.kompile_cache,
+                kompile_cache_dir=ns.kompile_cache_dir,
             )
         case 'info':
             return InfoOpts(smir_file=Path(ns.smir_file), types=ns.types)
@@ -654,6 +755,8 @@ def _parse_args(ns: Namespace) -> KMirOpts:
                 save_smir=ns.save_smir,
                 smir=ns.smir,
                 start_symbol=ns.start_symbol,
+                start_symbols=[symbol.strip() for symbol in ns.start_symbols.split(',')] if ns.start_symbols else None,
+                batch_reduction_threshold=ns.batch_reduction_threshold,
                 break_on_calls=ns.break_on_calls,
                 break_on_function_calls=ns.break_on_function_calls,
                 break_on_intrinsic_calls=ns.break_on_intrinsic_calls,
@@ -671,12 +774,20 @@ def _parse_args(ns: Namespace) -> KMirOpts:
                 terminate_on_thunk=ns.terminate_on_thunk,
                 add_module=ns.add_module,
                 break_on_function=ns.break_on_function or [],
+                kompile_cache=ns.kompile_cache,
+                kompile_cache_dir=ns.kompile_cache_dir,
+                llvm_opt_level=ns.llvm_opt_level,
+                kompile_jobs=ns.kompile_jobs,
             )
         case 'link':
             return LinkOpts(
                 smir_files=ns.smir_files,
                 output_file=ns.output_file,
+                jobs=ns.jobs,
+                deduplicate=ns.deduplicate,
             )
+        case 'convert':
+            return ConvertOpts(smir_file=ns.smir_file, output_file=ns.output_file)
         case _:
             raise AssertionError()
 
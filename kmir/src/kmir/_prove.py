@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import copy
 import logging
 import tempfile
 from pathlib import Path
@@ -18,6 +19,7 @@ from pyk.proof.reachability import APRProof, APRProver
 from .cargo import cargo_get_smir_json
 from .kast import SymbolicMode, make_call_config
 from .kmir import KMIR, KMIRSemantics
+from .kompile import KompileCache
 from .smir import SMIRInfo
 
 if TYPE_CHECKING:
@@ -32,24 +34,92 @@ _LOGGER: Final = logging.getLogger(__name__)
 
 
 def prove(opts: ProveOpts) -> APRProof:
+    _check_opts(opts)
+    return _prove_in_target(opts)
+
+
+def prove_batch(opts: ProveOpts) -> dict[str, APRProof]:
+    """Prove the program from each of `opts.start_symbols`, kompiling the SMIR reduced to all of them only once.
+
+    Every proof runs against the SMIR reduced to the union of the reachable items, unless reducing to its own start
+    symbol removes at least a fraction `opts.batch_reduction_threshold` of those items. Kompiled definitions are
+    shared through the kompile cache. If it is disabled, proofs without a `proof_dir` share a temporary one for the
+    duration of the batch, while proofs kept in `proof_dir` are kompiled into their own directories, as those would
+    otherwise link to the removed temporary cache.
+    """
+    _check_opts(opts)
+
+    if not opts.start_symbols:
+        raise ValueError('Expected at least one start symbol for a batch of proofs')
+
+    if not 0 <= opts.batch_reduction_threshold <= 1:
+        raise ValueError(f'Expected `batch_reduction_threshold` between 0 and 1, got: {opts.batch_reduction_threshold}')
+
+    smir_info = _load_smir(opts)
+    shared_smir_info = smir_info.reduce_to_many(opts.start_symbols)
+    max_items = (1 - opts.batch_reduction_threshold) * len(shared_smir_info.items)
+    _LOGGER.info(f'Shared reduced items table size {len(shared_smir_info.items)}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        batch_opts = copy.copy(opts)
+        if not opts.kompile_cache and opts.proof_dir is None:
+            batch_opts.kompile_cache = True
+            batch_opts.kompile_cache_dir = Path(tmp_dir)
+
+        proofs: dict[str, APRProof] = {}
+        for start_symbol in opts.start_symbols:
+            symbol_opts = copy.copy(batch_opts)
+            symbol_opts.start_symbol = start_symbol
+
+            symbol_smir_info = smir_info.reduce_to(start_symbol)
+            if len(symbol_smir_info.items) > max_items:
+                symbol_smir_info = shared_smir_info
+            else:
+                _LOGGER.info(f'Using own reduced items table of size {len(symbol_smir_info.items)}: {start_symbol}')
+
+            proofs[start_symbol] = _prove_in_target(symbol_opts, symbol_smir_info)
+
+        return proofs
+
+
+def _check_opts(opts: ProveOpts) -> None:
     if not opts.rs_file.is_file():
         raise ValueError(f'Input file does not exist: {opts.rs_file}')
 
     if opts.max_workers is not None and opts.max_workers < 1:
         raise ValueError(f'Expected positive integer for `max_workers, got: {opts.max_workers}')
 
+    if opts.kompile_jobs < 1:
+        raise ValueError(f'Expected positive integer for `kompile_jobs`, got: {opts.kompile_jobs}')
+
+
+def _prove_in_target(opts: ProveOpts, smir_info: SMIRInfo | None = None) -> APRProof:
     label = f'{opts.rs_file.stem}.{opts.start_symbol}'
 
     if opts.proof_dir is not None:
         target_path = opts.proof_dir / label
-        return _prove(opts, target_path, label)
+        return _prove(opts, target_path, label, smir_info)
 
     with tempfile.TemporaryDirectory() as tmp_dir:
         target_path = Path(tmp_dir)
-        return _prove(opts, target_path, label)
+        return _prove(opts, target_path, label, smir_info)
+
+
+def _load_smir(opts: ProveOpts) -> SMIRInfo:
+    if opts.parsed_smir is not None:
+        return SMIRInfo(opts.parsed_smir)
+    if opts.smir:
+        return SMIRInfo.from_file(opts.rs_file)
+    return SMIRInfo(cargo_get_smir_json(opts.rs_file, save_smir=opts.save_smir))
+
+
+def _prove(opts: ProveOpts, target_path: Path, label: str, smir_info: SMIRInfo | None = None) -> APRProof:
+    """Load or construct the proof and advance it.
 
+    A given `smir_info` is used as is when constructing the proof, otherwise the input is reduced to the start symbol.
+    """
+    kompile_cache = KompileCache(opts.kompile_cache_dir) if opts.kompile_cache else None
 
-def _prove(opts: ProveOpts, target_path: Path, label: str) -> APRProof:
     if not opts.reload and opts.proof_dir is not None and APRProof.proof_data_exists(label, opts.proof_dir):
         _LOGGER.info(f'Reading proof from disc: {opts.proof_dir}, {label}')
         proof = APRProof.read_proof_data(opts.proof_dir, label)
@@ -64,17 +134,14 @@ def _prove(opts: ProveOpts, target_path: Path, label: str) -> APRProof:
             haskell_target=opts.haskell_target,
             llvm_lib_target=opts.llvm_lib_target,
             break_on_function=opts.break_on_function or None,
+            kompile_cache=kompile_cache,
+            llvm_opt_level=opts.llvm_opt_level,
+            kompile_jobs=opts.kompile_jobs,
         )
     else:
         _LOGGER.info(f'Constructing initial proof: {label}')
-        if opts.parsed_smir is not None:
-            smir_info = SMIRInfo(opts.parsed_smir)
-        elif opts.smir:
-            smir_info = SMIRInfo.from_file(opts.rs_file)
-        else:
-            smir_info = SMIRInfo(cargo_get_smir_json(opts.rs_file, save_smir=opts.save_smir))
-
-        smir_info = smir_info.reduce_to(opts.start_symbol)
+        if smir_info is None:
+            smir_info = _load_smir(opts).reduce_to(opts.start_symbol)
         # Report whether the reduced call graph includes any functions without MIR bodies
         missing_body_syms = [
             sym
@@ -96,6 +163,9 @@ def _prove(opts: ProveOpts, target_path: Path, label: str) -> APRProof:
             haskell_target=opts.haskell_target,
             llvm_lib_target=opts.llvm_lib_target,
             break_on_function=opts.break_on_function or None,
+            kompile_cache=kompile_cache,
+            llvm_opt_level=opts.llvm_opt_level,
+            kompile_jobs=opts.kompile_jobs,
         )
 
         proof = apr_proof_from_smir(
@@ -106,7 +176,7 @@ def _prove(opts: ProveOpts, target_path: Path, label: str) -> APRProof:
             proof_dir=opts.proof_dir,
         )
         if proof.proof_dir is not None and (proof.proof_dir / label).is_dir():
-            smir_info.dump(proof.proof_dir / proof.id / 'smir.json')
+            smir_info.dump(proof.proof_dir / proof.id / 'smir.json', binary_cache=True)
 
     if proof.passed:
         return proof
@@ -19,7 +19,7 @@ DefId = NewType('DefId', int)
 InstanceDef = NewType('InstanceDef', int)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AllocInfo:
     alloc_id: AllocId
     ty: Ty
@@ -35,6 +35,8 @@ class AllocInfo:
 
 
 class GlobalAlloc(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_dict(dct: dict[str, Any]) -> GlobalAlloc:
         match dct:
@@ -50,7 +52,7 @@ class GlobalAlloc(ABC):  # noqa: B024
                 raise ValueError(f'Unsupported or invalid GlobalAlloc data: {dct}')
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Function(GlobalAlloc):
     instance: Instance
 
@@ -61,7 +63,7 @@ class Function(GlobalAlloc):
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Instance:
     kind: InstanceKind
     deff: InstanceDef
@@ -75,6 +77,8 @@ class Instance:
 
 
 class InstanceKind(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_dict(obj: Any) -> InstanceKind:
         match obj:
@@ -90,15 +94,15 @@ class InstanceKind(ABC):  # noqa: B024
                 raise ValueError(f'Invalid InstanceKind data: {obj}')
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Item(InstanceKind): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Intrinsic(InstanceKind): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Virtual(InstanceKind):
     idx: int
 
@@ -111,11 +115,11 @@ class Virtual(InstanceKind):
                 raise ValueError(f'Invalid Virtual data: {obj}')
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Shim(InstanceKind): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VTable(GlobalAlloc):
     ty: Ty
     binder: ExistentialTraitRefBinder | None
@@ -128,33 +132,33 @@ class VTable(GlobalAlloc):
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ExistentialTraitRefBinder:
     value: ExistentialTraitRef
-    bound_vars: list[BoundVariableKind]
+    bound_vars: tuple[BoundVariableKind, ...]
 
     @staticmethod
     def from_dict(dct: dict[str, Any]) -> ExistentialTraitRefBinder:
         return ExistentialTraitRefBinder(
             value=ExistentialTraitRef.from_dict(dct['value']),
-            bound_vars=[BoundVariableKind.from_dict(var) for var in dct['bound_vars']],
+            bound_vars=tuple(BoundVariableKind.from_dict(var) for var in dct['bound_vars']),
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ExistentialTraitRef:
     def_id: DefId
-    generic_args: list[GenericArgKind]
+    generic_args: tuple[GenericArgKind, ...]
 
     @staticmethod
     def from_dict(dct: dict[str, Any]) -> ExistentialTraitRef:
         return ExistentialTraitRef(
             def_id=DefId(dct['def_id']),
-            generic_args=[GenericArgKind.from_dict(arg) for arg in dct['generic_args']],
+            generic_args=tuple(GenericArgKind.from_dict(arg) for arg in dct['generic_args']),
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BoundVariableKind(ABC):  # noqa: B024
     @staticmethod
     def from_dict(dct: Any) -> BoundVariableKind:
@@ -169,7 +173,7 @@ class BoundVariableKind(ABC):  # noqa: B024
                 raise ValueError(f'Invalid BoundBariableKind data: {dct}')
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BVTy(BoundVariableKind):
     kind: BoundTyKind
 
@@ -179,6 +183,8 @@ class BVTy(BoundVariableKind):
 
 
 class BoundTyKind(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_dict(dct: Any) -> BoundTyKind:
         match dct:
@@ -190,11 +196,11 @@ class BoundTyKind(ABC):  # noqa: B024
                 raise ValueError(f'Invalid BoundTyKind data: {dct}')
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BTAnon(BoundTyKind): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BTParam(BoundTyKind):
     def_id: DefId
     name: str
@@ -207,7 +213,7 @@ class BTParam(BoundTyKind):
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BVRegion(BoundVariableKind):
     kind: BoundRegionKind
 
@@ -217,6 +223,8 @@ class BVRegion(BoundVariableKind):
 
 
 class BoundRegionKind(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_dict(dct: Any) -> BoundRegionKind:
         match dct:
@@ -230,11 +238,11 @@ class BoundRegionKind(ABC):  # noqa: B024
                 raise ValueError(f'Invalid BoundRegionKind data: {dct}')
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BRAnon(BoundRegionKind): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BRNamed(BoundRegionKind):
     def_id: DefId
     name: str
@@ -247,15 +255,15 @@ class BRNamed(BoundRegionKind):
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BREnv(BoundRegionKind): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BVConst(BoundVariableKind): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GenericArgKind:
     @staticmethod
     def from_dict(dct: dict[str, Any]) -> GenericArgKind:
@@ -263,7 +271,7 @@ class GenericArgKind:
         return GenericArgKind()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Static(GlobalAlloc):
     def_id: DefId
 
@@ -274,7 +282,7 @@ class Static(GlobalAlloc):
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Memory(GlobalAlloc):
     allocation: Allocation
 
@@ -285,9 +293,9 @@ class Memory(GlobalAlloc):
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Allocation:
-    bytez: list[int | None]  # field 'bytes'
+    bytez: tuple[int | None, ...]  # field 'bytes'
     provenance: ProvenanceMap
     align: int
     mutable: bool  # field 'mutability'
@@ -295,7 +303,7 @@ class Allocation:
     @staticmethod
     def from_dict(dct: dict[str, Any]) -> Allocation:
         return Allocation(
-            bytez=list(dct['bytes']),
+            bytez=tuple(dct['bytes']),
             provenance=ProvenanceMap.from_dict(dct['provenance']),
             align=int(dct['align']),
             mutable={
@@ -305,20 +313,20 @@ class Allocation:
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ProvenanceMap:
-    ptrs: list[ProvenanceEntry]
+    ptrs: tuple[ProvenanceEntry, ...]
 
     @staticmethod
     def from_dict(dct: dict[str, Any]) -> ProvenanceMap:
         return ProvenanceMap(
-            ptrs=[
+            ptrs=tuple(
                 ProvenanceEntry(
                     offset=int(size),
                     alloc_id=AllocId(prov),
                 )
                 for size, prov in dct['ptrs']
-            ],
+            ),
         )
 
 
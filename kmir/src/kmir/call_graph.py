@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from .ty import Ty
+
+
+class CallGraph:
+    """Call graph over function `Ty`s, indexed by dense node ids.
+
+    Nodes are numbered in order of first appearance. Besides the adjacency lists in both directions, the graph is
+    condensed into its strongly connected components, so that a reachability query visits each component once,
+    and the set of reachable components is memoized per component.
+    """
+
+    tys: tuple[Ty, ...]
+    ids: dict[Ty, int]
+    succs: tuple[tuple[int, ...], ...]
+    preds: tuple[tuple[int, ...], ...]
+    scc: tuple[int, ...]
+    scc_members: tuple[tuple[int, ...], ...]
+    scc_succs: tuple[tuple[int, ...], ...]
+    _closures: dict[int, tuple[int, ...]]
+
+    def __init__(self, edges: Mapping[Ty, Iterable[Ty]]) -> None:
+        ids: dict[Ty, int] = {}
+        for source, targets in edges.items():
+            ids.setdefault(source, len(ids))
+            for target in targets:
+                ids.setdefault(target, len(ids))
+
+        succs: list[list[int]] = [[] for _ in ids]
+        preds: list[list[int]] = [[] for _ in ids]
+        for source, targets in edges.items():
+            source_id = ids[source]
+            for target_id in dict.fromkeys(ids[target] for target in targets):
+                succs[source_id].append(target_id)
+                preds[target_id].append(source_id)
+
+        self.tys = tuple(ids)
+        self.ids = ids
+        self.succs = tuple(tuple(node_succs) for node_succs in succs)
+        self.preds = tuple(tuple(node_preds) for node_preds in preds)
+        self.scc = _strongly_connected_components(self.succs)
+
+        scc_members: list[list[int]] = [[] for _ in range(max(self.scc, default=-1) + 1)]
+        for node, component in enumerate(self.scc):
+            scc_members[component].append(node)
+        scc_succs: list[dict[int, None]] = [{} for _ in scc_members]
+        for node, node_succs in enumerate(self.succs):
+            for succ in node_succs:
+                if self.scc[succ] != self.scc[node]:
+                    scc_succs[self.scc[node]][self.scc[succ]] = None
+
+        self.scc_members = tuple(tuple(members) for members in scc_members)
+        self.scc_succs = tuple(tuple(component_succs) for component_succs in scc_succs)
+        self._closures = {}
+
+    def __len__(self) -> int:
+        return len(self.tys)
+
+    def reachable(self, start: Ty) -> set[Ty]:
+        """Return the `Ty`s reachable from `start`, including `start` itself."""
+        start_id = self.ids.get(start)
+        if start_id is None:
+            return {start}
+        return {
+            self.tys[node] for component in self._closure(self.scc[start_id]) for node in self.scc_members[component]
+        }
+
+    def callers(self, ty: Ty) -> set[Ty]:
+        """Return the `Ty`s with an edge to `ty`."""
+        ty_id = self.ids.get(ty)
+        if ty_id is None:
+            return set()
+        return {self.tys[pred] for pred in self.preds[ty_id]}
+
+    def _closure(self, component: int) -> tuple[int, ...]:
+        closure = self._closures.get(component)
+        if closure is None:
+            seen = bytearray(len(self.scc_members))
+            seen[component] = 1
+            reached = [component]
+            pos = 0
+            while pos < len(reached):
+                for succ in self.scc_succs[reached[pos]]:
+                    if not seen[succ]:
+                        seen[succ] = 1
+                        reached.append(succ)
+                pos += 1
+            closure = tuple(reached)
+            self._closures[component] = closure
+        return closure
+
+
+def _strongly_connected_components(succs: tuple[tuple[int, ...], ...]) -> tuple[int, ...]:
+    """Return the component id of each node, using an iterative version of Tarjan's algorithm.
+
+    Components are numbered in reverse topological order: edges between components lead to lower ids.
+    """
+    size = len(succs)
+    unvisited = -1
+    index = [unvisited] * size
+    lowlink = [0] * size
+    on_stack = bytearray(size)
+    component = [unvisited] * size
+    stack: list[int] = []
+    next_index = 0
+    next_component = 0
+
+    for root in range(size):
+        if index[root] != unvisited:
+            continue
+
+        # Each frame is a node and the position of the next successor to visit
+        frames = [(root, 0)]
+        index[root] = lowlink[root] = next_index
+        next_index += 1
+        stack.append(root)
+        on_stack[root] = 1
+
+        while frames:
+            node, pos = frames[-1]
+            node_succs = succs[node]
+            if pos < len(node_succs):
+                frames[-1] = (node, pos + 1)
+                succ = node_succs[pos]
+                if index[succ] == unvisited:
+                    index[succ] = lowlink[succ] = next_index
+                    next_index += 1
+                    stack.append(succ)
+                    on_stack[succ] = 1
+                    frames.append((succ, 0))
+                elif on_stack[succ]:
+                    lowlink[node] = min(lowlink[node], index[succ])
+                continue
+
+            frames.pop()
+            if frames:
+                parent = frames[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component[member] = next_component
+                    if member == node:
+                        break
+                next_component += 1
+
+    return tuple(component)
@@ -11,7 +11,7 @@ from typing import TYPE_CHECKING
 
 from pyk.utils import run_process_2
 
-from .linker import link
+from .linker import link_files
 from .smir import SMIRInfo
 
 if TYPE_CHECKING:
@@ -70,8 +70,6 @@ class CargoProject:
         # and run cargo clean before (optional)
         # assumes cargo and stable_mir_json are on the path (with these names)
 
-        # TODO check if linked file present (not present => rebuild unconditionally)
-
         if clean:
             _LOGGER.info(f'Running "cargo clean" in {self.working_directory}')
             command_result = subprocess.run(
@@ -135,17 +133,16 @@ class CargoProject:
         _LOGGER.debug(f'Files: {targets}')
 
         # link all files together and write linked output to target location
+        # fragments of unchanged crates are reused from earlier builds
         # if any file is not found, cargo clean needs to be run.
+        linked_file = targets[-1].parent.parent / 'linked.smir.json'
         try:
-            smirs = [SMIRInfo.from_file(f) for f in targets]
+            link_files(targets, linked_file, fragment_dir=linked_file.with_name('linked-fragments'))
         except FileNotFoundError:
             _LOGGER.error('SMIR JSON files not found after building, you must run `cargo clean` and rebuild.')
             raise
-        linked = link(smirs)
-        linked_file = targets[-1].parent.parent / 'linked.smir.json'
-        linked.dump(linked_file)
 
-        return linked
+        return SMIRInfo.from_file(linked_file)
 
     @cached_property
     def default_target(self) -> str:
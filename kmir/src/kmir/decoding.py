@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import struct
+from collections import Counter
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 from pyk.kast.inner import KApply
@@ -25,6 +28,8 @@ from .ty import (
     StrT,
     StructT,
     TupleT,
+    Ty,
+    TypeMetadata,
     UintT,
     WrappingRange,
 )
@@ -32,8 +37,10 @@ from .value import (
     NO_SIZE,
     AggregateValue,
     AllocRefValue,
+    BoolRangeValue,
     BoolValue,
     DynamicSize,
+    IntRangeValue,
     IntValue,
     Metadata,
     RangeValue,
@@ -43,14 +50,19 @@ from .value import (
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping
+    from collections.abc import Iterator
+    from typing import Final
 
     from pyk.kast import KInner
 
-    from .ty import FieldsShape, LayoutShape, MachineSize, Scalar, TagEncoding, Ty, TypeMetadata, UintTy
+    from .ty import FieldsShape, LayoutShape, MachineSize, Scalar, TagEncoding, UintTy
     from .value import MetadataSize
 
 
+# `struct` format characters of the integer types by size in bytes, for unsigned and signed integers
+_INT_FORMATS: Final = {1: 'Bb', 2: 'Hh', 4: 'Ii', 8: 'Qq'}
+
+
 @dataclass
 class UnableToDecodeValue(Value):
     msg: str
@@ -75,7 +87,8 @@ def decode_alloc_or_unable(alloc_info: AllocInfo, types: Mapping[Ty, TypeMetadat
                 ),
             ),
         ):
-            data = bytes(n or 0 for n in bytez)
+            # uninitialized bytes are taken to be zero
+            data = bytes(n or 0 for n in bytez) if None in bytez else bytes(bytez)  # type: ignore[arg-type]
             return _decode_memory_alloc_or_unable(data=data, ptrs=ptrs, ty=ty, types=types)
         case AllocInfo(
             ty=_,
@@ -103,9 +116,48 @@ def decode_alloc_or_unable(alloc_info: AllocInfo, types: Mapping[Ty, TypeMetadat
             raise AssertionError('Unhandled case')
 
 
+class AllocDecoder:
+    """Decodes allocations on demand, for the types of one program.
+
+    Values of memory allocations are cached by their type, bytes and provenance, so that allocations with the same
+    contents are decoded once. Allocations that cannot be decoded are counted by the kind of their type.
+    """
+
+    types: TypeLayoutCache
+    unable_to_decode: Counter[str]
+    _values: dict[tuple[Ty, tuple[int | None, ...], tuple[ProvenanceEntry, ...]], Value]
+
+    def __init__(self, types: Mapping[Ty, TypeMetadata]):
+        self.types = types if isinstance(types, TypeLayoutCache) else TypeLayoutCache(types)
+        self.unable_to_decode = Counter()
+        self._values = {}
+
+    def decode(self, alloc_info: AllocInfo) -> Value:
+        match alloc_info.global_alloc:
+            case Memory(allocation=Allocation(bytez=bytez, provenance=ProvenanceMap(ptrs=ptrs))):
+                key = (alloc_info.ty, bytez, ptrs)
+                value = self._values.get(key)
+                if value is None:
+                    value = decode_alloc_or_unable(alloc_info, self.types)
+                    self._values[key] = value
+            case _:
+                value = decode_alloc_or_unable(alloc_info, self.types)
+
+        if isinstance(value, UnableToDecodeValue):
+            type_info = self.types.get(alloc_info.ty)
+            self.unable_to_decode[type(type_info).__name__ if type_info is not None else 'unknown type'] += 1
+        return value
+
+    def summary(self) -> str:
+        """Return the number of allocations that could not be decoded, by kind of type, most frequent first."""
+        total = sum(self.unable_to_decode.values())
+        by_kind = ', '.join(f'{kind}: {count}' for kind, count in self.unable_to_decode.most_common())
+        return f'Unable to decode {total} allocs' + (f' ({by_kind})' if by_kind else '')
+
+
 def _decode_memory_alloc_or_unable(
     data: bytes,
-    ptrs: list[ProvenanceEntry],
+    ptrs: tuple[ProvenanceEntry, ...],
     ty: Ty,
     types: Mapping[Ty, TypeMetadata],
 ) -> Value:
@@ -179,7 +231,162 @@ def decode_value_or_unable(data: bytes, type_info: TypeMetadata, types: Mapping[
         return UnableToDecodeValue(f'Unable to decode value: {data!r}, of type: {type_info}: {err}')
 
 
-def decode_value(data: bytes, type_info: TypeMetadata, types: Mapping[Ty, TypeMetadata]) -> Value:
+def decode_value(data: bytes | memoryview, type_info: TypeMetadata, types: Mapping[Ty, TypeMetadata]) -> Value:
+    # Decoding slices `data` for each field and element, slicing a memoryview does not copy the underlying bytes
+    layouts = types if isinstance(types, TypeLayoutCache) else TypeLayoutCache(types)
+    return _decode_value(memoryview(data), type_info, layouts)
+
+
+# The type of a field, and the range of its bytes in the value
+_Field = tuple[TypeMetadata, int, int]
+
+
+class TypeLayoutCache(Mapping[Ty, TypeMetadata]):
+    """Type table that derives the layout of each type once, for decoding any number of values of the type.
+
+    Sizes, field byte ranges and enum tag readers are memoized per `TypeMetadata` object. Pass the same cache,
+    e.g. `SMIRInfo.type_layouts`, to each call of `decode_value` to share them between values.
+    """
+
+    types: Mapping[Ty, TypeMetadata]
+    _nbytes: dict[int, tuple[TypeMetadata, int]]
+    _fields: dict[int, tuple[TypeMetadata, tuple[_Field, ...]]]
+    _enums: dict[int, tuple[TypeMetadata, tuple[_Field, ...] | _TagReader]]
+
+    def __init__(self, types: Mapping[Ty, TypeMetadata]):
+        self.types = types
+        self._nbytes = {}
+        self._fields = {}
+        self._enums = {}
+
+    def __getitem__(self, ty: Ty) -> TypeMetadata:
+        return self.types[ty]
+
+    def __iter__(self) -> Iterator[Ty]:
+        return iter(self.types)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    # Entries are keyed by identity and keep their `TypeMetadata` alive, so that its id is not reused
+
+    def nbytes(self, type_info: TypeMetadata) -> int:
+        entry = self._nbytes.get(id(type_info))
+        if entry is None or entry[0] is not type_info:
+            entry = self._nbytes[id(type_info)] = (type_info, type_info.nbytes(self))
+        return entry[1]
+
+    def fields(self, type_info: StructT | TupleT) -> tuple[_Field, ...]:
+        """Return the fields of a struct or a non-empty tuple."""
+        entry = self._fields.get(id(type_info))
+        if entry is None or entry[0] is not type_info:
+            entry = self._fields[id(type_info)] = (type_info, self._aggregate_fields(type_info))
+        return entry[1]
+
+    def enum_layout(self, type_info: EnumT) -> tuple[_Field, ...] | _TagReader:
+        """Return the fields of a single-variant enum, or the reader of the tag of an enum with several variants."""
+        entry = self._enums.get(id(type_info))
+        if entry is None or entry[0] is not type_info:
+            entry = self._enums[id(type_info)] = (type_info, self._enum_layout(type_info))
+        return entry[1]
+
+    def field_ranges(self, tys: tuple[Ty, ...], offsets: tuple[MachineSize, ...]) -> tuple[_Field, ...]:
+        res: list[_Field] = []
+        for ty, offset in zip(tys, offsets, strict=True):
+            field_info = self[ty]
+            start = offset.in_bytes
+            res.append((field_info, start, start + self.nbytes(field_info)))
+        return tuple(res)
+
+    def _aggregate_fields(self, type_info: StructT | TupleT) -> tuple[_Field, ...]:
+        match type_info:
+            case StructT(fields=tys, layout=layout):
+                kind = 'Struct'
+            case TupleT(components=tys, layout=layout):
+                kind = 'Tuple'
+
+        if not layout:
+            raise ValueError(f'{kind} layout not provided')
+
+        offsets = _extract_offsets(layout.fields)
+
+        match layout.variants:
+            case Single(index=0):
+                pass
+            case _:
+                raise ValueError(f'Unexpected layout variants in {kind.lower()}: {layout.variants}')
+
+        return self.field_ranges(tys, offsets)
+
+    def _enum_layout(self, type_info: EnumT) -> tuple[_Field, ...] | _TagReader:
+        layout = type_info.layout
+        if not layout:
+            raise ValueError('Enum layout not provided')
+
+        offsets = _extract_offsets(layout.fields)
+
+        match layout.variants:
+            case Single(index):
+                assert index == 0, 'Assumed index to always be 0 for Single(index)'
+                assert len(type_info.fields) == 1, 'Expected a single list of field types for single-variant enum'
+                assert len(type_info.discriminants) == 1, 'Expected a single discriminant for single-variant enum'
+                return self.field_ranges(type_info.fields[0], offsets)
+            case Multiple(
+                tag=tag,
+                tag_encoding=tag_encoding,
+                tag_field=tag_field,
+                variants=variants,
+            ):
+                assert len(offsets) == 1, 'Assumed offsets to only contain the tag offset'
+                assert tag_field == 0, 'Assumed tag field to be zero accordingly'
+                variant_indices: dict[int, int] = {}
+                for variant_idx, discriminant in enumerate(type_info.discriminants):
+                    variant_indices.setdefault(discriminant, variant_idx)
+                return _TagReader(
+                    layouts=self,
+                    fields=type_info.fields,
+                    tag_offset=offsets[tag_field],
+                    tag=tag,
+                    tag_encoding=tag_encoding,
+                    variant_layouts=variants,
+                    variant_indices=variant_indices,
+                )
+            case _:
+                raise AssertionError('Undhandled case')
+
+
+@dataclass
+class _TagReader:
+    """Reads the variant of an enum value from its tag, and derives the fields of each variant on first use."""
+
+    layouts: TypeLayoutCache
+    fields: tuple[tuple[Ty, ...], ...]
+    tag_offset: MachineSize
+    tag: Scalar
+    tag_encoding: TagEncoding
+    variant_layouts: tuple[LayoutShape, ...]
+    variant_indices: dict[int, int]
+    variant_fields: dict[int, tuple[_Field, ...]] = field(default_factory=dict)
+
+    def variant(self, data: memoryview) -> tuple[int, tuple[_Field, ...]]:
+        tag_value, width = _extract_tag(data=data, tag_offset=self.tag_offset, tag=self.tag)
+        discriminant = self.tag_encoding.decode(tag_value, width=width)
+
+        variant_idx = self.variant_indices.get(discriminant)
+        if variant_idx is None:
+            raise ValueError(f'Discriminant not found: {discriminant}')
+
+        fields = self.variant_fields.get(variant_idx)
+        if fields is None:
+            variant_layout = self.variant_layouts[variant_idx]
+            field_offsets = _extract_offsets(variant_layout.fields)
+            assert isinstance(variant_layout.variants, Single)
+            fields = self.layouts.field_ranges(self.fields[variant_idx], field_offsets)
+            self.variant_fields[variant_idx] = fields
+        return variant_idx, fields
+
+
+def _decode_value(data: memoryview, type_info: TypeMetadata, types: TypeLayoutCache) -> Value:
     match type_info:
         case BoolT():
             return _decode_bool(data)
@@ -189,44 +396,42 @@ def decode_value(data: bytes, type_info: TypeMetadata, types: Mapping[Ty, TypeMe
             return _decode_int(data, int_ty)
         case ArrayT(elem_ty, length):
             return _decode_array(data, elem_ty, length, types)
-        case StructT(fields=fields, layout=layout):
-            return _decode_struct(data=data, fields=fields, layout=layout, types=types)
-        case TupleT(components=components, layout=layout):
-            return _decode_tuple(data=data, component_tys=components, layout=layout, types=types)
-        case EnumT(
-            discriminants=discriminants,
-            fields=fields,
-            layout=layout,
-        ):
-            return _decode_enum(
-                data=data,
-                discriminants=discriminants,
-                fields=fields,
-                layout=layout,
-                types=types,
-            )
+        case StructT():
+            return AggregateValue(0, _decode_fields(data, types.fields(type_info), types))
+        case TupleT(components=components):
+            if not components:
+                if data:
+                    raise ValueError(f'Zero-sized tuple expected empty data, got: {data.tobytes()!r}')
+                return AggregateValue(0, [])
+            return AggregateValue(0, _decode_fields(data, types.fields(type_info), types))
+        case EnumT():
+            enum_layout = types.enum_layout(type_info)
+            if isinstance(enum_layout, _TagReader):
+                variant_idx, fields = enum_layout.variant(data)
+                return AggregateValue(variant_idx, _decode_fields(data, fields, types))
+            return AggregateValue(0, _decode_fields(data, enum_layout, types))
         case _:
             raise ValueError(f'Unsupported type: {type_info}')
 
 
-def _decode_bool(data: bytes) -> Value:
-    match data:
+def _decode_bool(data: memoryview) -> Value:
+    match data.tobytes():
         case b'\x00':
             return BoolValue(False)
         case b'\x01':
             return BoolValue(True)
         case _:
-            raise ValueError(f'Cannot decode as Bool: {data!r}')
+            raise ValueError(f'Cannot decode as Bool: {data.tobytes()!r}')
 
 
-def _decode_str(data: bytes) -> Value:
-    return StrValue(data.decode('utf-8'))
+def _decode_str(data: memoryview) -> Value:
+    return StrValue(str(data, 'utf-8'))
 
 
-def _decode_int(data: bytes, int_ty: IntTy | UintTy) -> Value:
+def _decode_int(data: memoryview, int_ty: IntTy | UintTy) -> Value:
     nbytes = int_ty.value
     if len(data) != nbytes:
-        raise ValueError(f'Expected (u)int of length {nbytes}, got: {data!r}')
+        raise ValueError(f'Expected (u)int of length {nbytes}, got: {data.tobytes()!r}')
 
     signed = isinstance(int_ty, IntTy)
 
@@ -238,24 +443,32 @@ def _decode_int(data: bytes, int_ty: IntTy | UintTy) -> Value:
 
 
 def _decode_array(
-    data: bytes,
+    data: memoryview,
     elem_ty: Ty,
     length: int | None,
-    types: Mapping[Ty, TypeMetadata],
+    types: TypeLayoutCache,
 ) -> Value:
     try:
         elem_info = types[elem_ty]
     except KeyError as err:
         raise ValueError(f'Unknown element type: {elem_ty}') from err
 
-    elem_nbytes = elem_info.nbytes(types)
+    elem_nbytes = types.nbytes(elem_info)
 
-    elems = []
-    while data:
-        elem_data = data[:elem_nbytes]
-        data = data[elem_nbytes:]
-        elem = decode_value(elem_data, elem_info, types)
-        elems.append(elem)
+    if elem_nbytes == 0 and data:
+        raise ValueError(f'Zero-sized elements cannot fill {len(data)} bytes')
+
+    if elem_nbytes and len(data) % elem_nbytes == 0:
+        primitive_range = _decode_primitive_array(data, elem_info)
+        if primitive_range is not None:
+            if length is not None and len(primitive_range.values) != length:
+                raise ValueError(f'Expected {length} elements, got: {len(primitive_range.values)}')
+            return primitive_range
+
+    elems = [
+        _decode_value(data[offset : offset + elem_nbytes], elem_info, types)
+        for offset in range(0, len(data), elem_nbytes or 1)
+    ]
 
     if length is not None and len(elems) != length:
         raise ValueError(f'Expected {length} elements, got: {len(elems)}')
@@ -263,104 +476,31 @@ def _decode_array(
     return RangeValue(elems)
 
 
-def _decode_struct(
-    *,
-    data: bytes,
-    fields: list[Ty],
-    layout: LayoutShape | None,
-    types: Mapping[Ty, TypeMetadata],
-) -> Value:
-    if not layout:
-        raise ValueError('Struct layout not provided')
-
-    offsets = _extract_offsets(layout.fields)
-
-    match layout.variants:
-        case Single(index=0):
-            pass
-        case _:
-            raise ValueError(f'Unexpected layout variants in struct: {layout.variants}')
-
-    field_values = _decode_fields(data=data, tys=fields, offsets=offsets, types=types)
-    return AggregateValue(0, field_values)
-
-
-def _decode_tuple(
-    *,
-    data: bytes,
-    component_tys: list[Ty],
-    layout: LayoutShape | None,
-    types: Mapping[Ty, TypeMetadata],
-) -> Value:
-    if not component_tys:
-        if data:
-            raise ValueError(f'Zero-sized tuple expected empty data, got: {data!r}')
-        return AggregateValue(0, [])
-
-    if not layout:
-        raise ValueError('Tuple layout not provided')
-
-    offsets = _extract_offsets(layout.fields)
-
-    match layout.variants:
-        case Single(index=0):
-            pass
-        case _:
-            raise ValueError(f'Unexpected layout variants in tuple: {layout.variants}')
-
-    field_values = _decode_fields(data=data, tys=component_tys, offsets=offsets, types=types)
-    return AggregateValue(0, field_values)
-
-
-def _decode_enum(
-    *,
-    data: bytes,
-    discriminants: list[int],
-    fields: list[list[Ty]],
-    layout: LayoutShape | None,
-    types: Mapping[Ty, TypeMetadata],
-) -> Value:
-    if not layout:
-        raise ValueError('Enum layout not provided')
-
-    offsets = _extract_offsets(layout.fields)
-
-    match layout.variants:
-        case Single(index):
-            return _decode_enum_single(
-                data=data,
-                discriminants=discriminants,
-                fields=fields,
-                offsets=offsets,
-                # ---
-                index=index,
-                # ---
-                types=types,
-            )
-        case Multiple(
-            tag=tag,
-            tag_encoding=tag_encoding,
-            tag_field=tag_field,
-            variants=variants,
-        ):
-            return _decode_enum_multiple(
-                data=data,
-                discriminants=discriminants,
-                fields=fields,
-                offsets=offsets,
-                # ---
-                tag=tag,
-                tag_encoding=tag_encoding,
-                tag_field=tag_field,
-                variant_layouts=variants,
-                # ---
-                types=types,
-            )
+def _decode_primitive_array(data: memoryview, elem_info: TypeMetadata) -> IntRangeValue | BoolRangeValue | None:
+    """Decode an array of integers or booleans in bulk, or return `None` to decode it element by element."""
+    match elem_info:
+        case UintT(int_ty) | IntT(int_ty):
+            nbytes = int_ty.value
+            signed = isinstance(int_ty, IntTy)
+            count = len(data) // nbytes
+            if nbytes in _INT_FORMATS:
+                values = struct.unpack(f'<{count}{_INT_FORMATS[nbytes][signed]}', data)
+            else:
+                values = tuple(
+                    int.from_bytes(data[offset : offset + nbytes], byteorder='little', signed=signed)
+                    for offset in range(0, len(data), nbytes)
+                )
+            return IntRangeValue(values, nbits=nbytes * 8, signed=signed)
+        case BoolT():
+            raw = data.tobytes()
+            if raw.translate(None, b'\x00\x01'):
+                return None  # report the invalid element
+            return BoolRangeValue(map(bool, raw))
         case _:
-            raise AssertionError('Undhandled case')
+            return None
 
 
-def _extract_offsets(fields_shape: FieldsShape) -> list[MachineSize]:
+def _extract_offsets(fields_shape: FieldsShape) -> tuple[MachineSize, ...]:
     match fields_shape:
         case ArbitraryFields(offsets=offsets):
             return offsets
@@ -368,79 +508,11 @@ def _extract_offsets(fields_shape: FieldsShape) -> list[MachineSize]:
             raise ValueError(f'Unsupported fields shape: {fields_shape}')
 
 
-def _decode_enum_single(
-    *,
-    data: bytes,
-    discriminants: list[int],
-    fields: list[list[Ty]],
-    offsets: list[MachineSize],
-    index: int,
-    types: Mapping[Ty, TypeMetadata],
-) -> Value:
-    assert index == 0, 'Assumed index to always be 0 for Single(index)'
-
-    assert len(fields) == 1, 'Expected a single list of field types for single-variant enum'
-    tys = fields[0]
-
-    assert len(discriminants) == 1, 'Expected a single discriminant for single-variant enum'
-
-    field_values = _decode_fields(data=data, tys=tys, offsets=offsets, types=types)
-    return AggregateValue(0, field_values)
-
-
-def _decode_enum_multiple(
-    *,
-    data: bytes,
-    discriminants: list[int],
-    fields: list[list[Ty]],
-    offsets: list[MachineSize],
-    # ---
-    tag: Scalar,
-    tag_encoding: TagEncoding,
-    tag_field: int,
-    variant_layouts: list[LayoutShape],
-    # ---
-    types: Mapping[Ty, TypeMetadata],
-) -> Value:
-    assert len(offsets) == 1, 'Assumed offsets to only contain the tag offset'
-    assert tag_field == 0, 'Assumed tag field to be zero accordingly'
-    tag_offset = offsets[tag_field]
-    tag_value, width = _extract_tag(data=data, tag_offset=tag_offset, tag=tag)
-    discriminant = tag_encoding.decode(tag_value, width=width)
-
-    try:
-        variant_idx = discriminants.index(discriminant)
-    except ValueError as err:
-        raise ValueError(f'Discriminant not found: {discriminant}') from err
-
-    tys = fields[variant_idx]
-
-    variant_layout = variant_layouts[variant_idx]
-    field_offsets = _extract_offsets(variant_layout.fields)
-    assert isinstance(variant_layout.variants, Single)
-
-    field_values = _decode_fields(data=data, tys=tys, offsets=field_offsets, types=types)
-    return AggregateValue(variant_idx, field_values)
-
-
-def _decode_fields(
-    *,
-    data: bytes,
-    tys: list[Ty],
-    offsets: list[MachineSize],
-    types: Mapping[Ty, TypeMetadata],
-) -> list[Value]:
-    res: list[Value] = []
-    for ty, offset in zip(tys, offsets, strict=True):
-        type_info = types[ty]
-        size_in_bytes = type_info.nbytes(types)
-        field_data = data[offset.in_bytes : offset.in_bytes + size_in_bytes]
-        value = decode_value(field_data, type_info, types)
-        res.append(value)
-    return res
+def _decode_fields(data: memoryview, fields: tuple[_Field, ...], types: TypeLayoutCache) -> list[Value]:
+    return [_decode_value(data[start:end], field_info, types) for field_info, start, end in fields]
 
 
-def _extract_tag(*, data: bytes, tag_offset: MachineSize, tag: Scalar) -> tuple[int, IntegerLength]:
+def _extract_tag(*, data: memoryview, tag_offset: MachineSize, tag: Scalar) -> tuple[int, IntegerLength]:
     match tag:
         case Initialized(
             value=PrimitiveInt(
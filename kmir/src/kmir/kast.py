@@ -608,17 +608,17 @@ class _RandomArgGen:
         self,
         *,
         mut: bool,
-        discriminants: list[int],
-        fields: list[list[Ty]],
+        discriminants: Sequence[int],
+        fields: Sequence[Sequence[Ty]],
     ) -> AggregateValue:
         variant_idx = self._random.randrange(len(discriminants))
         values = self._random_fields(tys=fields[variant_idx], mut=mut)
         return AggregateValue(variant_idx, values)
 
-    def _random_struct_or_tuple_value(self, *, mut: bool, tys: list[Ty]) -> AggregateValue:
+    def _random_struct_or_tuple_value(self, *, mut: bool, tys: Sequence[Ty]) -> AggregateValue:
         return AggregateValue(0, fields=self._random_fields(tys=tys, mut=mut))
 
-    def _random_fields(self, *, tys: list[Ty], mut: bool) -> tuple[Value, ...]:
+    def _random_fields(self, *, tys: Sequence[Ty], mut: bool) -> tuple[Value, ...]:
         return tuple(self._random_value(local=_Local(ty=ty, mut=mut)).value.value for ty in tys)
 
     def _random_array_value(self, *, mut: bool, elem_ty: Ty, length: int | None) -> tuple[RangeValue, MetadataSize]:
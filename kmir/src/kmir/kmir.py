@@ -33,6 +33,7 @@ if TYPE_CHECKING:
     from pyk.proof.reachability import APRProof
     from pyk.utils import BugReport
 
+    from .kompile import KompileCache
     from .options import DisplayOpts, ProveOpts
 
 
@@ -64,6 +65,9 @@ class KMIR(KProve, KRun, KParse):
         llvm_lib_target: str | None = None,
         haskell_target: str | None = None,
         break_on_function: list[str] | None = None,
+        kompile_cache: KompileCache | None = None,
+        llvm_opt_level: int = 2,
+        kompile_jobs: int = 2,
     ) -> KMIR:
         from .kompile import kompile_smir
 
@@ -77,6 +81,9 @@ class KMIR(KProve, KRun, KParse):
             llvm_lib_target=llvm_lib_target,
             haskell_target=haskell_target,
             break_on_function=break_on_function,
+            cache=kompile_cache,
+            llvm_opt_level=llvm_opt_level,
+            jobs=kompile_jobs,
         )
         return kompiled_smir.create_kmir(bug_report_file=bug_report)
 
@@ -126,6 +133,12 @@ class KMIR(KProve, KRun, KParse):
 
         return prove(opts)
 
+    @staticmethod
+    def prove_programs(opts: ProveOpts) -> dict[str, APRProof]:
+        from ._prove import prove_batch
+
+        return prove_batch(opts)
+
 
 class KMIRSemantics(DefaultSemantics):
     terminate_on_thunk: bool
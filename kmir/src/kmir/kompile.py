@@ -2,32 +2,51 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import shutil
+import sqlite3
+import sys
+import tempfile
+import time
 from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
 from dataclasses import dataclass
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 from pyk.kast.inner import KApply, KSort, KToken, KVariable
 from pyk.kast.prelude.kint import intToken
 from pyk.kast.prelude.string import stringToken
 from pyk.kdist import kdist
-from pyk.kore.syntax import App, EVar, SortApp, String, Symbol, SymbolDecl
+from pyk.kore.syntax import App, EVar, Pattern, SortApp, String, Symbol, SymbolDecl
+from pyk.utils import hash_file, hash_str
 
 from .kmir import KMIR
+from .konvert import KoreConverter, convert_sharded
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
-    from pathlib import Path
-    from typing import Any, Final
+    from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
+    from typing import Any, BinaryIO, Final
 
     from pyk.kast.inner import KInner
-    from pyk.kore.syntax import Axiom, Pattern, Sentence
+    from pyk.kore.syntax import Axiom, Sentence
 
+    from .decoding import AllocDecoder
     from .smir import SMIRInfo
 
 
 _LOGGER: Final = logging.getLogger(__name__)
 
+# Below this many equations, forking conversion workers costs more than it saves
+_SHARDED_CONVERSION_THRESHOLD: Final = 1000
+
+# Average number of equations per stratified lookup function, and the fan-out limit of a dispatch function
+_STRATUM_SIZE: Final = 64
+_MAX_STRATUM_RADIX: Final = 16
+
+# Maximum number of keys in a single query of the term cache, below the SQLite limit on host parameters
+_SQL_BATCH_SIZE: Final = 500
+
 
 class KompiledSMIR(ABC):
     @abstractmethod
@@ -66,6 +85,8 @@ class KompileDigest:
     llvm_lib_target: str
     haskell_target: str
     break_on_function: str
+    extra_module: str = ''
+    llvm_opt_level: int = 2
 
     @staticmethod
     def load(target_dir: Path) -> KompileDigest:
@@ -82,27 +103,284 @@ class KompileDigest:
             llvm_lib_target=data['llvm-lib-target'],
             haskell_target=data['haskell-target'],
             break_on_function=data.get('break-on-function', ''),
+            extra_module=data.get('extra-module', ''),
+            llvm_opt_level=data.get('llvm-opt-level', 2),
         )
 
     def write(self, target_dir: Path) -> None:
-        self._digest_file(target_dir).write_text(
-            json.dumps(
-                {
-                    'digest': self.digest,
-                    'symbolic': self.symbolic,
-                    'llvm-target': self.llvm_target,
-                    'llvm-lib-target': self.llvm_lib_target,
-                    'haskell-target': self.haskell_target,
-                    'break-on-function': self.break_on_function,
-                },
-            ),
-        )
+        self._digest_file(target_dir).write_text(json.dumps(self.to_dict()))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'digest': self.digest,
+            'symbolic': self.symbolic,
+            'llvm-target': self.llvm_target,
+            'llvm-lib-target': self.llvm_lib_target,
+            'haskell-target': self.haskell_target,
+            'break-on-function': self.break_on_function,
+            'extra-module': self.extra_module,
+            'llvm-opt-level': self.llvm_opt_level,
+        }
+
+    def cache_key(self) -> str:
+        """Content address of the kompiled output, including the identity of the kdist targets it is built from."""
+        targets = (self.haskell_target, self.llvm_lib_target) if self.symbolic else (self.llvm_target,)
+        return hash_str({**self.to_dict(), 'kdist': {target: _kdist_stamp(target) for target in targets}})
 
     @staticmethod
     def _digest_file(target_dir: Path) -> Path:
         return target_dir / 'smir-digest.json'
 
 
+def _kdist_stamp(target: str) -> str:
+    target_dir = kdist.which(target)
+    timestamp_file = target_dir / 'timestamp'
+    timestamp = timestamp_file.stat().st_mtime_ns if timestamp_file.exists() else None
+    return f'{target_dir}@{timestamp}'
+
+
+class KompileCache:
+    """Content-addressed store of kompiled SMIR definitions, shared between target directories.
+
+    Entries are directories named by `KompileDigest.cache_key`. Target directories link to an entry
+    instead of holding their own copy, and entries are evicted least recently used first once the
+    total size of the cache exceeds `max_size` bytes. The store of `term_cache` is bounded by its own
+    number of terms instead, and does not count towards `max_size`.
+
+    Returning an entry from `get_or_build` or `acquire` leases it to the process: a shared lock is held
+    on a lease file of the entry until `release` or the end of the process, and `evict` skips entries
+    leased by any process, so the kompiled definition is not removed while it is in use. Leases rely on
+    `fcntl.flock`, so on platforms without it (Windows) no entry is ever evicted.
+    """
+
+    DEFAULT_MAX_SIZE: Final = 20 * 2**30
+
+    root: Path
+    max_size: int
+
+    def __init__(self, root: Path | None = None, *, max_size: int | None = None) -> None:
+        self.root = (root if root is not None else KompileCache.default_dir()).resolve()
+        self.max_size = max_size if max_size is not None else KompileCache.DEFAULT_MAX_SIZE
+        self._leases: dict[str, int] = {}
+
+    @staticmethod
+    def default_dir() -> Path:
+        from xdg_base_dirs import xdg_cache_home
+
+        return xdg_cache_home() / 'kmir' / 'kompiled'
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def term_cache(self) -> TermCache:
+        """Return the store of converted SMIR JSON terms kept alongside the entries."""
+        return TermCache(self.root / '.terms.sqlite')
+
+    def entries(self) -> list[Path]:
+        """Return all complete entries, least recently used first."""
+        if not self.root.is_dir():
+            return []
+        entries = [path for path in self.root.iterdir() if path.is_dir() and not path.name.startswith('.')]
+        return sorted(entries, key=lambda path: path.stat().st_mtime_ns)
+
+    @contextmanager
+    def lock(self, key: str, *, timeout: float = -1) -> Iterator[None]:
+        from filelock import FileLock
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with FileLock(self.root / f'.{key}.lock', timeout=timeout):
+            yield
+
+    def _lease_file(self, key: str) -> Path:
+        return self.root / f'.{key}.lease'
+
+    def _lease(self, key: str) -> None:
+        if sys.platform == 'win32' or key in self._leases:
+            return
+
+        import fcntl
+
+        fd = os.open(self._lease_file(key), os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        self._leases[key] = fd
+
+    def release(self, key: str) -> None:
+        """Release the lease of this process on the entry for `key`, if any."""
+        fd = self._leases.pop(key, None)
+        if fd is not None:
+            os.close(fd)  # also releases the lock
+
+    @contextmanager
+    def _unleased(self, key: str) -> Iterator[bool]:
+        """Lock the lease file of `key` exclusively if possible, yield whether the entry is free of leases."""
+        if sys.platform == 'win32':
+            yield False  # leases cannot be checked, so any entry may be in use
+            return
+
+        import fcntl
+
+        fd = os.open(self._lease_file(key), os.O_RDWR | os.O_CREAT)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+            else:
+                yield True
+        finally:
+            os.close(fd)
+
+    def acquire(self, key: str) -> Path | None:
+        """Return the entry for `key` leased to this process, or `None` if there is no such entry."""
+        with self.lock(key):
+            entry = self.lookup(key)
+            if entry is not None:
+                self._lease(key)
+            return entry
+
+    def lookup(self, key: str) -> Path | None:
+        entry = self.entry_dir(key)
+        if not entry.is_dir():
+            return None
+        os.utime(entry)  # mark as recently used
+        return entry
+
+    def get_or_build(self, key: str, build: Callable[[Path], None]) -> Path:
+        """Return the entry for `key`, calling `build` on a fresh directory to create it if missing.
+
+        Entries are built in a staging directory and renamed into place, so a present entry is always complete.
+        """
+        with self.lock(key):
+            entry = self.lookup(key)
+            if entry is not None:
+                _LOGGER.info(f'Kompiled SMIR found in cache: {entry}')
+                self._lease(key)
+                return entry
+
+            entry = self.entry_dir(key)
+            staging_dir = Path(tempfile.mkdtemp(prefix=f'.{key}.', dir=self.root))
+            try:
+                build(staging_dir)
+                staging_dir.rename(entry)
+            except BaseException:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise
+
+            _LOGGER.info(f'Stored kompiled SMIR in cache: {entry}')
+            self._lease(key)
+            return entry
+
+    def evict(self, *, keep: Path | None = None) -> list[Path]:
+        """Remove least recently used entries until the cache fits into `max_size`. Returns the removed entries.
+
+        Entries that are leased, or locked by a process building or linking them, are kept.
+        """
+        from filelock import Timeout
+
+        entries = self.entries()
+        sizes = {entry: _dir_size(entry) for entry in entries}
+        total = sum(sizes.values())
+
+        evicted: list[Path] = []
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            if entry == keep:
+                continue
+            try:
+                with self.lock(entry.name, timeout=0), self._unleased(entry.name) as unleased:
+                    if not unleased:
+                        continue  # entry is in use by some process
+                    shutil.rmtree(entry)
+            except Timeout:
+                continue  # entry is being built or linked by another process
+            total -= sizes[entry]
+            evicted.append(entry)
+            _LOGGER.info(f'Evicted kompiled SMIR from cache: {entry}')
+
+        return evicted
+
+
+class TermCache:
+    """Persistent store of SMIR JSON terms converted to Kore, shared between kompilations.
+
+    Entries are keyed by the kompiled definition, the sort and the canonical JSON of a term, see `key`, and hold the
+    Kore text of the converted term. The store is an SQLite database, so concurrent kompilations can share it. Once
+    it holds more than `max_entries` terms, the least recently used ones are removed.
+    """
+
+    DEFAULT_MAX_ENTRIES: Final = 1_000_000
+
+    path: Path
+    max_entries: int
+
+    def __init__(self, path: Path, *, max_entries: int | None = None) -> None:
+        self.path = path
+        self.max_entries = max_entries if max_entries is not None else TermCache.DEFAULT_MAX_ENTRIES
+
+    @staticmethod
+    def definition_key(definition_dir: Path) -> str:
+        return hash_file(definition_dir / 'definition.kore')
+
+    @staticmethod
+    def key(definition_key: str, sort: str, json_term: Any) -> str:
+        encoded = json.dumps(json_term, sort_keys=True, separators=(',', ':'))
+        return hash_str(f'{definition_key}:{sort}:{encoded}')
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=60)) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS terms (key TEXT PRIMARY KEY, kore TEXT NOT NULL, used INTEGER)')
+            conn.execute('CREATE INDEX IF NOT EXISTS terms_used ON terms (used)')
+            yield conn
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Pattern]:
+        """Return the stored terms for those of `keys` that are present, and mark them as recently used."""
+        from pyk.kore.parser import KoreParser
+
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, str] = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), _SQL_BATCH_SIZE):
+                batch = keys[i : i + _SQL_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                found.update(conn.execute(f'SELECT key, kore FROM terms WHERE key IN ({placeholders})', batch))
+            conn.executemany('UPDATE terms SET used = ? WHERE key = ?', ((time.time_ns(), key) for key in found))
+        return {key: KoreParser(kore).pattern() for key, kore in found.items()}
+
+    def put_many(self, terms: Iterable[tuple[str, Pattern]]) -> None:
+        """Store the given terms, then remove the least recently used ones beyond `max_entries`."""
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO terms (key, kore, used) VALUES (?, ?, ?)',
+                ((key, pattern.text, time.time_ns()) for key, pattern in terms),
+            )
+            conn.execute(
+                'DELETE FROM terms WHERE key IN (SELECT key FROM terms ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            )
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            total += os.lstat(os.path.join(dir_path, file_name)).st_size
+    return total
+
+
+def _link_kompiled(entry: Path, target_dir: Path, subdirs: Sequence[str]) -> None:
+    """Make each of `subdirs` in `target_dir` a symbolic link to the corresponding directory of a cache entry."""
+    for subdir in subdirs:
+        target = target_dir / subdir
+        if target.is_symlink() or target.is_file():
+            target.unlink()
+        elif target.is_dir():
+            shutil.rmtree(target)
+        target.symlink_to(entry / subdir, target_is_directory=True)
+
+
 def _collect_evars(pattern: Pattern) -> set[EVar]:
     """Collect all EVar instances from a Kore pattern."""
     from pyk.kore.syntax import EVar
@@ -209,7 +487,13 @@ def kompile_smir(
     llvm_lib_target: str | None = None,
     haskell_target: str | None = None,
     break_on_function: list[str] | None = None,
+    cache: KompileCache | None = None,
+    llvm_opt_level: int = 2,
+    jobs: int = 2,
 ) -> KompiledSMIR:
+    if llvm_opt_level not in (0, 1, 2, 3):
+        raise ValueError(f'Expected LLVM optimization level between 0 and 3, got: {llvm_opt_level}')
+
     kompile_digest: KompileDigest | None = None
     try:
         kompile_digest = KompileDigest.load(target_dir)
@@ -227,27 +511,84 @@ def kompile_smir(
         llvm_lib_target=llvm_lib_target,
         haskell_target=haskell_target,
         break_on_function=';'.join(break_on_function) if break_on_function else '',
+        extra_module=hash_file(extra_module) if extra_module is not None else '',
+        llvm_opt_level=llvm_opt_level,
     )
 
-    target_hs_path = target_dir / 'haskell'
-    target_llvm_lib_path = target_dir / 'llvm-library'
-    target_llvm_path = target_dir / 'llvm'
-
-    if kompile_digest == expected_digest:
-        _LOGGER.info(f'Kompiled SMIR up-to-date, no kompilation necessary: {target_dir}')
-        if symbolic:
-            return KompiledSymbolic(haskell_dir=target_hs_path, llvm_lib_dir=target_llvm_lib_path)
-        else:
-            return KompiledConcrete(llvm_dir=target_llvm_path)
+    subdirs: tuple[str, ...]
+    kompiled: KompiledSMIR
+    if symbolic:
+        subdirs = ('haskell', 'llvm-library')
+        kompiled = KompiledSymbolic(haskell_dir=target_dir / 'haskell', llvm_lib_dir=target_dir / 'llvm-library')
+    else:
+        subdirs = ('llvm',)
+        kompiled = KompiledConcrete(llvm_dir=target_dir / 'llvm')
 
-    _LOGGER.info(f'Kompiling SMIR program: {target_dir}')
+    # sub-directories may be dangling links to an evicted cache entry
+    if kompile_digest == expected_digest and all((target_dir / subdir).is_dir() for subdir in subdirs):
+        # lease a linked cache entry, it is kompiled again if evicted in the meantime
+        entry = (target_dir / subdirs[0]).resolve().parent
+        if cache is None or entry.parent != cache.root or cache.acquire(entry.name) is not None:
+            _LOGGER.info(f'Kompiled SMIR up-to-date, no kompilation necessary: {target_dir}')
+            return kompiled
 
-    kompile_digest = expected_digest
     target_dir.mkdir(parents=True, exist_ok=True)
 
+    def build(output_dir: Path) -> None:
+        _LOGGER.info(f'Kompiling SMIR program: {output_dir}')
+        _kompile_smir(
+            smir_info,
+            output_dir,
+            extra_module=extra_module,
+            symbolic=symbolic,
+            llvm_target=llvm_target,
+            llvm_lib_target=llvm_lib_target,
+            haskell_target=haskell_target,
+            break_on_function=break_on_function,
+            llvm_opt_level=llvm_opt_level,
+            jobs=jobs,
+            term_cache=cache.term_cache() if cache is not None else None,
+        )
+        expected_digest.write(output_dir)
+
+    if cache is None:
+        # do not kompile into a cache entry linked from an earlier run
+        for subdir in subdirs:
+            if (target_dir / subdir).is_symlink():
+                (target_dir / subdir).unlink()
+        build(target_dir)
+        return kompiled
+
+    entry = cache.get_or_build(expected_digest.cache_key(), build)
+    _LOGGER.info(f'Linking kompiled SMIR into {target_dir}: {entry}')
+    _link_kompiled(entry, target_dir, subdirs)
+    expected_digest.write(target_dir)
+    cache.evict(keep=entry)
+    return kompiled
+
+
+def _kompile_smir(
+    smir_info: SMIRInfo,
+    target_dir: Path,
+    *,
+    extra_module: Path | None,
+    symbolic: bool,
+    llvm_target: str,
+    llvm_lib_target: str,
+    haskell_target: str,
+    break_on_function: list[str] | None,
+    llvm_opt_level: int,
+    jobs: int,
+    term_cache: TermCache | None = None,
+) -> None:
+    target_hs_path = target_dir / 'haskell'
+    target_llvm_lib_path = target_dir / 'llvm-library'
+    target_llvm_path = target_dir / 'llvm'
+
     haskell_def_dir = kdist.which(haskell_target)
     kmir = KMIR(haskell_def_dir)
-    smir_rules: list[Sentence] = list(make_kore_rules(kmir, smir_info, break_on_function=break_on_function))
+    # The rules are generated in full once and shared by both definitions, only writing them out is streamed
+    smir_rules = make_kore_rules(kmir, smir_info, break_on_function=break_on_function, jobs=jobs, term_cache=term_cache)
     _LOGGER.info(f'Generated {len(smir_rules)} function equations to add to `definition.kore')
 
     # Load and convert extra module rules if provided
@@ -258,7 +599,7 @@ def kompile_smir(
         _LOGGER.info(f'Added {len(extra_rules)} rules from extra module: {extra_module}')
 
     # Combined rules for Haskell backend (supports both function equations and rewrites)
-    all_rules = smir_rules + extra_rules
+    all_rules = [*smir_rules, *extra_rules]
 
     if symbolic:
         # Create output directories
@@ -268,54 +609,36 @@ def kompile_smir(
         target_llvmdt_path.mkdir(parents=True, exist_ok=True)
         target_hs_path.mkdir(parents=True, exist_ok=True)
 
-        # Process LLVM definition (only SMIR rules, not extra module rules)
-        # Extra module rules are configuration rewrites that LLVM backend doesn't support
-        _LOGGER.info('Writing LLVM definition file')
-        llvm_lib_dir = kdist.which(llvm_lib_target)
-        llvm_def_file = llvm_lib_dir / 'definition.kore'
-        llvm_def_output = target_llvm_lib_path / 'definition.kore'
-        _insert_rules_and_write(llvm_def_file, smir_rules, llvm_def_output)
-
-        # Run llvm-kompile-matching and llvm-kompile for LLVM
-        # TODO use pyk to do this if possible (subprocess wrapper, maybe llvm-kompile itself?)
-        # TODO align compilation options to what we use in plugin.py
-        import subprocess
-
-        _LOGGER.info('Running llvm-kompile-matching')
-        subprocess.run(
-            ['llvm-kompile-matching', str(llvm_def_output), 'qbaL', str(target_llvmdt_path), '1/2'], check=True
-        )
-        _LOGGER.info('Running llvm-kompile')
-        subprocess.run(
-            [
-                'llvm-kompile',
-                str(llvm_def_output),
-                str(target_llvmdt_path),
-                'c',
-                '-O2',
-                '--',
-                '-o',
-                target_llvm_lib_path / 'interpreter',
-            ],
-            check=True,
-        )
+        def kompile_llvm_library() -> None:
+            # Process LLVM definition (only SMIR rules, not extra module rules)
+            # Extra module rules are configuration rewrites that LLVM backend doesn't support
+            _LOGGER.info('Writing LLVM definition file')
+            llvm_lib_dir = kdist.which(llvm_lib_target)
+            llvm_def_file = llvm_lib_dir / 'definition.kore'
+            llvm_def_output = target_llvm_lib_path / 'definition.kore'
+            _insert_rules_and_write(llvm_def_file, smir_rules, llvm_def_output)
+            _llvm_kompile(
+                llvm_def_output,
+                target_llvmdt_path,
+                kompile_type='c',
+                output_file=target_llvm_lib_path / 'interpreter',
+                opt_level=llvm_opt_level,
+            )
 
-        # Process Haskell definition (includes both SMIR rules and extra module rules)
-        _LOGGER.info('Writing Haskell definition file')
-        hs_def_file = haskell_def_dir / 'definition.kore'
-        _insert_rules_and_write(hs_def_file, all_rules, target_hs_path / 'definition.kore')
+        def write_haskell_definition() -> None:
+            # Process Haskell definition (includes both SMIR rules and extra module rules)
+            _LOGGER.info('Writing Haskell definition file')
+            hs_def_file = haskell_def_dir / 'definition.kore'
+            _insert_rules_and_write(hs_def_file, all_rules, target_hs_path / 'definition.kore')
 
-        # Copy all files except definition.kore and binary from HASKELL_DEF_DIR to out/hs
-        _LOGGER.info('Copying other artefacts into HS output directory')
-        for file_path in haskell_def_dir.iterdir():
-            if file_path.name != 'definition.kore' and file_path.name != 'haskellDefinition.bin':
-                if file_path.is_file():
-                    shutil.copy2(file_path, target_hs_path / file_path.name)
-                elif file_path.is_dir():
-                    shutil.copytree(file_path, target_hs_path / file_path.name, dirs_exist_ok=True)
+            # Share all files except definition.kore and binary from HASKELL_DEF_DIR with out/hs
+            _LOGGER.info('Linking other artefacts into HS output directory')
+            _link_static_artefacts(
+                haskell_def_dir, target_hs_path, exclude=('definition.kore', 'haskellDefinition.bin')
+            )
 
-        kompile_digest.write(target_dir)
-        return KompiledSymbolic(haskell_dir=target_hs_path, llvm_lib_dir=target_llvm_lib_path)
+        # The Haskell definition does not depend on the LLVM library, so both can be produced concurrently
+        _run_concurrently([kompile_llvm_library, write_haskell_definition], jobs=jobs)
 
     else:
         target_llvmdt_path = target_llvm_path / 'dt'
@@ -328,62 +651,167 @@ def kompile_smir(
         llvm_def_file = llvm_def_dir / 'definition.kore'
         llvm_def_output = target_llvm_path / 'definition.kore'
         _insert_rules_and_write(llvm_def_file, smir_rules, llvm_def_output)
+        _llvm_kompile(
+            llvm_def_output,
+            target_llvmdt_path,
+            kompile_type='main',
+            output_file=target_llvm_path / 'interpreter',
+            opt_level=llvm_opt_level,
+        )
+
+        _LOGGER.info('Linking other artefacts into LLVM output directory')
+        _link_static_artefacts(llvm_def_dir, target_llvm_path, exclude=('definition.kore', 'interpreter', 'dt'))
+
+
+def _llvm_kompile(definition_file: Path, dt_dir: Path, *, kompile_type: str, output_file: Path, opt_level: int) -> None:
+    # Run llvm-kompile-matching and llvm-kompile for LLVM
+    # TODO use pyk to do this if possible (subprocess wrapper, maybe llvm-kompile itself?)
+    # TODO align compilation options to what we use in plugin.py
+    import subprocess
+
+    _LOGGER.info('Running llvm-kompile-matching')
+    subprocess.run(['llvm-kompile-matching', str(definition_file), 'qbaL', str(dt_dir), '1/2'], check=True)
+    _LOGGER.info(f'Running llvm-kompile (-O{opt_level})')
+    subprocess.run(
+        [
+            'llvm-kompile',
+            str(definition_file),
+            str(dt_dir),
+            kompile_type,
+            f'-O{opt_level}',
+            '--',
+            '-o',
+            str(output_file),
+        ],
+        check=True,
+    )
 
-        import subprocess
 
-        _LOGGER.info('Running llvm-kompile-matching')
-        subprocess.run(
-            ['llvm-kompile-matching', str(llvm_def_output), 'qbaL', str(target_llvmdt_path), '1/2'], check=True
-        )
-        _LOGGER.info('Running llvm-kompile')
-        subprocess.run(
-            [
-                'llvm-kompile',
-                str(llvm_def_output),
-                str(target_llvmdt_path),
-                'main',
-                '-O2',
-                '--',
-                '-o',
-                target_llvm_path / 'interpreter',
-            ],
-            check=True,
-        )
-        blacklist = ['definition.kore', 'interpreter', 'dt']
-        to_copy = [file.name for file in llvm_def_dir.iterdir() if file.name not in blacklist]
-        for file in to_copy:
-            _LOGGER.info(f'Copying file {file}')
-            shutil.copy2(llvm_def_dir / file, target_llvm_path / file)
+def _run_concurrently(tasks: Sequence[Callable[[], None]], *, jobs: int) -> None:
+    """Run independent kompilation steps on up to `jobs` threads, re-raising the first failure.
+
+    Threads suffice here: the expensive steps are external processes (`llvm-kompile`) and file I/O.
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            task()
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(task) for task in tasks]
+        for future in futures:
+            future.result()
+
+
+def _link_static_artefacts(source_dir: Path, target_dir: Path, *, exclude: Sequence[str]) -> None:
+    """Share the program-independent artefacts of a kdist target with a kompiled SMIR directory.
+
+    Files are hard-linked where possible, so the (large) static parts of the semantics such as `compiled.json`
+    exist once per kdist target on disk. A kdist rebuild replaces the target directory, which leaves
+    existing links pointing to the old contents. Falls back to copying across file systems.
+    """
+    for path in source_dir.iterdir():
+        if path.name in exclude:
+            continue
+        _LOGGER.debug(f'Linking artefact {path.name}')
+        if path.is_file():
+            _link_or_copy(path, target_dir / path.name)
+        elif path.is_dir():
+            shutil.copytree(path, target_dir / path.name, copy_function=_link_or_copy, dirs_exist_ok=True)
+
+
+def _link_or_copy(source: str | Path, target: str | Path) -> None:
+    target = Path(target)
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
 
-        kompile_digest.write(target_dir)
-        return KompiledConcrete(llvm_dir=target_llvm_path)
+def _strata_layout(size: int) -> tuple[int, int]:
+    """Return the radix and depth of the dispatch tree for a lookup function with `size` equations.
+
+    The tree is the shallowest one with at most `_MAX_STRATUM_RADIX` branches per dispatch function that
+    keeps `_STRATUM_SIZE` equations per leaf on average. There is always at least one level, a single leaf for a
+    small table, so that lookups of missing ids reach a default of the generated rules.
+    """
+    leaves = -(-size // _STRATUM_SIZE)
+    if leaves <= 1:
+        return 1, 1
+
+    depth = 1
+    while True:
+        radix = max(2, round(leaves ** (1 / depth)))
+        while radix**depth < leaves:
+            radix += 1
+        while radix > 2 and (radix - 1) ** depth >= leaves:
+            radix -= 1
+        if radix <= _MAX_STRATUM_RADIX:
+            return radix, depth
+        depth += 1
 
 
 def _make_stratified_rules(
-    kmir: KMIR,
+    to_kore: Callable[[KInner, KSort], Pattern],
     fun: str,
     arg_sort: str,
     result_sort: str,
     id_cons: str,
-    assocs: list[tuple[int, KInner]],
+    assocs: list[tuple[int, Pattern]],
     not_found: KInner,
-    strata: int = 10,
+    layout: tuple[int, int] | None = None,
 ) -> Sequence[Sentence]:
+    """Define `fun({id_cons}(N))` by the equations in `assocs` and `not_found` otherwise.
+
+    The equations are spread over the leaves of a radix tree of stratified functions, `layout` gives its radix
+    and depth (chosen by `_strata_layout` if omitted). Leaf `{fun}{d0}-{d1}-...` holds the equations for the
+    `N` whose base-radix digits, least significant first, are `d0, d1, ...`, and the dispatch function at depth
+    `k` branches on `N /Int radix^k %Int radix`. The depth must be positive: the base semantics defines `fun`
+    itself with an `owise` rule, so `not_found` is the default of the leaves.
+    """
     from pyk.kore.prelude import int_dv
     from pyk.kore.rule import FunctionRule
 
     int_eqls = "Lbl'UndsEqlsEqls'Int'Unds'"
     int_tmod = "Lbl'UndsPerc'Int'Unds'"
+    int_tdiv = "Lbl'UndsSlsh'Int'Unds'"
 
-    arg_sort_kore = SortApp('Sort' + arg_sort)
     int_sort_kore = SortApp('SortInt')
     result_sort_kore = SortApp('Sort' + result_sort)
     id_cons_kore = 'Lbl' + id_cons
+    var_n = EVar('VarN', int_sort_kore)
+
+    radix, depth = layout if layout is not None else _strata_layout(len(assocs))
+    if depth < 1:
+        raise ValueError(f'Expected a positive depth of stratification, got: {depth}')
+
+    def name(path: tuple[int, ...]) -> str:
+        # the root is `fun` itself, a single level keeps the historical `{fun}{i}` names
+        return fun + '-'.join(str(d) for d in path)
+
+    def argument(path: tuple[int, ...], n: Pattern) -> tuple[Pattern, str]:
+        if not path:
+            return App(id_cons_kore, (), (n,)), arg_sort
+        return n, 'Int'
+
+    def digit(level: int) -> Pattern:
+        shifted = var_n if not level else App(int_tdiv, (), (var_n, int_dv(radix**level)))
+        return App(int_tmod, (), (shifted, int_dv(radix)))
+
+    def unique_id(uid: str) -> App:
+        return App("UNIQUE'Unds'ID", (), (String(uid),))
+
+    levels: list[list[tuple[int, ...]]] = [[()]]
+    for _ in range(depth):
+        levels.append([(*path, d) for path in levels[-1] for d in range(radix)])
 
     declarations = [
         # declare stratified functions
         SymbolDecl(
-            symbol=Symbol('Lbl' + fun + str(i)),
+            symbol=Symbol('Lbl' + name(path)),
             param_sorts=(int_sort_kore,),
             sort=result_sort_kore,
             attrs=(
@@ -391,64 +819,82 @@ def _make_stratified_rules(
                 App('total'),
             ),
         )
-        for i in range(strata)
+        for paths in levels[1:]
+        for path in paths
     ]
-    dispatch = [
-        # define dispatch equations to stratified functions
-        # f'rule {fun}({id_cons}(N) => {fun}{i}(N)) requires N /Int {strata} ==Int {i}'
-        FunctionRule(
-            App('Lbl' + fun, (), (App(id_cons_kore, (), (EVar('VarN', int_sort_kore),)),)),
-            App('Lbl' + fun + str(i), (), (EVar('VarN', int_sort_kore),)),
-            App(int_eqls, (), [App(int_tmod, (), [EVar('VarN', int_sort_kore), int_dv(strata)]), int_dv(i)]),
-            None,
-            result_sort_kore,
-            (arg_sort_kore,),
-            None,
-            0,
-            f'{fun}{i}-dispatch',
-            f'{fun}{i}-dispatch',
-        )
-        .to_axiom()
-        .let_attrs((App("UNIQUE'Unds'ID", (), (String(f'{fun}{i}-dispatch'),)),))
-        for i in range(strata)
-    ]
-    defaults = [
-        # define dispatch equations to stratified functions
-        # f'rule {fun}{i}(N) => {default} [owise]'
-        FunctionRule(
-            App('Lbl' + fun + str(i), (), (EVar('VarN', SortApp('SortInt')),)),
-            kmir.kast_to_kore(not_found, KSort(result_sort)),
+
+    dispatch = []
+    for level, paths in enumerate(levels[:-1]):
+        for path in paths:
+            arg, arg_sort_name = argument(path, var_n)
+            for d in range(radix):
+                # f'rule {fun}{path}(N) => {fun}{path}-{d}(N) requires N /Int radix^level %Int radix ==Int {d}'
+                # (unconditional for a radix of 1)
+                uid = f'{name((*path, d))}-dispatch'
+                rule = FunctionRule(
+                    App('Lbl' + name(path), (), (arg,)),
+                    App('Lbl' + name((*path, d)), (), (var_n,)),
+                    App(int_eqls, (), (digit(level), int_dv(d))) if radix > 1 else None,
+                    None,
+                    result_sort_kore,
+                    (SortApp('Sort' + arg_sort_name),),
+                    None,
+                    0,
+                    uid,
+                    uid,
+                )
+                dispatch.append(rule.to_axiom().let_attrs((unique_id(uid),)))
+
+    defaults = []
+    for path in levels[-1]:
+        # f'rule {fun}{path}(N) => {default} [owise]'
+        arg, arg_sort_name = argument(path, var_n)
+        uid = f'{name(path)}-default'
+        rule = FunctionRule(
+            App('Lbl' + name(path), (), (arg,)),
+            to_kore(not_found, KSort(result_sort)),
             None,
             None,
             result_sort_kore,
-            (int_sort_kore,),
+            (SortApp('Sort' + arg_sort_name),),
             None,
             200,
-            f'{fun}{i}-default',
-            f'{fun}{i}-default',
+            uid,
+            uid,
         )
-        .to_axiom()
-        .let_attrs((App('owise'), App("UNIQUE'Unds'ID", (), (String(f'{fun}{i}-default'),))))
-        for i in range(strata)
-    ]
+        defaults.append(rule.to_axiom().let_attrs((App('owise'), unique_id(uid))))
+
     equations = []
     for i, result in assocs:
-        m = i % strata
-        equations.append(
-            _mk_equation(kmir, fun + str(m), intToken(i), 'Int', result, result_sort).let_attrs(
-                (App("UNIQUE'Unds'ID", (), (String(f'{fun}{m}-{i}-generated'),)),)
-            )
-        )
+        path = tuple(i // radix**level % radix for level in range(depth))
+        arg, arg_sort_name = argument(path, int_dv(i))
+        equation = _mk_equation(name(path), arg, arg_sort_name, result, result_sort)
+        equations.append(equation.let_attrs((unique_id(f'{name(path)}-{i}-generated'),)))
     return [*declarations, *dispatch, *defaults, *equations]
 
 
 def make_kore_rules(
-    kmir: KMIR, smir_info: SMIRInfo, *, break_on_function: list[str] | None = None
+    kmir: KMIR,
+    smir_info: SMIRInfo,
+    *,
+    break_on_function: list[str] | None = None,
+    jobs: int = 1,
+    term_cache: TermCache | None = None,
 ) -> Sequence[Sentence]:
+    """Generate the equations for the functions, types and allocs of `smir_info`, and the break-on-function rule.
+
+    The result is built in full rather than produced lazily: converting the right-hand sides is sharded over all of
+    them and checked against the term cache as a whole, and the rules are written to both the LLVM and the Haskell
+    definition, concurrently.
+    """
     # kprint tool is too chatty
     kprint_logger = logging.getLogger('pyk.ktool.kprint')
     kprint_logger.setLevel(logging.WARNING)
 
+    from .decoding import AllocDecoder
+
+    to_kore = KoreConverter(kmir.definition, kmir.kast_to_kore)
+
     unknown_function = KApply(
         'MonoItemKind::MonoItemFn',
         (
@@ -458,16 +904,13 @@ def make_kore_rules(
         ),
     )
     default_function = _mk_equation(
-        kmir, 'lookupFunction', KApply('ty', (KVariable('TY'),)), 'Ty', unknown_function, 'MonoItemKind'
+        'lookupFunction',
+        to_kore(KApply('ty', (KVariable('TY'),)), KSort('Ty')),
+        'Ty',
+        to_kore(unknown_function, KSort('MonoItemKind')),
+        'MonoItemKind',
     ).let_attrs(((App('owise')),))
 
-    equations: list[Axiom] = [default_function]
-
-    for fty, kind in _functions(kmir, smir_info).items():
-        equations.append(
-            _mk_equation(kmir, 'lookupFunction', KApply('ty', (intToken(fty),)), 'Ty', kind, 'MonoItemKind')
-        )
-
     # stratify type and alloc lookups
     def get_int_arg(app: KInner) -> int:
         match app:
@@ -476,24 +919,101 @@ def make_kore_rules(
             case _:
                 raise Exception(f'Cannot extract int arg from {app}')
 
-    invalid_type = KApply('TypeInfo::VoidType', ())
-    parsed_types = [kmir.parser.parse_mir_json(type, 'TypeMapping') for type in smir_info._smir['types']]
-    type_mappings = [type_mapping for type_mapping, _ in (result for result in parsed_types if result is not None)]
+    # Look up the converted items and types in the term cache, only the others are parsed and converted
+    item_keys: dict[str, str] = {}
+    type_keys: list[str | None] = [None] * len(smir_info._smir['types'])
+    cached: dict[str, Pattern] = {}
+    if term_cache is not None:
+        definition_key = TermCache.definition_key(kmir.definition_dir)
+        item_keys = {
+            item_name: TermCache.key(definition_key, 'MonoItem', item) for item_name, item in smir_info.items.items()
+        }
+        type_keys = [TermCache.key(definition_key, 'TypeMapping', entry) for entry in smir_info._smir['types']]
+        cached = term_cache.get_many([*item_keys.values(), *(key for key in type_keys if key is not None)])
+        _LOGGER.info(f'Found {len(cached)} of {len(item_keys) + len(type_keys)} items and types in term cache')
+
+    cached_items = {item_name: cached[key] for item_name, key in item_keys.items() if key in cached}
+    functions: dict[int, KInner | Pattern] = {
+        ty: kind_kore
+        for item_name, kind_kore in cached_items.items()
+        for ty in smir_info.function_symbols_reverse.get(item_name, ())
+    }
+    functions.update(_functions(kmir, smir_info, cached_items))
+
+    types: list[tuple[int, KInner | Pattern]] = []
+    new_type_keys: list[str | None] = []  # the cache key of each parsed type, to store its converted info
+    for type_entry, type_key in zip(smir_info._smir['types'], type_keys, strict=True):
+        if type_key is not None and type_key in cached:
+            types.append((type_entry[0], cached[type_key]))
+            new_type_keys.append(None)
+            continue
+        parsed_type = kmir.parser.parse_mir_json(type_entry, 'TypeMapping')
+        if parsed_type is None:
+            continue
+        type_mapping, _ = parsed_type
+        if isinstance(type_mapping, KApply):
+            ty, info = type_mapping.args
+            types.append((get_int_arg(ty), info))
+            new_type_keys.append(type_key)
+
+    # Only the allocs used by the items are decoded, the others cannot be looked up
+    alloc_decoder = AllocDecoder(smir_info.type_layouts)
+    used_alloc_ids = set(smir_info.used_alloc_ids)
+    decoded_allocs = [
+        _decode_alloc(alloc_decoder, raw_alloc)
+        for raw_alloc in smir_info._smir['allocs']
+        if raw_alloc['alloc_id'] in used_alloc_ids
+    ]
+    _LOGGER.info(f"Decoded {len(decoded_allocs)} of {len(smir_info._smir['allocs'])} allocs, the others are unused")
+    if alloc_decoder.unable_to_decode:
+        _LOGGER.info(alloc_decoder.summary())
+    allocs = [(get_int_arg(alloc_id), value) for (alloc_id, value) in decoded_allocs]
 
-    type_assocs = [
-        (get_int_arg(ty), info)
-        for ty, info in (type_mapping.args for type_mapping in type_mappings if isinstance(type_mapping, KApply))
+    # Converting the equation right-hand sides dominates, so that is what gets sharded across workers
+    results = [
+        *((kind, KSort('MonoItemKind')) for kind in functions.values()),
+        *((info, KSort('TypeInfo')) for _, info in types),
+        *((value, KSort('Evaluation')) for _, value in allocs),
     ]
+    to_convert = [(term, sort) for term, sort in results if not isinstance(term, Pattern)]
+    if len(to_convert) < _SHARDED_CONVERSION_THRESHOLD:
+        jobs = 1
+    converted = iter(convert_sharded(to_kore, to_convert, jobs=jobs))
+    results_kore = [term if isinstance(term, Pattern) else next(converted) for term, _ in results]
+    kinds_kore = results_kore[: len(functions)]
+    infos_kore = results_kore[len(functions) : len(functions) + len(types)]
+    values_kore = results_kore[len(functions) + len(types) :]
+
+    if term_cache is not None:
+        kinds_by_ty = dict(zip(functions, kinds_kore, strict=True))
+        new_terms = [
+            (key, kinds_by_ty[smir_info.function_symbols_reverse[item_name][0]])
+            for item_name, key in item_keys.items()
+            if key not in cached and item_name in smir_info.function_symbols_reverse
+        ]
+        new_terms.extend(
+            (key, info_kore) for key, info_kore in zip(new_type_keys, infos_kore, strict=True) if key is not None
+        )
+        term_cache.put_many(new_terms)
+
+    equations: list[Axiom] = [default_function]
+    for fty, kind_kore in zip(functions, kinds_kore, strict=True):
+        equations.append(
+            _mk_equation(
+                'lookupFunction', to_kore(KApply('ty', (intToken(fty),)), KSort('Ty')), 'Ty', kind_kore, 'MonoItemKind'
+            )
+        )
 
-    type_equations = _make_stratified_rules(kmir, 'lookupTy', 'Ty', 'TypeInfo', 'ty', type_assocs, invalid_type)
+    invalid_type = KApply('TypeInfo::VoidType', ())
+    type_assocs = [(ty, info_kore) for (ty, _), info_kore in zip(types, infos_kore, strict=True)]
+    type_equations = _make_stratified_rules(to_kore, 'lookupTy', 'Ty', 'TypeInfo', 'ty', type_assocs, invalid_type)
 
     invalid_alloc_n = KApply(
         'InvalidAlloc(_)_RT-VALUE-SYNTAX_Evaluation_AllocId', (KApply('allocId', (KVariable('N'),)),)
     )
-    decoded_allocs = [_decode_alloc(smir_info=smir_info, raw_alloc=alloc) for alloc in smir_info._smir['allocs']]
-    allocs = [(get_int_arg(alloc_id), value) for (alloc_id, value) in decoded_allocs]
+    alloc_assocs = [(alloc_id, value_kore) for (alloc_id, _), value_kore in zip(allocs, values_kore, strict=True)]
     alloc_equations = _make_stratified_rules(
-        kmir, 'lookupAlloc', 'AllocId', 'Evaluation', 'allocId', allocs, invalid_alloc_n
+        to_kore, 'lookupAlloc', 'AllocId', 'Evaluation', 'allocId', alloc_assocs, invalid_alloc_n
     )
 
     # Generate break-on-function filter rule if filters are provided
@@ -504,14 +1024,18 @@ def make_kore_rules(
     return [*equations, *type_equations, *alloc_equations, *break_on_rules]
 
 
-def _functions(kmir: KMIR, smir_info: SMIRInfo) -> dict[int, KInner]:
+def _functions(kmir: KMIR, smir_info: SMIRInfo, cached: Collection[str] = ()) -> dict[int, KInner]:
+    """Return the body of each function `Ty`, leaving out the `Ty`s of the `cached` items."""
     functions: dict[int, KInner] = {}
+    cached_tys = {ty for item_name in cached for ty in smir_info.function_symbols_reverse.get(item_name, ())}
 
     # Parse regular functions
     for item_name, item in smir_info.items.items():
         if not item_name in smir_info.function_symbols_reverse:
             _LOGGER.warning(f'Item not found in SMIR: {item_name}')
             continue
+        if item_name in cached:
+            continue
         parsed_item = kmir.parser.parse_mir_json(item, 'MonoItem')
         if not parsed_item:
             raise ValueError(f'Could not parse MonoItemKind: {parsed_item}')
@@ -524,7 +1048,7 @@ def _functions(kmir: KMIR, smir_info: SMIRInfo) -> dict[int, KInner]:
     # Add intrinsic functions and linked normal symbols that have no local body in `items`.
     # Normal symbols must still map to `monoItemFn(..., noBody)` instead of falling back to UNKNOWN FUNCTION.
     for ty, sym in smir_info.function_symbols.items():
-        if ty in functions:
+        if ty in functions or ty in cached_tys:
             continue
         if 'IntrinsicSym' in sym:
             functions[ty] = KApply(
@@ -544,18 +1068,13 @@ def _functions(kmir: KMIR, smir_info: SMIRInfo) -> dict[int, KInner]:
     return functions
 
 
-def _mk_equation(kmir: KMIR, fun: str, arg: KInner, arg_sort: str, result: KInner, result_sort: str) -> Axiom:
+def _mk_equation(fun: str, arg: Pattern, arg_sort: str, result: Pattern, result_sort: str) -> Axiom:
     from pyk.kore.rule import FunctionRule
-    from pyk.kore.syntax import App, SortApp
-
-    arg_kore = kmir.kast_to_kore(arg, KSort(arg_sort))
-    fun_app = App('Lbl' + fun, (), (arg_kore,))
-    result_kore = kmir.kast_to_kore(result, KSort(result_sort))
 
-    assert isinstance(fun_app, App)
+    fun_app = App('Lbl' + fun, (), (arg,))
     rule = FunctionRule(
         lhs=fun_app,
-        rhs=result_kore,
+        rhs=result,
         req=None,
         ens=None,
         sort=SortApp('Sort' + result_sort),
@@ -592,12 +1111,12 @@ def _mk_break_on_functions_rule(kmir: KMIR, break_on_function: list[str]) -> Axi
     return rule.to_axiom()
 
 
-def _decode_alloc(smir_info: SMIRInfo, raw_alloc: Any) -> tuple[KInner, KInner]:
-    from .decoding import UnableToDecodeValue, decode_alloc_or_unable
+def _decode_alloc(alloc_decoder: AllocDecoder, raw_alloc: Any) -> tuple[KInner, KInner]:
+    from .alloc import AllocInfo
+    from .decoding import UnableToDecodeValue
 
     alloc_id = raw_alloc['alloc_id']
-    alloc_info = smir_info.allocs[alloc_id]
-    value = decode_alloc_or_unable(alloc_info=alloc_info, types=smir_info.types)
+    value = alloc_decoder.decode(AllocInfo.from_dict(raw_alloc))
 
     match value:
         case UnableToDecodeValue(msg):
@@ -609,20 +1128,69 @@ def _decode_alloc(smir_info: SMIRInfo, raw_alloc: Any) -> tuple[KInner, KInner]:
     return alloc_id_term, value.to_kast()
 
 
-def _insert_rules_and_write(input_file: Path, rules: Sequence[Sentence], output_file: Path) -> None:
-    with open(input_file, 'r') as f:
-        lines = f.readlines()
-
-    # last line must start with 'endmodule'
-    last_line = lines[-1]
-    assert last_line.startswith('endmodule')
-    new_lines = lines[:-1]
+def _insert_rules_and_write(input_file: Path, rules: Iterable[Sentence], output_file: Path) -> None:
+    """Write `input_file` to `output_file` with `rules` inserted before its final `endmodule` line.
 
-    # Insert rules before the endmodule line
-    new_lines.append(f'\n// Generated from file {input_file}\n\n')
-    new_lines.extend([ax.text + '\n' for ax in rules])
-    new_lines.append('\n' + last_line)
+    The base definition is copied without being read into memory, and each rule is written
+    to the output as it is produced.
+    """
+    with open(input_file, 'rb') as src:
+        last_line_start = _last_line_offset(src)
+        src.seek(last_line_start)
+        last_line = src.read().decode()
+        # last line must start with 'endmodule'
+        assert last_line.startswith('endmodule')
+
+        src.seek(0)
+        with open(output_file, 'wb') as dst:
+            _copy_range(src, dst, last_line_start)
+
+    with open(output_file, 'a') as f:
+        # Insert rules before the endmodule line
+        f.write(f'\n// Generated from file {input_file}\n\n')
+        for rule in rules:
+            rule.write(f)
+            f.write('\n')
+        f.write('\n' + last_line)
+
+
+def _last_line_offset(f: BinaryIO, block_size: int = 4096) -> int:
+    """Return the offset at which the last line of a file starts, ignoring a single trailing newline."""
+    end = f.seek(0, os.SEEK_END)
+    if end > 0:
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            end -= 1
+
+    pos = end
+    while pos > 0:
+        read_start = max(0, pos - block_size)
+        f.seek(read_start)
+        block = f.read(pos - read_start)
+        newline = block.rfind(b'\n')
+        if newline >= 0:
+            return read_start + newline + 1
+        pos = read_start
+    return 0
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, count: int, chunk_size: int = 2**20) -> None:
+    """Copy `count` bytes from the current position of `src` to `dst`, in kernel space where supported."""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while count > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), count)
+                if copied == 0:
+                    break
+                count -= copied
+            return
+        except OSError:
+            # not supported for this pair of files, continue copying through user space
+            pass
 
-    # Write to output file
-    with open(output_file, 'w') as f:
-        f.writelines(new_lines)
+    while count > 0:
+        chunk = src.read(min(chunk_size, count))
+        if not chunk:
+            break
+        dst.write(chunk)
+        count -= len(chunk)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING
+
+from pyk.kast.inner import KApply, KSort
+from pyk.konvert import kast_to_kore, munge
+from pyk.kore.syntax import App, SortApp
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+    from typing import Final
+
+    from pyk.kast.inner import KInner
+    from pyk.kast.outer import KDefinition
+    from pyk.kore.syntax import Pattern
+
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+_K: Final = KSort('K')
+
+
+class KoreConverter:
+    """Convert KAST terms to Kore, converting each distinct subterm only once.
+
+    Applications of non-parametric productions are converted directly and hash-consed: an application is
+    looked up by its label, target sort and the identities of its converted arguments, so equal subterms
+    yield the same `Pattern` object. Terms are also remembered by identity, so a subterm object shared
+    between several terms is not traversed again. Any other subterm (tokens, variables, K sequences, ML
+    connectives, parametric or K-sorted productions) is handed to `fallback` on its own.
+    """
+
+    definition: KDefinition
+    _fallback: Callable[[KInner, KSort], Pattern]
+    _productions: dict[str, tuple[KSort, tuple[KSort, ...]] | None]
+    _apps: dict[tuple[object, ...], Pattern]
+    _delegated: dict[tuple[KInner, KSort], Pattern]
+    _seen: dict[tuple[int, KSort], tuple[KInner, Pattern]]
+
+    def __init__(self, definition: KDefinition, fallback: Callable[[KInner, KSort], Pattern] | None = None) -> None:
+        self.definition = definition
+        self._fallback = fallback if fallback is not None else partial(kast_to_kore, definition)
+        self._productions = {}
+        self._apps = {}
+        self._delegated = {}
+        self._seen = {}
+
+    def __call__(self, term: KInner, sort: KSort) -> Pattern:
+        try:
+            return self._convert(term, sort)
+        except ValueError as err:
+            # Leave error reporting (and the `kast` fallback of `KPrint`) to the unmemoized conversion
+            _LOGGER.debug(f'Memoized conversion failed, converting term as a whole: {err}')
+            return self._fallback(term, sort)
+
+    def convert_all(self, terms: Iterable[tuple[KInner, KSort]]) -> list[Pattern]:
+        return [self(term, sort) for term, sort in terms]
+
+    def _convert(self, term: KInner, sort: KSort) -> Pattern:
+        # Iterative post-order traversal, argument results are collected on `done`
+        stack: list[tuple[KInner, KSort, bool]] = [(term, sort, False)]
+        done: list[Pattern] = []
+        while stack:
+            term, sort, expanded = stack.pop()
+
+            if not expanded:
+                seen = self._seen.get((id(term), sort))
+                if seen is not None and seen[0] is term:
+                    done.append(seen[1])
+                    continue
+
+                if isinstance(term, KApply) and (production := self._production(term.label.name)) is not None:
+                    _, arg_sorts = production
+                    stack.append((term, sort, True))
+                    stack.extend(
+                        (arg, arg_sort, False)
+                        for arg, arg_sort in zip(reversed(term.args), reversed(arg_sorts), strict=True)
+                    )
+                    continue
+
+                pattern = self._delegated.get((term, sort))
+                if pattern is None:
+                    pattern = self._fallback(term, sort)
+                    self._delegated[term, sort] = pattern
+                done.append(self._remember(term, sort, pattern))
+                continue
+
+            assert isinstance(term, KApply)
+            arity = term.arity
+            args = tuple(done[len(done) - arity :])
+            del done[len(done) - arity :]
+
+            key = (term.label.name, sort, *map(id, args))
+            pattern = self._apps.get(key)
+            if pattern is None:
+                production = self._production(term.label.name)
+                assert production is not None
+                actual_sort, _ = production
+                pattern = self._inject(App('Lbl' + munge(term.label.name), (), args), actual_sort, sort)
+                self._apps[key] = pattern
+            done.append(self._remember(term, sort, pattern))
+
+        (result,) = done
+        return result
+
+    def _production(self, label: str) -> tuple[KSort, tuple[KSort, ...]] | None:
+        """Return the sort and argument sorts of `label`, or `None` if it cannot be converted directly."""
+        if label in self._productions:
+            return self._productions[label]
+        production = self.definition.symbols.get(label)
+        res: tuple[KSort, tuple[KSort, ...]] | None = None
+        if production is not None and not production.params:
+            arg_sorts = tuple(production.argument_sorts)
+            if _K not in arg_sorts:
+                res = (production.sort, arg_sorts)
+        self._productions[label] = res
+        return res
+
+    def _inject(self, pattern: Pattern, actual_sort: KSort, sort: KSort) -> Pattern:
+        if actual_sort == sort:
+            return pattern
+        if actual_sort in self.definition.subsorts(sort):
+            return App('inj', (SortApp('Sort' + actual_sort.name), SortApp('Sort' + sort.name)), (pattern,))
+        raise ValueError(f'Sort {actual_sort.name} is not a subsort of {sort.name}')
+
+    def _remember(self, term: KInner, sort: KSort, pattern: Pattern) -> Pattern:
+        # The term is stored alongside the pattern so that its id cannot be reused while the entry exists
+        self._seen[id(term), sort] = (term, pattern)
+        return pattern
+
+
+_SHARDED: tuple[KoreConverter, Sequence[tuple[KInner, KSort]]] | None = None
+
+
+def convert_sharded(
+    converter: KoreConverter, terms: Sequence[tuple[KInner, KSort]], *, jobs: int, shards_per_job: int = 4
+) -> list[Pattern]:
+    """Convert `terms` with `converter`, sharded across `jobs` worker processes.
+
+    Workers are forked, so they inherit `converter` and `terms` from this process and only the resulting
+    patterns are sent back. Conversion stays in-process if `jobs` is 1 or the platform cannot fork.
+    """
+    global _SHARDED
+
+    if jobs < 1:
+        raise ValueError(f'Expected a positive number of jobs, got: {jobs}')
+
+    if jobs == 1 or len(terms) < 2 or 'fork' not in multiprocessing.get_all_start_methods():
+        return converter.convert_all(terms)
+
+    shard_size = -(-len(terms) // (jobs * shards_per_job))
+    shards = [(start, min(start + shard_size, len(terms))) for start in range(0, len(terms), shard_size)]
+    _LOGGER.info(f'Converting {len(terms)} terms to Kore in {len(shards)} shards on {jobs} workers')
+
+    _SHARDED = (converter, terms)
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork')) as pool:
+            return [pattern for patterns in pool.map(_convert_shard, shards) for pattern in patterns]
+    finally:
+        _SHARDED = None
+
+
+def _convert_shard(shard: tuple[int, int]) -> list[Pattern]:
+    assert _SHARDED is not None
+    converter, terms = _SHARDED
+    start, stop = shard
+    return converter.convert_all(terms[start:stop])
@@ -1,49 +1,506 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import marshal
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from itertools import chain
 from math import ceil, log10
-from typing import TYPE_CHECKING
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
 
-from .smir import SMIRInfo
+from .smir import SMIRInfo, canonical_digest
+from .smir_file import dump_smir_encoded
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
-    from typing import Final
+    from collections.abc import Callable, Hashable, Iterable, Iterator, Mapping, Sequence
+    from typing import Any, Final
 
 _LOGGER: Final = logging.getLogger(__name__)
 
+_T = TypeVar('_T')
+_R = TypeVar('_R')
 
-def link(smirs: list[SMIRInfo]) -> SMIRInfo:
-    max_id_range = max(map(id_range, smirs))
-    # round up to nearest power of 10
-    offset = 10 ** (ceil(log10(max_id_range)))
+_SYMBOL_CACHE_SIZE: Final = 1 << 16
+_RUST_ID: Final = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')
+_GENERICS: Final = re.compile(r'(?<!^)(?<!:)<')
+_SYMBOL_TOKENS: Final = re.compile(r'::|:.?|->|[<>]|[^:<>-]+|-', re.S)
 
-    _LOGGER.info(f'Maximum type ID (offset) is {offset}, linking {len(smirs)} smir.json files')
+# Sections concatenated by the linker, debug and uneval_constants are omitted in the linked output
+_SECTIONS: Final = ('allocs', 'functions', 'items', 'types', 'spans')
+
+
+def link(smirs: list[SMIRInfo], *, jobs: int = 1, deduplicate: bool = False) -> SMIRInfo:
+    """Link SMIR in memory, the given `SMIRInfo`s are not modified.
 
-    for i, smir in enumerate(smirs):
-        qualify_items(smir)
+    With `jobs` greater than 1, the inputs are qualified and offset in that many worker processes. With
+    `deduplicate`, equivalent types, allocs, spans and items of different crates are merged and all IDs are renamed
+    densely, see `_deduplicate_tables`.
+    """
+    if jobs < 1:
+        raise ValueError(f'Expected a positive number of jobs, got: {jobs}')
+
+    offset = _offset(map(id_range, smirs))
 
-        smir_offset = offset * i
-        _LOGGER.debug(f'Offset {smir_offset} for smir {smir._smir["name"]}')
-        apply_offset(smir, smir_offset)
+    _LOGGER.info(f'Maximum type ID (offset) is {offset}, linking {len(smirs)} smir.json files')
 
-    result_dict = {
+    result_dict: dict[str, Any] = {
         'name': ','.join(smir._smir['name'] for smir in smirs),
         'crate_id': 0,  # HACK
-        'allocs': [a for smir in smirs for a in smir._smir['allocs']],
-        'functions': [f for smir in smirs for f in smir._smir['functions']],
-        'items': [i for smir in smirs for i in smir._smir['items']],
-        'types': [t for smir in smirs for t in smir._smir['types']],
-        'spans': [s for smir in smirs for s in smir._smir['spans']],
-        'machine': smirs[0]._smir['machine'],
-        # debug and uneval_constants are omitted in the linked output
     }
+    result_dict.update((section, []) for section in _SECTIONS)
+    result_dict['machine'] = smirs[0]._smir['machine']
+
+    linked_crates: Iterable[dict[str, list]]
+    if jobs == 1:
+        linked_crates = (_link_crate(smir._smir, offset * i) for i, smir in enumerate(smirs))
+    else:
+        # inputs are sent to the workers as copies, so they can be updated there in place
+        tasks = [(dict(smir._smir), offset * i) for i, smir in enumerate(smirs)]
+        linked_crates = _map_crates(_link_dict, tasks, jobs)
+
+    for linked_crate in linked_crates:
+        for section, elems in linked_crate.items():
+            result_dict[section].extend(elems)
+
+    if deduplicate:
+        ids = DenseIds()
+        crate_keys = [smir.digest for smir in smirs]
+        result_dict.update(_deduplicate_tables(ids, result_dict, crate_keys=crate_keys, offset=offset))
+        result_dict['items'] = list(_deduplicate_items(ids, result_dict['items']))
+
     return SMIRInfo(result_dict)
 
 
+def link_files(
+    smir_files: Sequence[Path],
+    output_file: Path,
+    *,
+    jobs: int = 1,
+    deduplicate: bool = False,
+    fragment_dir: Path | None = None,
+) -> None:
+    """Link SMIR JSON files into `output_file`, holding only `jobs` of the inputs in memory at a time.
+
+    A first pass determines the offset from the ID ranges of the inputs. The second pass qualifies and offsets each
+    input and writes its sections to fragment files, which are finally concatenated into `output_file`. Both passes
+    run in `jobs` worker processes if `jobs` is greater than 1. With `deduplicate`, the output is deduplicated as by
+    `link`; this holds all sections but the items in memory.
+
+    Fragments are kept in `fragment_dir` if given, see `FragmentStore`, so that relinking only processes the inputs
+    that changed since, and does not write `output_file` at all if none did.
+    """
+    if jobs < 1:
+        raise ValueError(f'Expected a positive number of jobs, got: {jobs}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = FragmentStore(fragment_dir if fragment_dir is not None else Path(tmp_dir))
+        digests = [store.digest(smir_file) for smir_file in smir_files]
+        output_key = canonical_digest({'inputs': digests, 'deduplicate': deduplicate})
+        if store.is_output_current(output_file, output_key):
+            _LOGGER.info(f'Linked output is up to date: {output_file}')
+            return
+
+        known: dict[str, tuple[str, Any, int]] = {}
+        new_inputs: dict[str, Path] = {}
+        for digest, smir_file in zip(digests, smir_files, strict=True):
+            if digest in known or digest in new_inputs:
+                continue
+            summary = store.summary(digest)
+            if summary is None:
+                new_inputs[digest] = smir_file
+            else:
+                known[digest] = summary
+        new_summaries = _map_crates(_crate_summary, list(new_inputs.values()), jobs)
+        for digest, summary in zip(new_inputs, new_summaries, strict=True):
+            store.write_summary(digest, summary)
+            known[digest] = summary
+        summaries = [known[digest] for digest in digests]
+        offset = _offset(crate_id_range for _, _, crate_id_range in summaries)
+
+        _LOGGER.info(f'Maximum type ID (offset) is {offset}, linking {len(smir_files)} smir.json files')
+
+        crate_dirs = [store.fragment_dir(digest, offset * i) for i, digest in enumerate(digests)]
+        tasks = {
+            crate_dir: (smir_file, offset * i, crate_dir)
+            for i, (smir_file, crate_dir) in enumerate(zip(smir_files, crate_dirs, strict=True))
+            if not crate_dir.exists()
+        }
+        _LOGGER.info(f'Reusing {len(smir_files) - len(tasks)} of {len(smir_files)} linked fragments')
+        _map_crates(_link_file, list(tasks.values()), jobs)
+
+        members: list[tuple[str, str | Iterable[str]]] = [
+            ('name', json.dumps(','.join(name for name, _, _ in summaries))),
+            ('crate_id', '0'),  # HACK
+        ]
+        if deduplicate:
+            ids = DenseIds()
+            tables = _deduplicate_tables(
+                ids,
+                {
+                    section: [json.loads(elem) for elem in _read_section(crate_dirs, section)]
+                    for section in _SECTIONS
+                    if section != 'items'
+                },
+                crate_keys=digests,
+                offset=offset,
+            )
+            items = _deduplicate_items(ids, map(json.loads, _read_section(crate_dirs, 'items')))
+            sections = {section: map(json.dumps, tables[section]) for section in tables}
+            sections['items'] = map(json.dumps, items)
+            members.extend((section, sections[section]) for section in _SECTIONS)
+        else:
+            members.extend((section, _read_section(crate_dirs, section)) for section in _SECTIONS)
+        members.append(('machine', json.dumps(summaries[0][1])))
+        dump_smir_encoded(members, output_file)
+
+        store.retain(crate_dirs)
+        store.write_manifest(output_file, output_key)
+
+
+class FragmentStore:
+    """Linked fragments of SMIR JSON files, keyed by the SHA-256 of the file contents and the offset applied.
+
+    Layout of the store directory:
+
+    - `manifest.json`: the size, modification time and digest of each input file, so that unchanged inputs are not
+      hashed again, and the same for the last linked output together with a key for its inputs
+    - `<digest>/summary.json`: name, machine and ID range of the input with that digest
+    - `<digest>/<offset>/<section>.jsonl`: the qualified and offset elements of each linked section, one per line
+
+    Fragments are created atomically, but the store is not meant to be shared by concurrent links.
+    """
+
+    VERSION: Final = 1
+
+    root: Path
+    _manifest: dict[str, Any]
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        try:
+            manifest = json.loads((root / 'manifest.json').read_text())
+        except (OSError, ValueError):
+            manifest = None
+        if not isinstance(manifest, dict) or manifest.get('version') != FragmentStore.VERSION:
+            manifest = {'version': FragmentStore.VERSION, 'inputs': {}, 'output': None}
+        self._manifest = manifest
+
+    def digest(self, smir_file: Path) -> str:
+        """Return the SHA-256 of the contents of `smir_file`, hashing it only if it changed since last recorded."""
+        stat = smir_file.stat()
+        key = str(smir_file.resolve())
+        entry = self._manifest['inputs'].get(key)
+        if _stat_matches(entry, stat):
+            return entry['digest']
+
+        hash_object = hashlib.sha256()
+        with smir_file.open('rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hash_object.update(chunk)
+        digest = hash_object.hexdigest()
+        self._manifest['inputs'][key] = {'size': stat.st_size, 'mtime-ns': stat.st_mtime_ns, 'digest': digest}
+        return digest
+
+    def summary(self, digest: str) -> tuple[str, Any, int] | None:
+        try:
+            name, machine, crate_id_range = json.loads((self.root / digest / 'summary.json').read_text())
+        except (OSError, ValueError):
+            return None
+        return name, machine, crate_id_range
+
+    def write_summary(self, digest: str, summary: tuple[str, Any, int]) -> None:
+        (self.root / digest).mkdir(parents=True, exist_ok=True)
+        (self.root / digest / 'summary.json').write_text(json.dumps(summary))
+
+    def fragment_dir(self, digest: str, offset: int) -> Path:
+        return self.root / digest / str(offset)
+
+    def is_output_current(self, output_file: Path, key: str) -> bool:
+        """Return whether `output_file` was linked from inputs with the given `key` and is unchanged since."""
+        entry = self._manifest['output']
+        if not entry or entry.get('path') != str(output_file.resolve()) or entry.get('key') != key:
+            return False
+        try:
+            stat = output_file.stat()
+        except OSError:
+            return False
+        return _stat_matches(entry, stat)
+
+    def retain(self, fragment_dirs: Iterable[Path]) -> None:
+        """Remove all fragments but `fragment_dirs`, and the summaries of inputs without a retained fragment."""
+        retained = set(fragment_dirs)
+        for input_dir in self.root.iterdir():
+            if not input_dir.is_dir():
+                continue
+            fragments = [path for path in input_dir.iterdir() if path.is_dir()]
+            if not any(fragment in retained for fragment in fragments):
+                shutil.rmtree(input_dir)
+                continue
+            for fragment in fragments:
+                if fragment not in retained:
+                    shutil.rmtree(fragment)
+
+    def write_manifest(self, output_file: Path, key: str) -> None:
+        stat = output_file.stat()
+        self._manifest['output'] = {
+            'path': str(output_file.resolve()),
+            'key': key,
+            'size': stat.st_size,
+            'mtime-ns': stat.st_mtime_ns,
+        }
+        self._manifest['inputs'] = {
+            path: entry for path, entry in self._manifest['inputs'].items() if (self.root / entry['digest']).is_dir()
+        }
+        (self.root / 'manifest.json').write_text(json.dumps(self._manifest))
+
+
+def _stat_matches(entry: Any, stat: os.stat_result) -> bool:
+    return isinstance(entry, dict) and entry.get('size') == stat.st_size and entry.get('mtime-ns') == stat.st_mtime_ns
+
+
 def id_range(smir: SMIRInfo) -> int:
-    return max(0, *smir.function_symbols, *smir.types, *smir.spans, *smir.allocs)
+    # negative Ty IDs of functions not in the `functions` table do not need an offset
+    smir_dict = smir._smir
+    return max(
+        0,
+        *(ty for ty, *_ in smir_dict['functions'] if type(ty) is int),
+        *(ty for ty, _ in smir_dict['types']),
+        *(span for span, _ in smir_dict['spans']),
+        *(alloc['alloc_id'] for alloc in smir_dict['allocs']),
+    )
+
+
+def _offset(id_ranges: Iterable[int]) -> int:
+    # round up to nearest power of 10
+    return 10 ** (ceil(log10(max(id_ranges))))
+
+
+def _link_crate(smir: Mapping[str, Any], offset: int, *, copy: bool = True) -> dict[str, list]:
+    """Return the linked sections of a single input, offset by `offset`.
+
+    Unless `copy` is `False`, sections are copied before they are updated, so that `smir` is left unchanged.
+    """
+    sections = {section: _copy_json(smir[section]) if copy else smir[section] for section in _SECTIONS}
+    info = SMIRInfo({'name': smir['name'], **sections})
+
+    qualify_items(info)
+
+    _LOGGER.debug(f'Offset {offset} for smir {smir["name"]}')
+    apply_offset(info, offset)
+
+    return {section: info._smir[section] for section in _SECTIONS}
+
+
+def _read_section(crate_dirs: Iterable[Path], section: str) -> Iterator[str]:
+    for crate_dir in crate_dirs:
+        with (crate_dir / f'{section}.jsonl').open() as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+
+def _map_crates(f: Callable[[_T], _R], tasks: Sequence[_T], jobs: int) -> list[_R]:
+    if jobs == 1 or len(tasks) < 2:
+        return list(map(f, tasks))
+    mp_context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context) as pool:
+        return list(pool.map(f, tasks))
+
+
+def _crate_summary(smir_file: Path) -> tuple[str, Any, int]:
+    smir = SMIRInfo.from_file(smir_file)
+    return smir._smir['name'], smir._smir['machine'], id_range(smir)
+
+
+def _link_file(task: tuple[Path, int, Path]) -> None:
+    smir_file, offset, crate_dir = task
+    _LOGGER.debug(f'Linking {smir_file}')
+    # freshly loaded, so the sections can be offset in place
+    smir = SMIRInfo.from_file(smir_file)
+    # written to a temporary directory first, so that existing fragment directories are complete
+    tmp_dir = crate_dir.with_name(f'.{crate_dir.name}.{os.getpid()}.tmp')
+    tmp_dir.mkdir(parents=True)
+    try:
+        for section, elems in _link_crate(smir._smir, offset, copy=False).items():
+            with (tmp_dir / f'{section}.jsonl').open('w') as f:
+                f.writelines(json.dumps(elem) + '\n' for elem in elems)
+        tmp_dir.rename(crate_dir)
+    finally:
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+
+
+def _link_dict(task: tuple[dict[str, Any], int]) -> dict[str, list]:
+    smir, offset = task
+    return _link_crate(smir, offset, copy=False)
+
+
+def _deduplicate_tables(
+    ids: DenseIds,
+    sections: Mapping[str, list],
+    *,
+    crate_keys: Sequence[str],
+    offset: int,
+) -> dict[str, list]:
+    """Merge equivalent entries of the `allocs`, `functions`, `types` and `spans` of linked SMIR.
+
+    Entries are renamed in `ids`, and the deduplicated tables are returned. Types are merged if they are equal up to
+    the `Ty`s they refer to, and those are equivalent in turn, function `Ty`s are merged if they have the same
+    symbol. Immutable memory allocations are merged in the same way as types, and spans if they are equal. The given
+    sections are not modified.
+
+    The sections are those of the crates identified by `crate_keys`, offset by multiples of `offset`. A `Ty` that is
+    in neither the types nor the functions is only merged with the same `Ty` of a crate with the same key.
+    """
+    spans = []
+    for span_id, span in sections['spans']:
+        if ids.spans.add(span_id, json.dumps(span)):
+            spans.append([ids.span(span_id), span])
+
+    type_infos: dict[int, Any] = {}
+    labels: dict[int, str] = {}
+    children: dict[int, list[int]] = {}
+    adt_defs: dict[int, list[int]] = {}
+    for ty, type_info in sections['types']:
+        if ty in type_infos:
+            continue
+        type_infos[ty] = type_info
+        recorded = _RecordedIds(ids, ('ty', 'adt_def'))
+        labels[ty] = json.dumps(remap_type_info(_copy_json(type_info), recorded), sort_keys=True)
+        children[ty] = recorded.recorded['ty']
+        adt_defs[ty] = recorded.recorded['adt_def']
+    for ty, sym in sections['functions']:
+        if type(ty) is int:
+            labels[ty] = labels.get(ty, '') + json.dumps(sym, sort_keys=True)
+            children.setdefault(ty, [])
+    # nothing is known about `Ty`s missing from both tables, but a repeated crate refers to the same ones
+    for ty in [child for ty_children in children.values() for child in ty_children if child not in labels]:
+        crate = ty // offset
+        labels[ty] = json.dumps(
+            ['missing', crate_keys[crate], ty % offset] if 0 <= crate < len(crate_keys) else ['missing', ty]
+        )
+        children[ty] = []
+
+    ty_classes = _bisimilar_classes(labels, children)
+    for ty in labels:
+        ids.tys.add(ty, ty_classes[ty])
+
+    # an ADT is shared by the instantiations of a generic type, so ADTs of merged types are merged transitively
+    adt_parents: dict[int, int] = {}
+    class_adts: dict[int, int] = {}
+    for ty, ty_adt_defs in adt_defs.items():
+        for adt_def in ty_adt_defs:
+            _union(adt_parents, adt_def, class_adts.setdefault(ty_classes[ty], adt_def))
+    for adt_def in adt_parents:
+        ids.adt_defs.add(adt_def, _find(adt_parents, adt_def))
+
+    alloc_infos: dict[int, Any] = {}
+    alloc_labels: dict[int, str] = {}
+    alloc_children: dict[int, list[int]] = {}
+    for alloc in sections['allocs']:
+        alloc_id = alloc['alloc_id']
+        if alloc_id in alloc_infos:
+            continue
+        alloc_infos[alloc_id] = alloc
+        match alloc['global_alloc']:
+            case {'Memory': {'mutability': 'Not'}}:
+                recorded = _RecordedIds(ids, ('alloc',))
+                global_alloc = remap_global_alloc(_copy_json(alloc['global_alloc']), recorded)
+                alloc_labels[alloc_id] = json.dumps([ids.ty(alloc['ty']), global_alloc], sort_keys=True)
+                alloc_children[alloc_id] = recorded.recorded['alloc']
+            case _:
+                # statics and mutable memory have an identity of their own
+                alloc_labels[alloc_id] = str(alloc_id)
+                alloc_children[alloc_id] = []
+
+    alloc_classes = _bisimilar_classes(alloc_labels, alloc_children)
+    merged_allocs = [alloc_id for alloc_id in alloc_infos if ids.allocs.add(alloc_id, alloc_classes[alloc_id])]
+    allocs = [remap_alloc(_copy_json(alloc_infos[alloc_id]), ids) for alloc_id in merged_allocs]
+
+    types = []
+    emitted_tys: set[int] = set()
+    for ty, type_info in type_infos.items():
+        new_ty = ids.ty(ty)
+        if new_ty not in emitted_tys:
+            emitted_tys.add(new_ty)
+            types.append([new_ty, remap_type_info(_copy_json(type_info), ids)])
+
+    functions = []
+    emitted_functions: set[str] = set()
+    for ty, sym in sections['functions']:
+        new_ty = ids.ty(ty) if type(ty) is int else ty
+        key = json.dumps([new_ty, sym], sort_keys=True)
+        if key not in emitted_functions:
+            emitted_functions.add(key)
+            functions.append([new_ty, sym])
+
+    _LOGGER.info(
+        f'Deduplicated {len(sections["types"])} types to {len(types)}, {len(sections["allocs"])} allocs to '
+        f'{len(allocs)} and {len(sections["spans"])} spans to {len(spans)}'
+    )
+    return {'allocs': allocs, 'functions': functions, 'types': types, 'spans': spans}
+
+
+def _deduplicate_items(ids: DenseIds, items: Iterable[dict]) -> Iterator[dict]:
+    """Drop items with a symbol name seen before, and rename the IDs in the others in place."""
+    symbol_names: set[str] = set()
+    for item in items:
+        if item['symbol_name'] in symbol_names:
+            _LOGGER.debug(f'Dropping duplicate item: {item["symbol_name"]}')
+            continue
+        symbol_names.add(item['symbol_name'])
+        remap_item(item['mono_item_kind'], ids)
+        yield item
+
+
+def _bisimilar_classes(labels: Mapping[int, str], children: Mapping[int, Sequence[int]]) -> dict[int, int]:
+    """Partition nodes into classes of equal label and pairwise equivalent children, by partition refinement.
+
+    Children without a label are only equivalent to themselves.
+    """
+    label_classes: dict[str, int] = {}
+    classes = {node: label_classes.setdefault(label, len(label_classes)) for node, label in labels.items()}
+    count = len(label_classes)
+    while True:
+        keys: dict[tuple, int] = {}
+        refined = {
+            node: keys.setdefault(
+                (classes[node], *(classes.get(child, (child,)) for child in children[node])),
+                len(keys),
+            )
+            for node in classes
+        }
+        if len(keys) == count:
+            return refined
+        classes, count = refined, len(keys)
+
+
+def _find(parents: dict[int, int], node: int) -> int:
+    parents.setdefault(node, node)
+    while parents[node] != node:
+        parents[node] = parents[parents[node]]
+        node = parents[node]
+    return node
+
+
+def _union(parents: dict[int, int], node: int, other: int) -> None:
+    root, other_root = _find(parents, node), _find(parents, other)
+    if root != other_root:
+        parents[max(root, other_root)] = min(root, other_root)
+
+
+def _copy_json(value: Any) -> Any:
+    # marshal round trips JSON data considerably faster than `copy.deepcopy`
+    return marshal.loads(marshal.dumps(value))
 
 
 def qualify_items(info: SMIRInfo) -> None:
@@ -52,6 +509,7 @@ def qualify_items(info: SMIRInfo) -> None:
     The missing prefix is extracted from the symbol name.
     """
 
+    fn_items = []
     for item in info._smir['items']:
         match item:
             case {
@@ -65,11 +523,19 @@ def qualify_items(info: SMIRInfo) -> None:
                 if not symbol_name.startswith('_Z'):
                     _LOGGER.warning(f'Symbol name is not mangled, name qualification skipped: {symbol_name}')
                     continue
+                fn_items.append((symbol_name, name, mono_item_fn))
+
+    symbols = demangle_symbols(symbol_name for symbol_name, _, _ in fn_items)
+    for symbol_name, name, mono_item_fn in fn_items:
+        qualified_name = _qualified_name(_split_symbol(symbols[symbol_name]), name)
+        if qualified_name != name:
+            _LOGGER.info(f'Qualified item {symbol_name!r}: {name} -> {qualified_name}')
+            mono_item_fn['name'] = qualified_name
+
 
-                qualified_name = _mono_item_fn_name(symbol_name=symbol_name, name=name)
-                if qualified_name != name:
-                    _LOGGER.info(f'Qualified item {symbol_name!r}: {name} -> {qualified_name}')
-                    mono_item_fn['name'] = qualified_name
+def demangle_symbols(symbol_names: Iterable[str]) -> dict[str, str]:
+    """Demangle each distinct symbol name once, see `_demangle`."""
+    return {symbol_name: _demangle(symbol_name) for symbol_name in dict.fromkeys(symbol_names)}
 
 
 def _mono_item_fn_name(symbol_name: str, name: str) -> str:
@@ -84,25 +550,18 @@ def _mono_item_fn_name(symbol_name: str, name: str) -> str:
                 |      +- kept from name
                 +- taken from symbol
     """
+    return _qualified_name(_split_symbol(_demangle(symbol_name)), name)
 
-    def extract_id(s: str) -> str | None:
-        """Extract a Rust id prefix from a string."""
-        import re
 
-        m = re.match(r'^(?P<func>[a-zA-Z_][a-zA-Z0-9_]*)', s)
-        if not m:
-            return None
-        return m['func']
-
-    symbol = _demangle(symbol_name)
-    split_symbol = list(_symbol_segments(symbol))
-    split_name = list(_symbol_segments(name))
+def _qualified_name(split_symbol: tuple[str, ...], name: str) -> str:
+    """Extend ``name`` with a prefix from the segments of the demangled symbol, see `_mono_item_fn_name`."""
+    split_name = _split_symbol(name)
 
     assert len(split_symbol) >= 2, 'The symbol name should contain at least two segments, an identifier and a hash'
     # Extract the function name from `symbol_name`.
     # It's the last segment with a valid id as prefix that's not the hash
     i, fn_name = next(
-        ((i, fn_name) for i, s in enumerate(reversed(split_symbol[:-1])) if (fn_name := extract_id(s))), (None, None)
+        ((i, m[0]) for i, s in enumerate(reversed(split_symbol[:-1])) if (m := _RUST_ID.match(s))), (None, None)
     )
     assert i is not None
     assert fn_name is not None
@@ -120,73 +579,162 @@ def _mono_item_fn_name(symbol_name: str, name: str) -> str:
     return '::'.join(chain(split_symbol[: symbol_index - name_index], split_name))
 
 
+@lru_cache(maxsize=_SYMBOL_CACHE_SIZE)
 def _demangle(symbol: str) -> str:
-    import re
-
     from rust_demangler import demangle  # type: ignore [import-untyped]
 
     res = demangle(symbol)
-    res = re.sub(r'(?<!^)(?<!:)<', r'::<', res)  # insert '::' before '<' if not at the beginning or preceded by ':'
+    res = _GENERICS.sub('::<', res)  # insert '::' before '<' if not at the beginning or preceded by ':'
     return res
 
 
-def _symbol_segments(s: str) -> Iterator[str]:
-    """Split a symbol at ``'::'`` not between ``'<'`` and ``'>'``."""
-    it = iter(s)
-    la = ''
-    buf: list[str] = []
+@lru_cache(maxsize=_SYMBOL_CACHE_SIZE)
+def _split_symbol(s: str) -> tuple[str, ...]:
+    return tuple(_symbol_segments(s))
+
 
-    def consume() -> None:
-        nonlocal la
-        la = next(it, '')
+def _symbol_segments(s: str) -> Iterator[str]:
+    """Split a symbol at ``'::'`` not between ``'<'`` and ``'>'``.
 
+    A ``':'`` not followed by another one is kept together with the next character, and ``'->'`` does not close
+    a ``'<'``.
+    """
     depth = 0
-    consume()
-    while la:
-        match la:
-            case ':':
-                consume()
-                match la:
-                    case ':':
-                        consume()
-                        if depth:
-                            buf += [':', ':']
-                        else:
-                            yield ''.join(buf)
-                            buf.clear()
-                    case '':
-                        buf.append(':')
-                        break
-                    case _:
-                        buf += [':', la]
-                        consume()
-            case '-':
-                consume()
-                match la:
-                    case '>':
-                        buf += ['-', la]
-                        consume()
-                    case _:
-                        buf.append('-')
+    buf: list[str] = []
+    for token in _SYMBOL_TOKENS.findall(s):
+        match token:
+            case '::' if not depth:
+                yield ''.join(buf)
+                buf.clear()
+                continue
             case '<':
-                buf.append(la)
-                consume()
                 depth += 1
             case '>':
-                buf.append(la)
-                consume()
                 depth -= 1
-            case '':
-                raise AssertionError('The outer loop should ensure this is unreachable')
-            case _:
-                buf.append(la)
-                consume()
+        buf.append(token)
 
     if depth != 0:
         raise ValueError(f'Unbalanced <> in symbol: {s}')
     yield ''.join(buf)
 
 
+class IdMap(ABC):
+    """Replacement for each kind of ID in a SMIR, see `remap_ids`."""
+
+    @abstractmethod
+    def ty(self, ty: int) -> int: ...
+
+    @abstractmethod
+    def span(self, span: int) -> int: ...
+
+    @abstractmethod
+    def alloc(self, alloc_id: int) -> int: ...
+
+    @abstractmethod
+    def adt_def(self, adt_def: int) -> int: ...
+
+
+@dataclass(frozen=True)
+class OffsetIds(IdMap):
+    offset: int
+
+    def ty(self, ty: int) -> int:
+        return ty + self.offset
+
+    def span(self, span: int) -> int:
+        return span + self.offset
+
+    def alloc(self, alloc_id: int) -> int:
+        return alloc_id + self.offset
+
+    def adt_def(self, adt_def: int) -> int:
+        return adt_def + self.offset
+
+
+class DenseIds(IdMap):
+    """Renaming of IDs to dense ranges starting at 0, with equivalent IDs renamed to the same ID.
+
+    IDs that were not renamed explicitly are renamed to the next free ID when they are first looked up.
+    """
+
+    tys: _Renaming
+    spans: _Renaming
+    allocs: _Renaming
+    adt_defs: _Renaming
+
+    def __init__(self) -> None:
+        self.tys = _Renaming()
+        self.spans = _Renaming()
+        self.allocs = _Renaming()
+        self.adt_defs = _Renaming()
+
+    def ty(self, ty: int) -> int:
+        return self.tys(ty)
+
+    def span(self, span: int) -> int:
+        return self.spans(span)
+
+    def alloc(self, alloc_id: int) -> int:
+        return self.allocs(alloc_id)
+
+    def adt_def(self, adt_def: int) -> int:
+        return self.adt_defs(adt_def)
+
+
+class _Renaming:
+    _ids: dict[int, int]
+    _keys: dict[Hashable, int]
+
+    def __init__(self) -> None:
+        self._ids = {}
+        self._keys = {}
+
+    def __call__(self, old: int) -> int:
+        new = self._ids.get(old)
+        if new is None:
+            self.add(old, (None, old))
+            new = self._ids[old]
+        return new
+
+    def add(self, old: int, key: Hashable) -> bool:
+        """Rename `old` to the ID for `key`, and return whether that ID is new."""
+        new = self._keys.get(key)
+        fresh = new is None
+        if new is None:
+            new = self._keys[key] = len(self._keys)
+        self._ids.setdefault(old, new)
+        return fresh
+
+
+class _RecordedIds(IdMap):
+    """Replaces each ID of the kinds in `record` by 0 and records the original IDs, other IDs are mapped by `ids`."""
+
+    ids: IdMap
+    recorded: dict[str, list[int]]
+
+    def __init__(self, ids: IdMap, record: Iterable[str]) -> None:
+        self.ids = ids
+        self.recorded = {kind: [] for kind in record}
+
+    def _replace(self, kind: str, id: int) -> int:
+        if kind not in self.recorded:
+            return getattr(self.ids, kind)(id)
+        self.recorded[kind].append(id)
+        return 0
+
+    def ty(self, ty: int) -> int:
+        return self._replace('ty', ty)
+
+    def span(self, span: int) -> int:
+        return self._replace('span', span)
+
+    def alloc(self, alloc_id: int) -> int:
+        return self._replace('alloc', alloc_id)
+
+    def adt_def(self, adt_def: int) -> int:
+        return self._replace('adt_def', adt_def)
+
+
 def apply_offset(info: SMIRInfo, offset: int) -> None:
     # mutates the dictionary inside the SMIRInfo
     # all fields containing a `Ty` are updated, adding the given offset
@@ -195,250 +743,265 @@ def apply_offset(info: SMIRInfo, offset: int) -> None:
 
     _LOGGER.debug(f'Applying offset {offset} to smir {dic["name"]}, with {len(ts)} types')
 
-    info._smir['functions'] = [(ty + offset, sym) for ty, sym in info._smir['functions']]
-    info._smir['types'] = [
-        (ty + offset, apply_offset_type_info(type_info, offset)) for ty, type_info in info._smir['types']
-    ]
-    info._smir['spans'] = [(i + offset, span) for i, span in info._smir['spans']]
-
-    for alloc in dic['allocs']:  # alloc: AllocInfo
-        alloc['alloc_id'] += offset
-        alloc['ty'] += offset
-        global_alloc = alloc['global_alloc']  # global_alloc: GlobalAlloc
-        match global_alloc:
-            case {'Memory': allocation}:  # global_alloc: Memory, allocation: Allocation
-                apply_offset_provenance(allocation['provenance'], offset)
-            case {'Static': alloc_id}:  # global_alloc: Static
-                alloc['global_alloc']['Static'] = alloc_id + offset
-            case {'Function': _}:  # global_alloc: Function
-                # Quick-compat: leave function instance as-is; not used for offset computations
-                pass
-            case {'VTable': _}:  # global_alloc: VTable
-                # Quick-compat: keep as-is (if present). We do not offset embedded types here.
-                pass
-            case _:
-                raise ValueError('Unsupported or invalid GlobalAlloc data: {global_alloc}')
+    remap_ids(info, OffsetIds(offset))
 
-    # traverse item bodies and replace all `ty` fields
-    for item in info._smir['items']:
-        apply_offset_item(item['mono_item_kind'], offset)
 
+def remap_ids(info: SMIRInfo, ids: IdMap) -> None:
+    # mutates the dictionary inside the SMIRInfo
+    # all fields containing a `Ty`, span, alloc or ADT ID are replaced as given by `ids`
+    info._smir['functions'] = [(ids.ty(ty), sym) for ty, sym in info._smir['functions']]
+    info._smir['types'] = [(ids.ty(ty), remap_type_info(type_info, ids)) for ty, type_info in info._smir['types']]
+    info._smir['spans'] = [(ids.span(i), span) for i, span in info._smir['spans']]
 
-def apply_offset_type_info(typeinfo: dict, offset: int) -> dict:
+    for alloc in info._smir['allocs']:
+        remap_alloc(alloc, ids)
+
+    # traverse item bodies and replace all `ty` fields
+    for item in info._smir['items']:
+        remap_item(item['mono_item_kind'], ids)
+
+
+def remap_alloc(alloc: dict, ids: IdMap) -> dict:
+    # alloc: AllocInfo, returns the updated (i.e., mutated) `alloc` dictionary
+    alloc['alloc_id'] = ids.alloc(alloc['alloc_id'])
+    alloc['ty'] = ids.ty(alloc['ty'])
+    remap_global_alloc(alloc['global_alloc'], ids)
+    return alloc
+
+
+def remap_global_alloc(global_alloc: dict, ids: IdMap) -> dict:
+    # returns the updated (i.e., mutated) `global_alloc` dictionary
+    match global_alloc:
+        case {'Memory': allocation}:  # global_alloc: Memory, allocation: Allocation
+            remap_provenance(allocation['provenance'], ids)
+        case {'Static': alloc_id}:  # global_alloc: Static
+            global_alloc['Static'] = ids.alloc(alloc_id)
+        case {'Function': _}:  # global_alloc: Function
+            # Quick-compat: leave function instance as-is; not used for offset computations
+            pass
+        case {'VTable': _}:  # global_alloc: VTable
+            # Quick-compat: keep as-is (if present). We do not offset embedded types here.
+            pass
+        case _:
+            raise ValueError('Unsupported or invalid GlobalAlloc data: {global_alloc}')
+    return global_alloc
+
+
+def remap_type_info(typeinfo: dict, ids: IdMap) -> dict:
     # traverses type information, updating all `Ty`-valued fields and `adt_def` fields within
     # returns the updated (i.e., mutated) `typeinfo`` dictionary
     # 'PrimitiveType' in typeinfo:
     if 'EnumType' in typeinfo:
-        typeinfo['EnumType']['adt_def'] += offset
-        typeinfo['EnumType']['fields'] = [[x + offset for x in l] for l in typeinfo['EnumType']['fields']]
+        typeinfo['EnumType']['adt_def'] = ids.adt_def(typeinfo['EnumType']['adt_def'])
+        typeinfo['EnumType']['fields'] = [[ids.ty(x) for x in l] for l in typeinfo['EnumType']['fields']]
     elif 'StructType' in typeinfo:
-        typeinfo['StructType']['fields'] = [x + offset for x in typeinfo['StructType']['fields']]
-        typeinfo['StructType']['adt_def'] += offset
+        typeinfo['StructType']['fields'] = [ids.ty(x) for x in typeinfo['StructType']['fields']]
+        typeinfo['StructType']['adt_def'] = ids.adt_def(typeinfo['StructType']['adt_def'])
     elif 'UnionType' in typeinfo:
-        typeinfo['UnionType']['fields'] = [x + offset for x in typeinfo['UnionType']['fields']]
-        typeinfo['UnionType']['adt_def'] += offset
+        typeinfo['UnionType']['fields'] = [ids.ty(x) for x in typeinfo['UnionType']['fields']]
+        typeinfo['UnionType']['adt_def'] = ids.adt_def(typeinfo['UnionType']['adt_def'])
     elif 'ArrayType' in typeinfo:
-        typeinfo['ArrayType']['elem_type'] += offset
+        typeinfo['ArrayType']['elem_type'] = ids.ty(typeinfo['ArrayType']['elem_type'])
         if 'size' in typeinfo['ArrayType'] and typeinfo['ArrayType']['size'] is not None:
-            apply_offset_tyconst(typeinfo['ArrayType']['size']['kind'], offset)
+            remap_tyconst(typeinfo['ArrayType']['size']['kind'], ids)
     elif 'PtrType' in typeinfo:
-        typeinfo['PtrType']['pointee_type'] += offset
+        typeinfo['PtrType']['pointee_type'] = ids.ty(typeinfo['PtrType']['pointee_type'])
     elif 'RefType' in typeinfo:
-        typeinfo['RefType']['pointee_type'] += offset
+        typeinfo['RefType']['pointee_type'] = ids.ty(typeinfo['RefType']['pointee_type'])
     elif 'TupleType' in typeinfo:
-        typeinfo['TupleType']['types'] = [x + offset for x in typeinfo['TupleType']['types']]
+        typeinfo['TupleType']['types'] = [ids.ty(x) for x in typeinfo['TupleType']['types']]
     # 'FunType' in typeinfo:
 
     return typeinfo
 
 
-def apply_offset_item(item: dict, offset: int) -> None:
+def remap_item(item: dict, ids: IdMap) -> None:
     # Operating on MonoItemFn (MonoItemStatic and GlobalAsm do not contain any `Ty`),
-    # * traverses function body to add `offset` to all `Ty` and `span` fields (mutastes)
-    # * traverses function locals and debug information to add `offset` to all `span` fields
+    # * traverses function body to remap all `Ty` and `span` fields (mutastes)
+    # * traverses function locals and debug information to remap all `span` fields
     if 'MonoItemFn' in item and 'body' in item['MonoItemFn']:
         body = item['MonoItemFn']['body']
         if body is None:
             _LOGGER.warning(f"MonoItemFn {item['MonoItemFn'].get('name', '<unknown>')!r} has no body; skipping offsets")
             return
         for local in body.get('locals', []):
-            local['ty'] += offset
-            local['span'] += offset
+            local['ty'] = ids.ty(local['ty'])
+            local['span'] = ids.span(local['span'])
         for block in body.get('blocks', []):
             for stmt in block['statements']:
-                apply_offset_stmt(stmt['kind'], offset)
-                stmt['span'] += offset
-            apply_offset_terminator(block['terminator']['kind'], offset)
-            block['terminator']['span'] += offset
+                remap_stmt(stmt['kind'], ids)
+                stmt['span'] = ids.span(stmt['span'])
+            remap_terminator(block['terminator']['kind'], ids)
+            block['terminator']['span'] = ids.span(block['terminator']['span'])
         # adjust span in var_debug_info, each item's source_info.span
         for thing in body.get('var_debug_info', []):
-            thing['source_info']['span'] += offset
+            thing['source_info']['span'] = ids.span(thing['source_info']['span'])
             if 'Constant' in thing['value']:
-                apply_offset_operand({'Constant': thing['value']}, offset)
+                remap_operand({'Constant': thing['value']}, ids)
             if 'composite' in thing and thing['composite'] is not None:
-                thing['composite']['ty'] += offset
+                thing['composite']['ty'] = ids.ty(thing['composite']['ty'])
                 for proj in thing['composite']['projection']:
-                    apply_offset_proj(proj, offset)
+                    remap_proj(proj, ids)
 
 
-def apply_offset_terminator(term: dict, offset: int) -> None:
+def remap_terminator(term: dict, ids: IdMap) -> None:
     # traverses and updates operands and places (projections) within the terminator
     # Noop for the commented cases
     # - Goto
     if 'SwitchInt' in term:
-        apply_offset_operand(term['SwitchInt']['discr'], offset)
+        remap_operand(term['SwitchInt']['discr'], ids)
     # - Resume
     # - Abort
     # - Unreachable
     elif 'Drop' in term:
-        apply_offset_place(term['Drop']['place'], offset)
+        remap_place(term['Drop']['place'], ids)
     elif 'Call' in term:
-        apply_offset_operand(term['Call']['func'], offset)
+        remap_operand(term['Call']['func'], ids)
         for arg in term['Call']['args']:
-            apply_offset_operand(arg, offset)
-        apply_offset_place(term['Call']['destination'], offset)
+            remap_operand(arg, ids)
+        remap_place(term['Call']['destination'], ids)
     elif 'Assert' in term:
-        apply_offset_operand(term['Assert']['cond'], offset)
+        remap_operand(term['Assert']['cond'], ids)
     # - InlineAsm
 
 
-def apply_offset_operand(op: dict, offset: int) -> None:
+def remap_operand(op: dict, ids: IdMap) -> None:
     if 'Copy' in op:
-        apply_offset_place(op['Copy'], offset)
+        remap_place(op['Copy'], ids)
     elif 'Move' in op:
-        apply_offset_place(op['Move'], offset)
+        remap_place(op['Move'], ids)
     elif 'Constant' in op:
-        op['Constant']['const_']['ty'] += offset
+        op['Constant']['const_']['ty'] = ids.ty(op['Constant']['const_']['ty'])
         match op['Constant']['const_']['kind']:
             case {'Ty': val}:
-                apply_offset_tyconst(val['kind'], offset)
+                remap_tyconst(val['kind'], ids)
             case {'Allocated': val}:
-                apply_offset_provenance(val['provenance'], offset)
-        op['Constant']['span'] += offset
+                remap_provenance(val['provenance'], ids)
+        op['Constant']['span'] = ids.span(op['Constant']['span'])
 
 
-def apply_offset_tyconst(tyconst: dict, offset: int) -> None:
+def remap_tyconst(tyconst: dict, ids: IdMap) -> None:
     # Param
     # Bound
     if 'Unevaluated' in tyconst:
         for arg in tyconst['Unevaluated'][1]:
-            apply_offset_gen_arg(arg, offset)
+            remap_gen_arg(arg, ids)
     elif 'Value' in tyconst:
-        tyconst['Value'][0] += offset
+        tyconst['Value'][0] = ids.ty(tyconst['Value'][0])
     elif 'ZSTValue' in tyconst:
-        tyconst['ZSTValue'] += offset
+        tyconst['ZSTValue'] = ids.ty(tyconst['ZSTValue'])
 
 
-def apply_offset_provenance(provenance: dict, offset: int) -> None:
+def remap_provenance(provenance: dict, ids: IdMap) -> None:
     for i in range(len(provenance['ptrs'])):
-        provenance['ptrs'][i][1] += offset
+        provenance['ptrs'][i][1] = ids.alloc(provenance['ptrs'][i][1])
 
 
-def apply_offset_place(place: dict, offset: int) -> None:
-    # applies offset to all projection elements
+def remap_place(place: dict, ids: IdMap) -> None:
+    # remaps all projection elements
     for proj in place['projection']:
-        apply_offset_proj(proj, offset)
+        remap_proj(proj, ids)
 
 
-def apply_offset_proj(proj: dict, offset: int) -> None:
+def remap_proj(proj: dict, ids: IdMap) -> None:
     # Deref
     if 'Field' in proj:
-        proj['Field'][1] += offset
+        proj['Field'][1] = ids.ty(proj['Field'][1])
     # Index
     # ConstantIndex
     # Subslice
     # Downcast
     elif 'OpaqueCast' in proj:
-        proj['OpaqueCast'] += offset
+        proj['OpaqueCast'] = ids.ty(proj['OpaqueCast'])
     elif 'Subtype' in proj:
-        proj['Subtype'] += offset
+        proj['Subtype'] = ids.ty(proj['Subtype'])
 
 
-def apply_offset_stmt(stmt: dict, offset: int) -> None:
+def remap_stmt(stmt: dict, ids: IdMap) -> None:
     if 'Assign' in stmt:
-        apply_offset_place(stmt['Assign'][0], offset)
-        apply_offset_rvalue(stmt['Assign'][1], offset)
+        remap_place(stmt['Assign'][0], ids)
+        remap_rvalue(stmt['Assign'][1], ids)
     elif 'FakeRead' in stmt:
-        apply_offset_place(stmt['FakeRead'][1], offset)
+        remap_place(stmt['FakeRead'][1], ids)
     elif 'SetDiscriminant' in stmt:
-        apply_offset_place(stmt['SetDiscriminant'][0], offset)
+        remap_place(stmt['SetDiscriminant'][0], ids)
     elif 'Deinit' in stmt:
-        apply_offset_place(stmt['Deinit'], offset)
+        remap_place(stmt['Deinit'], ids)
     # StorageLive
     # StorageDead
     elif 'Retag' in stmt:
-        apply_offset_place(stmt['Retag'], offset)
+        remap_place(stmt['Retag'], ids)
     elif 'PlaceMention' in stmt:
-        apply_offset_place(stmt['PlaceMention'], offset)
+        remap_place(stmt['PlaceMention'], ids)
     elif 'AscribeUserType' in stmt:
-        apply_offset_place(stmt['AscribeUserType']['place'], offset)
+        remap_place(stmt['AscribeUserType']['place'], ids)
         for proj in stmt['AscribeUserType']['projections']:
-            apply_offset_proj(proj, offset)
+            remap_proj(proj, ids)
     # Coverage
     # Intrinsic
     # ConstEvalCounter
     # Nop
 
 
-def apply_offset_rvalue(rval: dict, offset: int) -> None:
+def remap_rvalue(rval: dict, ids: IdMap) -> None:
     if 'AddressOf' in rval:
-        apply_offset_place(rval['AddressOf'][1], offset)
+        remap_place(rval['AddressOf'][1], ids)
     elif 'Aggregate' in rval:
         # handle AggregateKind
         if 'Array' in rval['Aggregate'][0]:
-            rval['Aggregate'][0]['Array'] += offset  # ty field
+            rval['Aggregate'][0]['Array'] = ids.ty(rval['Aggregate'][0]['Array'])  # ty field
         # Tuple
         elif 'Adt' in rval['Aggregate'][0]:
-            rval['Aggregate'][0]['Adt'][0] += offset  # AdtDef field
+            rval['Aggregate'][0]['Adt'][0] = ids.adt_def(rval['Aggregate'][0]['Adt'][0])  # AdtDef field
             # GenericArgs can recursively contain TyConst, or Ty
             for arg in rval['Aggregate'][0]['Adt'][2]:
-                apply_offset_gen_arg(arg, offset)
+                remap_gen_arg(arg, ids)
             # usertype annotation and field idx not used, unchanged for now
         elif 'Closure' in rval['Aggregate'][0]:
             for arg in rval['Aggregate'][0]['Closure'][1]:
-                apply_offset_gen_arg(arg, offset)
+                remap_gen_arg(arg, ids)
         elif 'Coroutine' in rval['Aggregate'][0]:
             for arg in rval['Aggregate'][0]['Coroutine'][1]:
-                apply_offset_gen_arg(arg, offset)
+                remap_gen_arg(arg, ids)
         elif 'RawPtr' in rval['Aggregate'][0]:
-            rval['Aggregate'][0]['RawPtr'][0] += offset  # ty field
+            rval['Aggregate'][0]['RawPtr'][0] = ids.ty(rval['Aggregate'][0]['RawPtr'][0])  # ty field
         for op in rval['Aggregate'][1]:
-            apply_offset_operand(op, offset)
+            remap_operand(op, ids)
     elif 'BinaryOp' in rval:
-        apply_offset_operand(rval['BinaryOp'][1], offset)
-        apply_offset_operand(rval['BinaryOp'][2], offset)
+        remap_operand(rval['BinaryOp'][1], ids)
+        remap_operand(rval['BinaryOp'][2], ids)
     elif 'Cast' in rval:
-        apply_offset_operand(rval['Cast'][1], offset)
-        rval['Cast'][2] += offset
+        remap_operand(rval['Cast'][1], ids)
+        rval['Cast'][2] = ids.ty(rval['Cast'][2])
     elif 'CheckedBinaryOp' in rval:
-        apply_offset_operand(rval['CheckedBinaryOp'][1], offset)
-        apply_offset_operand(rval['CheckedBinaryOp'][2], offset)
+        remap_operand(rval['CheckedBinaryOp'][1], ids)
+        remap_operand(rval['CheckedBinaryOp'][2], ids)
     elif 'CopyForDeref' in rval:
-        apply_offset_place(rval['CopyForDeref'], offset)
+        remap_place(rval['CopyForDeref'], ids)
     elif 'Discriminant' in rval:
-        apply_offset_place(rval['Discriminant'], offset)
+        remap_place(rval['Discriminant'], ids)
     elif 'Len' in rval:
-        apply_offset_place(rval['Len'], offset)
+        remap_place(rval['Len'], ids)
     elif 'Ref' in rval:
-        apply_offset_place(rval['Ref'][2], offset)
+        remap_place(rval['Ref'][2], ids)
     elif 'Repeat' in rval:
-        apply_offset_operand(rval['Repeat'][0], offset)
-        apply_offset_tyconst(rval['Repeat'][1]['kind'], offset)
+        remap_operand(rval['Repeat'][0], ids)
+        remap_tyconst(rval['Repeat'][1]['kind'], ids)
     elif 'ShallowInitBox' in rval:
-        apply_offset_operand(rval['ShallowInitBox'][0], offset)
-        rval['ShallowInitBox'][1] += offset
+        remap_operand(rval['ShallowInitBox'][0], ids)
+        rval['ShallowInitBox'][1] = ids.ty(rval['ShallowInitBox'][1])
     # ThreadLocalRef
     elif 'NullaryOp' in rval:
-        rval['NullaryOp'][1] += offset
+        rval['NullaryOp'][1] = ids.ty(rval['NullaryOp'][1])
     elif 'UnaryOp' in rval:
-        apply_offset_operand(rval['UnaryOp'][1], offset)
+        remap_operand(rval['UnaryOp'][1], ids)
     elif 'Use' in rval:
-        apply_offset_operand(rval['Use'], offset)
+        remap_operand(rval['Use'], ids)
 
 
-def apply_offset_gen_arg(arg: dict, offset: int) -> None:
+def remap_gen_arg(arg: dict, ids: IdMap) -> None:
     # GenericArg may contain a Ty or a TyConst
     if 'Type' in arg:
-        arg['Type'] += offset
+        arg['Type'] = ids.ty(arg['Type'])
     elif 'Const' in arg:
-        apply_offset_tyconst(arg['Const']['kind'], offset)
+        remap_tyconst(arg['Const']['kind'], ids)
@@ -28,6 +28,8 @@ class RunOpts(KMirOpts):
     haskell_target: str | None
     llvm_lib_target: str | None
     llvm_target: str | None
+    kompile_cache: bool
+    kompile_cache_dir: Path | None
 
     def __init__(
         self,
@@ -41,6 +43,8 @@ class RunOpts(KMirOpts):
         haskell_target: str | None = None,
         llvm_lib_target: str | None = None,
         llvm_target: str | None = None,
+        kompile_cache: bool = True,
+        kompile_cache_dir: str | Path | None = None,
     ):
         self.start_symbol = start_symbol
         self.depth = depth
@@ -51,6 +55,8 @@ class RunOpts(KMirOpts):
         self.haskell_target = haskell_target
         self.llvm_lib_target = llvm_lib_target
         self.llvm_target = llvm_target
+        self.kompile_cache = kompile_cache
+        self.kompile_cache_dir = Path(kompile_cache_dir).resolve() if kompile_cache_dir is not None else None
 
 
 @dataclass
@@ -76,6 +82,8 @@ class ProveOpts(KMirOpts):
     smir: bool
     parsed_smir: dict | None
     start_symbol: str
+    start_symbols: list[str]
+    batch_reduction_threshold: float
     add_module: Path | None
     break_on_calls: bool
     break_on_function_calls: bool
@@ -93,6 +101,10 @@ class ProveOpts(KMirOpts):
     break_every_step: bool
     terminate_on_thunk: bool
     break_on_function: list[str]
+    kompile_cache: bool
+    kompile_cache_dir: Path | None
+    llvm_opt_level: int
+    kompile_jobs: int
 
     def __init__(
         self,
@@ -112,6 +124,8 @@ class ProveOpts(KMirOpts):
         smir: bool = False,
         parsed_smir: dict | None = None,
         start_symbol: str = 'main',
+        start_symbols: list[str] | None = None,
+        batch_reduction_threshold: float = 0.5,
         break_on_calls: bool = False,
         break_on_function_calls: bool = False,
         break_on_intrinsic_calls: bool = False,
@@ -129,6 +143,10 @@ class ProveOpts(KMirOpts):
         terminate_on_thunk: bool = False,
         add_module: Path | None = None,
         break_on_function: list[str] | None = None,
+        kompile_cache: bool = True,
+        kompile_cache_dir: str | Path | None = None,
+        llvm_opt_level: int = 2,
+        kompile_jobs: int = 2,
     ) -> None:
         self.rs_file = rs_file
         self.proof_dir = Path(proof_dir).resolve() if proof_dir is not None else None
@@ -145,6 +163,8 @@ class ProveOpts(KMirOpts):
         self.smir = smir
         self.parsed_smir = parsed_smir
         self.start_symbol = start_symbol
+        self.start_symbols = start_symbols if start_symbols is not None else []
+        self.batch_reduction_threshold = batch_reduction_threshold
         self.break_on_calls = break_on_calls
         self.break_on_function_calls = break_on_function_calls
         self.break_on_intrinsic_calls = break_on_intrinsic_calls
@@ -162,6 +182,10 @@ class ProveOpts(KMirOpts):
         self.terminate_on_thunk = terminate_on_thunk
         self.add_module = add_module
         self.break_on_function = break_on_function if break_on_function is not None else []
+        self.kompile_cache = kompile_cache
+        self.kompile_cache_dir = Path(kompile_cache_dir).resolve() if kompile_cache_dir is not None else None
+        self.llvm_opt_level = llvm_opt_level
+        self.kompile_jobs = kompile_jobs
 
 
 @dataclass
@@ -319,7 +343,23 @@ class SectionEdgeOpts(ProofOpts):
 class LinkOpts(KMirOpts):
     smir_files: list[Path]
     output_file: Path
+    jobs: int
+    deduplicate: bool
 
-    def __init__(self, smir_files: list[str], output_file: str | None = None) -> None:
+    def __init__(
+        self, smir_files: list[str], output_file: str | None = None, jobs: int = 1, deduplicate: bool = False
+    ) -> None:
         self.smir_files = [Path(f) for f in smir_files]
         self.output_file = Path(output_file) if output_file is not None else Path('linker_output.smir.json')
+        self.jobs = jobs
+        self.deduplicate = deduplicate
+
+
+@dataclass
+class ConvertOpts(KMirOpts):
+    smir_file: Path
+    output_file: Path | None
+
+    def __init__(self, smir_file: str, output_file: str | None = None) -> None:
+        self.smir_file = Path(smir_file)
+        self.output_file = Path(output_file) if output_file is not None else None
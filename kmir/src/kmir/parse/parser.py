@@ -1,31 +1,49 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+import string
+from collections.abc import Callable, Sequence
 from functools import cache, cached_property
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
+from pyk.dequote import enquote_string
 from pyk.kast.att import Atts
-from pyk.kast.inner import KApply, KSort, KToken
+from pyk.kast.inner import KApply, KLabel, KSort, KToken
 from pyk.kast.outer import KTerminal
-from pyk.kast.prelude.utils import token
+from pyk.kast.prelude.kbool import BOOL, FALSE, TRUE
+from pyk.kast.prelude.string import STRING
 
 from ..smir import SMIRInfo
 
 if TYPE_CHECKING:
     from pathlib import Path
+    from typing import Final
 
+    from pyk.kast.inner import KInner
     from pyk.kast.outer import KDefinition, KProduction
 
 # Expected json
 JSON = dict | str | int | bool | Sequence | None
 ParseResult = tuple[KApply | KToken, KSort] | None
+_Parsed = tuple[KApply | KToken, KSort]
+
+
+class _Pending(NamedTuple):
+    """A term whose arguments still need to be parsed, each by the parser at the same position."""
+
+    parsers: Sequence[_SortParser]
+    jsons: Sequence[JSON]
+    build: Callable[[list[KInner]], _Parsed]
+
+
+_Step = _Parsed | _Pending
+_SortParser = Callable[[JSON], _Step]
 
 
 def parse_json(definition: KDefinition, json_file: Path, sort: str) -> ParseResult:
     p = Parser(definition)
 
     smir_info = SMIRInfo.from_file(json_file)
-    json_data = smir_info._smir
+    json_data = dict(smir_info._smir)
 
     result = p.parse_mir_json(json_data, sort)
 
@@ -146,30 +164,37 @@ def _element_sort(sort: KSort) -> KSort:
 
 
 class Parser:
+    """Parser for SMIR JSON, driven by the `mir*` group annotations of the productions in a `KDefinition`.
+
+    On first use of a sort, its productions are compiled into a closure that parses JSON of that sort, with field
+    names, symbols and argument sorts resolved up front. The closures of argument sorts are resolved when the closure
+    is first called, so that compiling recursive sorts terminates.
+
+    A closure does not parse the arguments of the term itself, it returns them as `_Pending` instead, and
+    `_parse_mir_json` parses them with an explicit stack. This way, the depth of the JSON is not limited by the
+    recursion limit of Python.
+
+    Tokens, constants and applications to those are hash-consed: parsing the same leaf again yields the same object,
+    which saves memory and lets `KoreConverter` convert it only once.
+    """
+
     __definition: KDefinition
+    _parsers: dict[KSort, _SortParser]
+    _apps: dict[tuple[object, ...], KApply]
+    _tokens: dict[tuple[str, str], KToken]
 
     def __init__(
         self,
         defn: KDefinition,
     ):
         self.__definition = defn
-        object.__setattr__(self, '_mir_productions_for_sort', cache(self._mir_productions_for_sort))
-        object.__setattr__(self, '_mir_production_for_symbol', cache(self._mir_production_for_symbol))
+        self._parsers = {}
+        self._apps = {}
+        self._tokens = {}
 
     # Return all mir productions for Sort sort
     def _mir_productions_for_sort(self, sort: KSort) -> tuple[KProduction, ...]:
-        return tuple(p for p in self._mir_productions if p.sort == sort)
-
-    # Return the mir production with Sort sort name and label symbol.
-    # Note: the symbol is (and should be) unique, and would be enough to
-    # uniquely identify the production. This functions is written this way to
-    # limit the search only to relevant productions of the correct Sort,
-    # aiming for optimization (cache?) in the future.
-    def _mir_production_for_symbol(self, sort: KSort, symbol: str) -> KProduction:
-        prods = [p for p in self._mir_productions_for_sort(sort) if _get_label(p) == symbol]
-        assert len(prods) > 0, f"No production for `{symbol}' in sort `{sort.name}'"
-        assert len(prods) == 1, f"Expected a single production for `{symbol}' as sort `{sort.name}'"
-        return prods[0]
+        return self._mir_productions_by_sort.get(sort, ())
 
     # Parse the provided json term, with expected Sort name sort.
     # This is the parser's interface,
@@ -178,7 +203,49 @@ class Parser:
 
     # Parser's top level internal method,
     # Parse the provided json term, with expected Sort sort.
-    def _parse_mir_json(self, json: JSON, sort: KSort) -> ParseResult:
+    def _parse_mir_json(self, json: JSON, sort: KSort) -> _Parsed:
+        step = self._parser_for(sort)(json)
+        if not isinstance(step, _Pending):
+            return step
+
+        # Each frame is a pending term and its arguments parsed so far
+        stack: list[tuple[_Pending, list[KInner]]] = [(step, [])]
+        while True:
+            pending, args = stack[-1]
+            if len(args) < len(pending.jsons):
+                i = len(args)
+                arg_step = pending.parsers[i](pending.jsons[i])
+                if isinstance(arg_step, _Pending):
+                    stack.append((arg_step, []))
+                else:
+                    args.append(arg_step[0])
+                continue
+
+            stack.pop()
+            term, term_sort = pending.build(args)
+            if not stack:
+                return term, term_sort
+            stack[-1][1].append(term)
+
+    def _parser_for(self, sort: KSort) -> _SortParser:
+        parser = self._parsers.get(sort)
+        if parser is None:
+            parser = self._parsers[sort] = self._compile(sort)
+        return parser
+
+    def _lazy_parsers(self, sorts: Sequence[KSort]) -> Callable[[], list[_SortParser]]:
+        # Resolve the parsers for `sorts` on first call, compiling them if needed
+        parsers: list[_SortParser] = []
+
+        def resolve() -> list[_SortParser]:
+            if len(parsers) < len(sorts):
+                parsers[:] = [self._parser_for(sort) for sort in sorts]
+            return parsers
+
+        return resolve
+
+    # Compile the parser for Sort sort.
+    def _compile(self, sort: KSort) -> _SortParser:
         # Identify a single production of Sort sort.
         # It shouldn't matter how we pick one. If there are more than one
         # (e.g., optione, enums), the particular case can handle finding the
@@ -187,302 +254,355 @@ class Parser:
         prods = self._mir_productions_for_sort(sort)
         assert len(prods) > 0, f"Don't know how to parse sort `{sort.name}'"
         prod = prods[0]
-        assert prod in self._mir_productions
 
         # Get the mir production's group information. Then, based on the
-        # production's type, call the appropriate underlying method.
+        # production's type, compile the appropriate parser.
         group = _get_group(prod)
         kind, _ = _extract_mir_group_info(group)
         match kind:
             case 'mir':
                 assert len(prods) == 1
-                if prod in self._mir_terminals:
-                    return self._parse_mir_terminal_json(json, prod)
+                if _is_mir_terminal(prod):
+                    return self._compile_mir_terminal(prod)
                 else:
-                    assert prod in self._mir_non_terminals
-                    return self._parse_mir_nonterminal_json(json, prod)
+                    return self._compile_mir_nonterminal(prod)
             case 'mir-enum':
-                return self._parse_mir_enum_json(json, sort)
+                return self._compile_mir_enum(sort, prods)
             case s if s.startswith('mir-klist'):
                 element_sort_name = s.split('-')[-1]
-                return self._parse_mir_klist_json(json, KSort(element_sort_name))
+                return self._compile_mir_klist(KSort(element_sort_name))
             case 'mir-list':
-                return self._parse_mir_list_json(json, sort)
+                return self._compile_mir_list(sort)
             case 'mir-option' | 'mir-option-string' | 'mir-option-int' | 'mir-option-bool':
-                return self._parse_mir_option_json(json, sort)
+                return self._compile_mir_option(sort, prods)
             case 'mir-string':
                 assert len(prods) == 1
-                return self._parse_mir_string_json(json, prod)
+                return self._compile_mir_string(prod)
             case 'mir-int':
                 assert len(prods) == 1
-                return self._parse_mir_int_json(json, prod)
+                return self._compile_mir_int(prod)
             case 'mir-bool':
                 assert len(prods) == 1
-                return self._parse_mir_bool_json(json, prod)
+                return self._compile_mir_bool(prod)
             case 'mir-bytes':
                 assert len(prods) == 1
-                return self._parse_mir_bytes_json(json, prod)
+                return self._compile_mir_bytes(prod)
             case _:
                 raise AssertionError()
 
-    # Parser's internal method,
-    # Parse the provided terminal using the provided production.
-    def _parse_mir_terminal_json(self, json: JSON, prod: KProduction) -> ParseResult:
-        assert isinstance(json, str)
+    # Compile a parser for terminals of the provided production.
+    def _compile_mir_terminal(self, prod: KProduction) -> _SortParser:
         sort = prod.sort
-        symbol = _terminal_symbol(sort.name, json)
         expected_symbol = _get_symbol(prod)
-        # Sanity check: We check that the provided production's symbol and the
-        # automatically contructed one match.
-        assert symbol == expected_symbol
-        return KApply(symbol), sort
+        result = self._app(KLabel(expected_symbol), ()), sort
 
-    # Parser's internal method,
-    # Parse the provided non terminal using the provided production.
-    def _parse_mir_nonterminal_json(self, json: JSON, prod: KProduction) -> ParseResult:
-        assert isinstance(json, dict) or isinstance(json, Sequence)
+        def parse(json: JSON) -> _Parsed:
+            assert isinstance(json, str)
+            # Sanity check: We check that the provided production's symbol and the
+            # automatically contructed one match.
+            assert _terminal_symbol(sort.name, json) == expected_symbol
+            return result
 
+        return parse
+
+    # Compile a parser for non terminals of the provided production.
+    def _compile_mir_nonterminal(self, prod: KProduction) -> _SortParser:
         # We use the provided production to
         # - find the field names of the arguments in json, if any
         # - find the sorts of the arguments
         # - find the sort
         group = _get_group(prod)
         _, field_names = _extract_mir_group_info(group)
-        symbol = _get_label(prod)
+        label = KLabel(_get_label(prod))
         sort = prod.sort
-        # Collect the parse results of the production arguments in args
-        args = []
-        arg_count = 0
-        for arg_sort in prod.argument_sorts:
-            arg_json = None
+        arg_sorts = prod.argument_sorts
+        arg_parsers = self._lazy_parsers(arg_sorts)
+        if len(field_names) < len(arg_sorts):
+            # the arguments cannot be found by name, fail if they are looked up
+            keys: Sequence[str] | None = None
+        else:
+            keys = field_names[: len(arg_sorts)]
+
+        app = self._app
+
+        def build(args: list[KInner]) -> _Parsed:
+            return app(label, args), sort
+
+        def parse(json: JSON) -> _Step:
             if isinstance(json, dict):
                 # Search for the corresponding field name in json, and find
                 # the associated value
-                assert arg_count < len(field_names)
-                key = field_names[arg_count]
-                assert key in json
-                arg_json = json[key]
-                arg_count += 1
+                assert keys is not None
+                arg_jsons: Sequence[JSON] = [json[key] for key in keys]
             else:
-                # Grab the next json value
-                arg_json = json[arg_count]
-                arg_count += 1
-            assert isinstance(arg_json, JSON)
-            arg_parse_result = self._parse_mir_json(arg_json, arg_sort)
-            assert isinstance(arg_parse_result, tuple)
-            arg_kapply, arg_ksort = arg_parse_result
-            assert arg_kapply
-            assert arg_ksort
-            args.append(arg_kapply)
-        return KApply(symbol, args), sort
-
-    # Parser's internal method,
-    # Parse the provided json as a enum using expected Sort sort.
-    def _parse_mir_enum_json(self, json: JSON, sort: KSort) -> ParseResult:
-        assert isinstance(json, dict) or isinstance(json, str)
-        if isinstance(json, dict):
-            # In case of an enumeration a a dictionary, the key is the name of
-            # the enumerator. Find the name, and use it to construct the symbol
-            # of the associated production.
-            # The associated production will be non terminal (otherwise the
-            # enumeration would have been printed as a string)
-            keys = list(json.keys())
-            assert len(keys) == 1
-            key = keys[0]
-            assert isinstance(key, str)
-            symbol = _enum_symbol(sort.name, key)
-            json_value = json[key]
-            assert isinstance(json_value, JSON)
-            prod = self._mir_production_for_symbol(sort, symbol)
-            assert prod in self._mir_non_terminals, f'{prod} not in mir_non_terminals'
-            # Check for single-argument enums with non named argument. In this
-            # case, the argument needs to be changed to a list, so that its
-            # structure is not cosidered a part of the current enumeration.
-            if not _has_named_fields(_get_group(prod)) and len(prod.argument_sorts) == 1:
-                # str is a Sequence, therefore the extra check
-                assert isinstance(json_value, str) or not isinstance(json_value, Sequence)
-                json_value = [json_value]
-            return self._parse_mir_nonterminal_json(json_value, prod)
-        else:
-            # Enum has been printed as string due to optimization.
-            # Handle as a terminal.
-            symbol = _enum_symbol(sort.name, json)
-            prod = self._mir_production_for_symbol(sort, symbol)
-            assert prod in self._mir_terminals
-            return self._parse_mir_terminal_json(json, prod)
-
-    # Parser's internal method,
-    # Parse the provided json as a list using expected Sort sort.
-    def _parse_mir_list_json(self, json: JSON, sort: KSort) -> ParseResult:
-        assert isinstance(json, Sequence)
-        append_symbol, empty_symbol = _list_symbols(sort.name)
-        element_sort = _element_sort(sort)
-        list_kapply = KApply(empty_symbol, ())
-        for element in reversed(json):
-            assert isinstance(element, JSON)
-            element_parse_result = self._parse_mir_json(element, element_sort)
-            assert isinstance(element_parse_result, tuple)
-            element_kapply, _ = element_parse_result
-            list_kapply = KApply(append_symbol, (element_kapply, list_kapply))
-        return list_kapply, sort
-
-    # Parser's internal method,
-    # Parse the provided json as a K list using expected Sort sort for the list elements.
-    def _parse_mir_klist_json(self, json: JSON, sort: KSort) -> ParseResult:
-        assert isinstance(json, Sequence)
-        append_symbol = '_List_'
-        empty_symbol = '.List'
-        list_item_symbol = 'ListItem'
-        list_kapply = KApply(empty_symbol, ())
-        first_iter = True
-        for element in json:
-            assert isinstance(element, JSON)
-            element_parse_result = self._parse_mir_json(element, sort)
-            assert isinstance(element_parse_result, tuple)
-            element_kapply, _ = element_parse_result
-            element_list_item = KApply(list_item_symbol, (element_kapply))
-            if first_iter:
-                list_kapply = element_list_item
-                first_iter = False
+                # Take the json values in order
+                assert isinstance(json, Sequence) and len(json) >= len(arg_sorts)
+                arg_jsons = json[: len(arg_sorts)]
+            return _Pending(arg_parsers(), arg_jsons, build)
+
+        return parse
+
+    # Compile a parser for enums of Sort sort with the provided productions.
+    def _compile_mir_enum(self, sort: KSort, prods: Sequence[KProduction]) -> _SortParser:
+        # In case of an enumeration as a dictionary, the key is the name of
+        # the enumerator, which determines the symbol of the associated
+        # production. The associated production will be non terminal (otherwise
+        # the enumeration would have been printed as a string).
+        # Single-argument enums with a non named argument take their argument
+        # as a list, so that its structure is not cosidered a part of the
+        # current enumeration.
+        non_terminals: dict[str, tuple[_SortParser, bool]] = {}
+        terminals: dict[str, _SortParser] = {}
+        for prod in prods:
+            symbol = _get_label(prod)
+            if _is_mir_terminal(prod):
+                terminals[symbol] = self._compile_mir_terminal(prod)
+            else:
+                wrap = not _has_named_fields(_get_group(prod)) and len(prod.argument_sorts) == 1
+                non_terminals[symbol] = (self._compile_mir_nonterminal(prod), wrap)
+
+        def parse(json: JSON) -> _Step:
+            if isinstance(json, dict):
+                assert len(json) == 1
+                ((key, json_value),) = json.items()
+                symbol = _enum_symbol(sort.name, key)
+                assert symbol in non_terminals, f"No non-terminal production for `{symbol}' in sort `{sort.name}'"
+                parse_value, wrap = non_terminals[symbol]
+                if wrap:
+                    # str is a Sequence, therefore the extra check
+                    assert isinstance(json_value, str) or not isinstance(json_value, Sequence)
+                    json_value = [json_value]
+                return parse_value(json_value)
             else:
-                list_kapply = KApply(append_symbol, (list_kapply, element_list_item))
-        return list_kapply, sort
-
-    # Parser's internal method,
-    # Parse the provided json as an option using expected Sort sort.
-    def _parse_mir_option_json(self, json: JSON, sort: KSort) -> ParseResult:
-        assert (
-            json is None
-            or isinstance(json, dict)
-            or isinstance(json, Sequence)
-            or isinstance(json, str)
-            or isinstance(json, int)
-            or isinstance(json, bool)
-        )
+                # Enum has been printed as string due to optimization.
+                # Handle as a terminal.
+                assert isinstance(json, str)
+                symbol = _enum_symbol(sort.name, json)
+                assert symbol in terminals, f"No terminal production for `{symbol}' in sort `{sort.name}'"
+                return terminals[symbol](json)
+
+        return parse
+
+    # Compile a parser for lists of Sort sort.
+    def _compile_mir_list(self, sort: KSort) -> _SortParser:
+        append_symbol, empty_symbol = _list_symbols(sort.name)
+        append_label = KLabel(append_symbol)
+        empty = self._app(KLabel(empty_symbol), ())
+        app = self._app
+        element_parsers = self._lazy_parsers((_element_sort(sort),))
+
+        def build(elements: list[KInner]) -> _Parsed:
+            list_kapply = empty
+            for element_kapply in reversed(elements):
+                list_kapply = app(append_label, (element_kapply, list_kapply))
+            return list_kapply, sort
+
+        def parse(json: JSON) -> _Step:
+            assert isinstance(json, Sequence)
+            (parse_element,) = element_parsers()
+            if not json:
+                return empty, sort
+            return _Pending([parse_element] * len(json), json, build)
+
+        return parse
+
+    # Compile a parser for K lists with elements of Sort sort.
+    def _compile_mir_klist(self, sort: KSort) -> _SortParser:
+        append_label = KLabel('_List_')
+        list_item_label = KLabel('ListItem')
+        empty = self._app(KLabel('.List'), ())
+        app = self._app
+        element_parsers = self._lazy_parsers((sort,))
+
+        def build(elements: list[KInner]) -> _Parsed:
+            list_kapply: KApply = empty
+            for i, element_kapply in enumerate(elements):
+                element_list_item = app(list_item_label, (element_kapply,))
+                list_kapply = element_list_item if i == 0 else KApply(append_label, (list_kapply, element_list_item))
+            return list_kapply, sort
+
+        def parse(json: JSON) -> _Step:
+            assert isinstance(json, Sequence)
+            (parse_element,) = element_parsers()
+            if not json:
+                return empty, sort
+            return _Pending([parse_element] * len(json), json, build)
+
+        return parse
+
+    # Compile a parser for options of Sort sort with the provided productions.
+    def _compile_mir_option(self, sort: KSort, prods: Sequence[KProduction]) -> _SortParser:
         # Get both productions for the option - exactly two should exist.
-        prods = self._mir_productions_for_sort(sort)
         assert len(prods) == 2
-        if json is None:
-            # Use the terminal production for None
-            tprod = prods[0] if prods[0] in self._mir_terminals else prods[1]
-            tsymbol = _get_label(tprod)
-            return KApply(tsymbol, ()), sort
-        # Use the non terminal production otherwise
-        ntprod = prods[0] if prods[0] not in self._mir_terminals else prods[1]
-        ntsymbol = _get_label(ntprod)
-        group = _get_group(ntprod)
-        kind, _ = _extract_mir_group_info(group)
+        # Use the terminal production for None, the non terminal production otherwise
+        tprod, ntprod = prods if _is_mir_terminal(prods[0]) else prods[::-1]
+        none_result = self._app(KLabel(_get_label(tprod)), ()), sort
+        app = self._app
+        intern_token = self._token
+        ntlabel = KLabel(_get_label(ntprod))
+        kind, _ = _extract_mir_group_info(_get_group(ntprod))
+
+        token_sort: KSort
         match kind:
             case 'mir-option-string':
-                # Apply the non terminal production to the generated token
-                assert isinstance(json, str)
-                return KApply(ntsymbol, (KToken('\"' + json + '\"', KSort('String')))), sort
+                token_sort = KSort('String')
             case 'mir-option-int':
-                # Apply the non terminal production to the generated token
-                assert isinstance(json, int)
-                return KApply(ntsymbol, (KToken(str(json), KSort('Int')))), sort
+                token_sort = KSort('Int')
             case 'mir-option-bool':
-                # Apply the non terminal production to the generated token
-                assert isinstance(json, bool)
-                return KApply(ntsymbol, (KToken(str(json), KSort('Bool')))), sort
+                token_sort = KSort('Bool')
             case 'mir-option':
                 # Parse the argument and then apply the non terminal production
                 arg_sorts = ntprod.argument_sorts
                 assert len(arg_sorts) == 1
-                arg_sort = arg_sorts[0]
-                arg_parse_result = self._parse_mir_json(json, arg_sort)
-                assert isinstance(arg_parse_result, tuple)
-                arg_kapply, _ = arg_parse_result
-                return KApply(ntsymbol, (arg_kapply)), sort
+                arg_parsers = self._lazy_parsers(arg_sorts)
+
+                def build(args: list[KInner]) -> _Parsed:
+                    return app(ntlabel, args), sort
+
+                def parse(json: JSON) -> _Step:
+                    if json is None:
+                        return none_result
+                    return _Pending(arg_parsers(), (json,), build)
+
+                return parse
             case _:
                 raise AssertionError()
 
-    # Parser's internal method,
-    # Parse the provided json as a string using the provided production.
-    def _parse_mir_string_json(self, json: JSON, prod: KProduction) -> ParseResult:
-        assert isinstance(json, str)
+        # Apply the non terminal production to the generated token
+        token_type = {'String': str, 'Int': int, 'Bool': bool}[token_sort.name]
+
+        def parse_token(json: JSON) -> _Parsed:
+            if json is None:
+                return none_result
+            assert isinstance(json, token_type)
+            text = '"' + json + '"' if isinstance(json, str) else str(json)
+            return app(ntlabel, (intern_token(text, token_sort),)), sort
+
+        return parse_token
+
+    # Compile a parser for strings using the provided production.
+    def _compile_mir_string(self, prod: KProduction) -> _SortParser:
         sort = prod.sort
         symbol = _get_label(prod)
-        tok = token(json)
+        label = KLabel(symbol)
         # Special handling of MIRString: return the string token instead.
-        if symbol == 'MIRString::String':
-            return tok, tok.sort
-        # Apply the production to the generated string token
-        return KApply(symbol, tok), sort
-
-    # Parser's internal method,
-    # Parse the provided json as an int using the provided production.
-    def _parse_mir_int_json(self, json: JSON, prod: KProduction) -> ParseResult:
-        assert isinstance(json, int)
+        unwrapped = symbol == 'MIRString::String'
+        app = self._app
+        intern_token = self._token
+
+        def parse(json: JSON) -> _Parsed:
+            assert isinstance(json, str)
+            tok = intern_token('"' + enquote_string(json) + '"', STRING)
+            if unwrapped:
+                return tok, STRING
+            # Apply the production to the generated string token
+            return app(label, (tok,)), sort
+
+        return parse
+
+    # Compile a parser for ints using the provided production.
+    def _compile_mir_int(self, prod: KProduction) -> _SortParser:
         sort = prod.sort
         symbol = _get_label(prod)
+        label = KLabel(symbol)
+        int_sort = KSort('Int')
         # Special handling of MIRInt: return the int token instead.
-        if symbol == 'MIRInt::Int':
-            return token(json), KSort('Int')
-        # Apply the production to the generated int token
-        return KApply(symbol, token(json)), sort
-
-    # Parser's internal method,
-    # Parse the provided json as a bool using the provided production.
-    def _parse_mir_bool_json(self, json: JSON, prod: KProduction) -> ParseResult:
-        assert isinstance(json, bool)
+        unwrapped = symbol == 'MIRInt::Int'
+        app = self._app
+        intern_token = self._token
+
+        def parse(json: JSON) -> _Parsed:
+            assert isinstance(json, int)
+            tok = intern_token(str(json), int_sort)
+            if unwrapped:
+                return tok, int_sort
+            # Apply the production to the generated int token
+            return app(label, (tok,)), sort
+
+        return parse
+
+    # Compile a parser for bools using the provided production.
+    def _compile_mir_bool(self, prod: KProduction) -> _SortParser:
         sort = prod.sort
         symbol = _get_label(prod)
-        tok = token(json)
+        label = KLabel(symbol)
         # Special handling of MIRBool: return the bool token instead.
-        if symbol == 'MIRBool::Bool':
-            return tok, KSort('Bool')
-        # Apply the production to the generated bool token
-        return KApply(symbol, tok), sort
+        unwrapped = symbol == 'MIRBool::Bool'
+        app = self._app
 
-    # parse a sequence of ints into a byte array
-    def _parse_mir_bytes_json(self, json: JSON, prod: KProduction) -> ParseResult:
-        assert isinstance(json, Sequence)
+        def parse(json: JSON) -> _Parsed:
+            assert isinstance(json, bool)
+            tok = TRUE if json else FALSE
+            if unwrapped:
+                return tok, BOOL
+            # Apply the production to the generated bool token
+            return app(label, (tok,)), sort
 
-        if not json:  # empty sequence, the assertion below would fail
-            bytes = ''
-        else:
-            for i in json:
-                # null values are allowed and taken to mean \x00
-                assert isinstance(i, int) or i is None
-
-            import string
-
-            # Characters that need special escaping (using hex encoding)
-            escape_chars = {'\n': '\\x0a', '@': '\\x40', '"': '\\x34'}
-
-            # TODO: Handle uninitialized bytes instead of defaulting to 0
-            if all((chr(int(i)) if i is not None else chr(0)) in string.printable for i in json):
-                # if all elements are ascii printable, use characters with escaping
-                def format_printable_byte(byte_val):
-                    if byte_val is None:
-                        return '\\x00'
-                    char = chr(byte_val)
-                    if char in escape_chars:
-                        return escape_chars[char]
-                    else:
-                        return char
-
-                bytes = ''.join([format_printable_byte(i) for i in json])
-            else:
-                # otherwise convert to hexadecimal representation \xCA\xFE
-                bytes = ''.join([f'\\x{i:02x}' if i is not None else '\\x00' for i in json])
+        return parse
 
+    # Compile a parser for byte arrays, given as sequences of ints, using the provided production.
+    def _compile_mir_bytes(self, prod: KProduction) -> _SortParser:
+        sort = prod.sort
         symbol = _get_label(prod)
-        if symbol == 'MIRBytes::Bytes':
-            return KToken('b"' + str(bytes) + '"', KSort('Bytes')), KSort('Bytes')
-        else:
-            sort = prod.sort
-            return KApply(symbol, (KToken('b"' + str(bytes) + '"', KSort('Bytes')))), sort
+        label = KLabel(symbol)
+        bytes_sort = KSort('Bytes')
+        unwrapped = symbol == 'MIRBytes::Bytes'
+        app = self._app
+        intern_token = self._token
+
+        def parse(json: JSON) -> _Parsed:
+            assert isinstance(json, Sequence)
+            tok = intern_token('b"' + _bytes_literal(json) + '"', bytes_sort)
+            if unwrapped:
+                return tok, bytes_sort
+            return app(label, (tok,)), sort
+
+        return parse
+
+    # Return the application of `label` to `args`, shared with equal applications if all `args` are leaves.
+    # Leaves (tokens and constants) are all interned, so such applications are looked up by argument identity.
+    def _app(self, label: KLabel, args: Sequence[KInner]) -> KApply:
+        for arg in args:
+            if not (type(arg) is KToken or (type(arg) is KApply and not arg.args)):
+                return KApply(label, args)
+        key = (label.name, *map(id, args))
+        res = self._apps.get(key)
+        if res is None:
+            res = self._apps[key] = KApply(label, args)
+        return res
+
+    # Return the token with the given text and sort, shared with all equal tokens.
+    def _token(self, text: str, sort: KSort) -> KToken:
+        key = (text, sort.name)
+        res = self._tokens.get(key)
+        if res is None:
+            res = self._tokens[key] = KToken(text, sort)
+        return res
 
     @cached_property
     def _mir_productions(self) -> tuple[KProduction, ...]:
         return tuple(prod for prod in self.__definition.productions if _is_mir_production(prod))
 
     @cached_property
-    def _mir_terminals(self) -> tuple[KProduction, ...]:
-        return tuple(prod for prod in self._mir_productions if _is_mir_terminal(prod))
-
-    @cached_property
-    def _mir_non_terminals(self) -> tuple[KProduction, ...]:
-        return tuple(prod for prod in self._mir_productions if not _is_mir_terminal(prod))
+    def _mir_productions_by_sort(self) -> dict[KSort, tuple[KProduction, ...]]:
+        res: dict[KSort, list[KProduction]] = {}
+        for prod in self._mir_productions:
+            res.setdefault(prod.sort, []).append(prod)
+        return {sort: tuple(prods) for sort, prods in res.items()}
+
+
+# Characters that need special escaping (using hex encoding) in printable byte arrays
+_BYTES_ESCAPES: Final = {ord('\n'): '\\x0a', ord('@'): '\\x40', ord('"'): '\\x34'}
+_PRINTABLE_BYTES: Final = frozenset(ord(c) for c in string.printable)
+
+
+# Return the contents of a bytes literal for a sequence of ints
+def _bytes_literal(json: Sequence) -> str:
+    # null values are allowed and taken to mean \x00
+    # TODO: Handle uninitialized bytes instead of defaulting to 0
+    assert all(isinstance(i, int) or i is None for i in json)
+    if all(i in _PRINTABLE_BYTES for i in json):
+        # if all elements are ascii printable, use characters with escaping
+        return ''.join(_BYTES_ESCAPES.get(i) or chr(i) for i in json)
+    # otherwise convert to hexadecimal representation \xCA\xFE
+    return ''.join(f'\\x{i:02x}' if i is not None else '\\x00' for i in json)
@@ -1,19 +1,32 @@
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
 import logging
-from collections import deque
+from collections.abc import Mapping
 from functools import cached_property
 from typing import TYPE_CHECKING, NewType
 
-from .alloc import AllocInfo
+from .alloc import AllocId, AllocInfo
+from .call_graph import CallGraph
+from .decoding import TypeLayoutCache
+from .smir_file import (
+    SMIRFile,
+    binary_cache_file,
+    dump_smir,
+    dump_smir_binary,
+    is_smir_binary,
+    load_smir_binary,
+    read_smir_binary_digest,
+)
 from .ty import EnumT, RefT, StructT, Ty, TypeMetadata, UnionT
 
 if TYPE_CHECKING:
+    import os
+    from collections.abc import Iterable, Iterator, MutableMapping
     from pathlib import Path
-    from typing import Final
-
-    from .alloc import AllocId
+    from typing import Any, Final
 
 
 _LOGGER: Final = logging.getLogger(__name__)
@@ -24,17 +37,63 @@ AdtDef = NewType('AdtDef', int)
 
 
 class SMIRInfo:
-    _smir: dict
-
-    def __init__(self, smir_json: dict) -> None:
+    _smir: MutableMapping[str, Any]
+    _source: tuple[Path, os.stat_result] | None
+    _digest: str | None
+
+    def __init__(
+        self,
+        smir_json: MutableMapping[str, Any],
+        *,
+        source: tuple[Path, os.stat_result] | None = None,
+        digest: str | None = None,
+    ) -> None:
         self._smir = smir_json
+        self._source = source
+        self._digest = digest
 
     @staticmethod
     def from_file(smir_json_file: Path) -> SMIRInfo:
-        return SMIRInfo(json.loads(smir_json_file.read_text()))
+        """Load SMIR from a JSON or binary SMIR file.
 
-    def dump(self, smir_json_file: Path) -> None:
-        smir_json_file.write_text(json.dumps(self._smir))
+        JSON is decoded lazily, one top-level section at a time. If an up-to-date binary cache written by
+        `dump(..., binary_cache=True)` exists next to the JSON file, it is loaded instead.
+        """
+        if is_smir_binary(smir_json_file):
+            return SMIRInfo.from_binary_file(smir_json_file)
+
+        stat = smir_json_file.stat()
+        digest = _read_digest(smir_json_file, stat)
+        cache_file = binary_cache_file(smir_json_file)
+        if digest is not None and read_smir_binary_digest(cache_file) == digest:
+            _LOGGER.debug(f'Loading SMIR from binary cache: {cache_file}')
+            try:
+                smir, _ = load_smir_binary(cache_file)
+            except (OSError, ValueError) as err:
+                _LOGGER.warning(f'Ignoring binary SMIR cache {cache_file}: {err}')
+            else:
+                return SMIRInfo(smir, source=(smir_json_file, stat), digest=digest)
+
+        return SMIRInfo(SMIRFile.load(smir_json_file), source=(smir_json_file, stat))
+
+    @staticmethod
+    def from_binary_file(smir_binary_file: Path) -> SMIRInfo:
+        smir, digest = load_smir_binary(smir_binary_file)
+        return SMIRInfo(smir, digest=digest)
+
+    def dump(self, smir_json_file: Path, *, binary_cache: bool = False) -> None:
+        """Write SMIR JSON to `smir_json_file`, and optionally the binary SMIR format to its `binary_cache_file`."""
+        dump_smir(self._smir, smir_json_file)
+        _write_digest(smir_json_file, smir_json_file.stat(), self.digest)
+        if binary_cache:
+            cache_file = binary_cache_file(smir_json_file)
+            try:
+                self.dump_binary(cache_file)
+            except (OSError, ValueError) as err:
+                _LOGGER.warning(f'Could not write binary SMIR cache {cache_file}: {err}')
+
+    def dump_binary(self, smir_binary_file: Path) -> None:
+        dump_smir_binary(self._smir, self.digest, smir_binary_file)
 
     @cached_property
     def name(self) -> str:
@@ -42,10 +101,18 @@ class SMIRInfo:
 
     @cached_property
     def digest(self) -> str:
-        import hashlib
+        """SHA-256 of the canonical JSON encoding, see `canonical_digest`.
 
-        hash_object = hashlib.sha256(str(self._smir).encode('UTF-8'))
-        return hash_object.hexdigest()
+        `dump` stores the digest next to the file in `<file>.digest`, `from_file` reuses it while the file is unchanged.
+        Binary SMIR files record the digest in their header.
+        """
+        if self._digest is not None:
+            return self._digest
+        if self._source is not None:
+            digest = _read_digest(*self._source)
+            if digest is not None:
+                return digest
+        return canonical_digest(self._smir)
 
     @cached_property
     def allocs(self) -> dict[AllocId, AllocInfo]:
@@ -53,10 +120,36 @@ class SMIRInfo:
             alloc_info.alloc_id: alloc_info for alloc_info in (AllocInfo.from_dict(dct) for dct in self._smir['allocs'])
         }
 
+    @cached_property
+    def used_alloc_ids(self) -> list[AllocId]:
+        """IDs of the `allocs` used by the `items`, in order of `allocs`.
+
+        An alloc is used if it is in the provenance of a constant in one of the items, or in the provenance of another
+        used alloc.
+        """
+        alloc_refs = {
+            AllocId(raw_alloc['alloc_id']): _provenance_alloc_ids(raw_alloc['global_alloc'])
+            for raw_alloc in self._smir['allocs']
+        }
+        pending = [alloc_id for item in self.items.values() for alloc_id in _provenance_alloc_ids(item)]
+        used: set[AllocId] = set()
+        while pending:
+            alloc_id = pending.pop()
+            if alloc_id in used or alloc_id not in alloc_refs:
+                continue
+            used.add(alloc_id)
+            pending.extend(alloc_refs[alloc_id])
+        return [alloc_id for alloc_id in alloc_refs if alloc_id in used]
+
     @cached_property
     def types(self) -> dict[Ty, TypeMetadata]:
         return {Ty(id): TypeMetadata.from_raw(type) for id, type in self._smir['types']}
 
+    @cached_property
+    def type_layouts(self) -> TypeLayoutCache:
+        """The `types`, with the layouts used for decoding derived once per type."""
+        return TypeLayoutCache(self.types)
+
     def unref_type(self, ty: Ty) -> TypeMetadata | None:
         """Recursively resolve type until reaching a non-reference type."""
         if ty not in self.types:
@@ -92,6 +185,12 @@ class SMIRInfo:
     def items(self) -> dict[str, dict]:
         return {_item['symbol_name']: _item for _item in self._smir['items']}
 
+    def item(self, symbol_name: str) -> dict | None:
+        """Return the item for `symbol_name`, without decoding any other item if SMIR is read from a file."""
+        if 'items' not in self.__dict__ and isinstance(self._smir, SMIRFile):
+            return self._smir.item(symbol_name)
+        return self.items.get(symbol_name)
+
     @cached_property
     def main_symbol(self) -> str | None:
         mains = [
@@ -130,7 +229,8 @@ class SMIRInfo:
         fnc_symbols[-1] = {'NormalSym': self.main_symbol}
 
         # function items not present in the SMIR lookup table are added with negative Ty ID
-        missing = [name for name in self.items.keys() if {'NormalSym': name} not in fnc_symbols.values()]
+        known = {sym['NormalSym'] for sym in fnc_symbols.values() if 'NormalSym' in sym}
+        missing = [name for name in self.items.keys() if name not in known]
 
         fake_ty = -2
         for name in missing:
@@ -184,13 +284,29 @@ class SMIRInfo:
         # returns a new SMIRInfo with all _items_ removed that are not reachable from the named function
         start_ty = self.function_tys[start_name]
 
-        _LOGGER.debug(f'Reducing items, starting at {start_ty}. Call Edges {self.call_edges}')
+        _LOGGER.debug(f'Reducing items, starting at {start_ty}. Call graph with {len(self.call_graph)} functions')
 
-        reachable = compute_closure(Ty(start_ty), self.call_edges)
+        reachable = self.call_graph.reachable(Ty(start_ty))
 
         _LOGGER.debug(f'Reducing to reachable Tys {reachable}')
 
-        new_smir = self._smir.copy()  # shallow copy, but we can overwrite the `items`
+        return self._reduce_to_tys(reachable)
+
+    def reduce_to_many(self, start_names: Iterable[str]) -> SMIRInfo:
+        """Return a new SMIRInfo with only the items reachable from any of the named functions.
+
+        Items are kept in order of their `Ty`, so the result does not depend on the order of `start_names`.
+        """
+        reachable: set[Ty] = set()
+        for start_name in start_names:
+            reachable |= self.call_graph.reachable(Ty(self.function_tys[start_name]))
+
+        _LOGGER.debug(f'Reducing to {len(reachable)} reachable Tys')
+
+        return self._reduce_to_tys(sorted(reachable))
+
+    def _reduce_to_tys(self, reachable: Iterable[Ty]) -> SMIRInfo:
+        new_smir = copy.copy(self._smir)  # shallow copy, but we can overwrite the `items`
 
         # filter the new symbols to avoid key errors
         new_syms = [self.function_symbols[ty] for ty in reachable]
@@ -199,6 +315,11 @@ class SMIRInfo:
 
         return SMIRInfo(new_smir)
 
+    @cached_property
+    def call_graph(self) -> CallGraph:
+        """Indexed `call_edges`, shared by all reductions of this SMIR."""
+        return CallGraph(self.call_edges)
+
     @cached_property
     def call_edges(self) -> dict[Ty, set[Ty]]:
         """Determines which functions are called or referenced from others.
@@ -249,19 +370,83 @@ class SMIRInfo:
         return result
 
 
+def canonical_digest(value: Any) -> str:
+    """Return the SHA-256 hex digest of `json.dumps(value, sort_keys=True, separators=(',', ':'))`.
+
+    The encoding is hashed incrementally, one element of each top-level section at a time, so no string of the
+    size of the whole document is built, and the result does not depend on the key order of dictionaries.
+    """
+    hash_object = hashlib.sha256()
+    for chunk in _canonical_chunks(value, depth=2):
+        hash_object.update(chunk.encode('UTF-8'))
+    return hash_object.hexdigest()
+
+
+def _canonical_chunks(value: Any, depth: int) -> Iterator[str]:
+    if depth and isinstance(value, Mapping):
+        yield '{'
+        for i, key in enumerate(sorted(value)):
+            if i:
+                yield ','
+            yield _canonical_json(key)
+            yield ':'
+            yield from _canonical_chunks(value[key], depth - 1)
+        yield '}'
+    elif depth and isinstance(value, list):
+        yield '['
+        for i, elem in enumerate(value):
+            if i:
+                yield ','
+            yield from _canonical_chunks(elem, depth - 1)
+        yield ']'
+    else:
+        yield _canonical_json(value)
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def _provenance_alloc_ids(value: Any) -> list[AllocId]:
+    """Return the alloc IDs in the provenance maps nested in a SMIR JSON value."""
+    res: list[AllocId] = []
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            provenance = value.get('provenance')
+            if isinstance(provenance, dict):
+                res.extend(AllocId(alloc_id) for _, alloc_id in provenance.get('ptrs', ()))
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return res
+
+
+def _digest_file(smir_json_file: Path) -> Path:
+    return smir_json_file.with_name(smir_json_file.name + '.digest')
+
+
+def _read_digest(smir_json_file: Path, stat: os.stat_result) -> str | None:
+    """Return the stored digest of `smir_json_file`, provided it was stored for the file as described by `stat`."""
+    try:
+        dct = json.loads(_digest_file(smir_json_file).read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(dct, dict) or dct.get('size') != stat.st_size or dct.get('mtime-ns') != stat.st_mtime_ns:
+        return None
+    digest = dct.get('digest')
+    return digest if isinstance(digest, str) else None
+
+
+def _write_digest(smir_json_file: Path, stat: os.stat_result, digest: str) -> None:
+    dct = {'size': stat.st_size, 'mtime-ns': stat.st_mtime_ns, 'digest': digest}
+    try:
+        _digest_file(smir_json_file).write_text(json.dumps(dct))
+    except OSError as err:
+        # The digest is only a cache, e.g. the directory of the SMIR file may not be writable
+        _LOGGER.debug(f'Could not store digest of {smir_json_file}: {err}')
+
+
 def compute_closure(start: Ty, edges: dict[Ty, set[Ty]]) -> set[Ty]:
-    work = deque([start])
-    reached = set()
-    finished = False
-    while not finished:
-        try:
-            next = work.popleft()
-        except IndexError:
-            # queue empty, we are done
-            finished = True
-        if not next in reached:
-            reached.add(next)
-            # tolerate missing edge entries in edges
-            if next in edges:
-                work.extend(edges[next])
-    return reached
+    return CallGraph(edges).reachable(start)
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Any
+
+import msgpack  # type: ignore [import-untyped]
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+    from pathlib import Path
+    from typing import Final
+
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+_STRING: Final = rb'"(?:[^"\\\n]|\\.)*"'
+_SYMBOL_NAME: Final = re.compile(rb'"symbol_name"\s*:\s*(' + _STRING + rb')')
+
+BINARY_MAGIC: Final = b'KMIRSMIR'
+BINARY_VERSION: Final = 2
+_BINARY_HEADER: Final = struct.Struct('<8sH64s')
+_BIG_INT_EXT: Final = 1
+
+
+class SMIRFile(MutableMapping[str, Any]):
+    """SMIR JSON document backed by a memory-mapped file, decoding each top-level section on first access.
+
+    Sections are located without parsing by relying on the layout of pretty-printed JSON, as written by
+    stable-mir-json and `SMIRInfo.dump`: every top-level member starts on a line of its own at a common
+    indentation, and so does every element of a top-level array. If a section turns out not to be valid JSON
+    under that assumption, the whole document is decoded instead.
+
+    Assigned sections shadow the file contents, the file itself is never written.
+    """
+
+    path: Path
+    _buf: mmap.mmap
+    _spans: dict[str, tuple[int, int]]
+    _sections: dict[str, Any]
+    _deleted: set[str]
+    _items: dict[str, tuple[int, int]] | None
+
+    def __init__(self, path: Path, buf: mmap.mmap, spans: dict[str, tuple[int, int]]) -> None:
+        self.path = path
+        self._buf = buf
+        self._spans = spans
+        self._sections = {}
+        self._deleted = set()
+        self._items = None
+
+    @staticmethod
+    def load(path: Path) -> MutableMapping[str, Any]:
+        """Return a lazy view of the SMIR JSON in `path`, or the decoded document if it cannot be indexed."""
+        with path.open('rb') as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                buf = None
+
+        spans = _index_object(buf) if buf is not None else None
+        if buf is None or spans is None:
+            _LOGGER.debug(f'Cannot index SMIR JSON, decoding it eagerly: {path}')
+            return json.loads(path.read_bytes())
+
+        return SMIRFile(path, buf, spans)
+
+    def __copy__(self) -> SMIRFile:
+        res = SMIRFile(self.path, self._buf, self._spans)
+        res._sections = dict(self._sections)
+        res._deleted = set(self._deleted)
+        res._items = self._items
+        return res
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._sections:
+            return self._sections[key]
+        if key in self._deleted or key not in self._spans:
+            raise KeyError(key)
+
+        start, end = self._spans[key]
+        try:
+            value = json.loads(self._buf[start:end])
+        except ValueError:
+            _LOGGER.warning(f'Unexpected layout of SMIR JSON, decoding it eagerly: {self.path}')
+            self._decode_all()
+            return self._sections[key]
+
+        self._sections[key] = value
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._sections[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._sections.pop(key, None)
+        self._deleted.add(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from (key for key in self._spans if key not in self._deleted)
+        yield from (key for key in self._sections if key not in self._spans)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._sections or (key in self._spans and key not in self._deleted)
+
+    def item(self, symbol_name: str) -> dict | None:
+        """Decode only the entry of `items` with the given `symbol_name`, if there is one."""
+        if 'items' in self._sections or 'items' in self._deleted:
+            return _find_item(self.get('items', []), symbol_name)
+
+        if self._items is None:
+            self._items = self._index_items()
+
+        span = self._items.get(symbol_name)
+        if span is None:
+            return None
+
+        start, end = span
+        try:
+            item = json.loads(self._buf[start:end])
+        except ValueError:
+            item = None
+        if not isinstance(item, dict) or item.get('symbol_name') != symbol_name:
+            return _find_item(self['items'], symbol_name)
+        return item
+
+    def _index_items(self) -> dict[str, tuple[int, int]]:
+        res: dict[str, tuple[int, int]] = {}
+        if 'items' not in self._spans:
+            return res
+        elements = _index_array(self._buf, *self._spans['items'])
+        if elements is None:
+            return res
+        for start, end in elements:
+            match = _SYMBOL_NAME.search(self._buf, start, end)
+            if match:
+                res.setdefault(json.loads(match.group(1)), (start, end))
+        return res
+
+    def _decode_all(self) -> None:
+        document = json.loads(self._buf[:])
+        self._sections = {key: value for key, value in document.items() if key not in self._deleted} | self._sections
+        self._spans = {key: (0, 0) for key in document}
+
+
+def _find_item(items: list[dict], symbol_name: str) -> dict | None:
+    return next((item for item in items if item.get('symbol_name') == symbol_name), None)
+
+
+def _index_object(buf: mmap.mmap) -> dict[str, tuple[int, int]] | None:
+    """Return the byte span of each member value of the pretty-printed JSON object in `buf`."""
+    opening = re.compile(rb'\s*\{[ \t\r]*\n([ \t]*)"').match(buf)
+    if not opening:
+        return None
+
+    key_line = re.compile(rb'^' + re.escape(opening.group(1)) + rb'(' + _STRING + rb')[ \t]*:[ \t]*', re.M)
+    closing = buf.rfind(b'}')
+    matches = list(key_line.finditer(buf, opening.start(1), closing))
+    if not matches:
+        return None
+
+    ends = [match.start() for match in matches[1:]] + [closing]
+    return {
+        json.loads(match.group(1)): (match.end(), _value_end(buf, match.end(), end))
+        for match, end in zip(matches, ends, strict=True)
+    }
+
+
+def _index_array(buf: mmap.mmap, start: int, end: int) -> list[tuple[int, int]] | None:
+    """Return the byte span of each element of the pretty-printed JSON array at `buf[start:end]`."""
+    opening = re.compile(rb'\[[ \t\r]*\n([ \t]*)(?=[^\s\]}])').match(buf, start, end)
+    if not opening:
+        return None
+
+    element_line = re.compile(rb'^' + re.escape(opening.group(1)) + rb'(?=[^\s\]}])', re.M)
+    closing = buf.rfind(b']', start, end)
+    matches = list(element_line.finditer(buf, opening.start(1), closing))
+    ends = [match.start() for match in matches[1:]] + [closing]
+    return [(match.end(), _value_end(buf, match.end(), end)) for match, end in zip(matches, ends, strict=True)]
+
+
+def _value_end(buf: mmap.mmap, start: int, end: int) -> int:
+    """Strip the separating comma and whitespace between a value starting at `start` and the next one at `end`."""
+    while end > start and buf[end - 1 : end] in (b' ', b'\t', b'\r', b'\n'):
+        end -= 1
+    if end > start and buf[end - 1 : end] == b',':
+        end -= 1
+    return end
+
+
+def dump_smir(smir: Mapping[str, Any], path: Path) -> None:
+    """Write `smir` to `path` in a layout that `SMIRFile` can index.
+
+    Each top-level member, and each element of a top-level array, is written compactly on a line of its own. The
+    file is replaced atomically, so documents still mapped from an earlier version of it stay intact.
+    """
+    dump_smir_encoded(
+        (
+            (key, (map(json.dumps, value) if isinstance(value, list) else json.dumps(value)))
+            for key, value in smir.items()
+        ),
+        path,
+    )
+
+
+def dump_smir_encoded(members: Iterable[tuple[str, str | Iterable[str]]], path: Path) -> None:
+    """Write a SMIR document given as already encoded JSON to `path`, in the layout of `dump_smir`.
+
+    The value of each member is either its JSON encoding, or an iterable of the encodings of the elements of an
+    array. Elements are consumed one at a time, so arrays need not be held in memory at once.
+    """
+    tmp_file = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with tmp_file.open('w') as f:
+            f.write('{')
+            for i, (key, value) in enumerate(members):
+                f.write(',\n ' if i else '\n ')
+                f.write(json.dumps(key))
+                f.write(': ')
+                if isinstance(value, str):
+                    f.write(value)
+                    continue
+                f.write('[')
+                empty = True
+                for elem in value:
+                    f.write('\n  ' if empty else ',\n  ')
+                    f.write(elem)
+                    empty = False
+                f.write(']' if empty else '\n ]')
+            f.write('\n}\n')
+        os.replace(tmp_file, path)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+
+def binary_cache_file(smir_json_file: Path) -> Path:
+    """Return the path of the binary SMIR cache kept next to `smir_json_file`."""
+    return smir_json_file.with_suffix('.bin')
+
+
+def is_smir_binary(path: Path) -> bool:
+    with path.open('rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def read_smir_binary_digest(path: Path) -> str | None:
+    """Return the digest recorded in the header of the binary SMIR file `path`, if it can be read by this version."""
+    try:
+        with path.open('rb') as f:
+            header = f.read(_BINARY_HEADER.size)
+    except OSError:
+        return None
+    if len(header) < _BINARY_HEADER.size:
+        return None
+    magic, version, digest = _BINARY_HEADER.unpack(header)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        return None
+    return digest.rstrip(b'\0').decode('ascii')
+
+
+def load_smir_binary(path: Path) -> tuple[dict[str, Any], str]:
+    """Return the SMIR document stored in the binary SMIR file `path`, together with its digest."""
+    data = path.read_bytes()
+    if len(data) < _BINARY_HEADER.size:
+        raise ValueError(f'Not a binary SMIR file: {path}')
+    magic, version, digest = _BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f'Not a binary SMIR file: {path}')
+    if version != BINARY_VERSION:
+        raise ValueError(f'Unsupported binary SMIR format version {version}: {path}')
+
+    try:
+        smir = msgpack.unpackb(memoryview(data)[_BINARY_HEADER.size :], ext_hook=_unpack_ext)
+    except (ValueError, msgpack.UnpackException) as err:
+        raise ValueError(f'Malformed binary SMIR file: {path}') from err
+    if not isinstance(smir, dict):
+        raise ValueError(f'Malformed binary SMIR file: {path}')
+    return smir, digest.rstrip(b'\0').decode('ascii')
+
+
+def dump_smir_binary(smir: Mapping[str, Any], digest: str, path: Path) -> None:
+    """Write `smir` to `path` in the binary SMIR format, recording `digest` in the header.
+
+    The header holds `BINARY_MAGIC`, `BINARY_VERSION` as a little-endian 16-bit integer and the ASCII digest padded
+    to 64 bytes. The document follows in MessagePack, with integers beyond 64 bits stored as extension type
+    `_BIG_INT_EXT` holding their decimal digits. Like `dump_smir`, the file is replaced atomically.
+    """
+    header = _BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, digest.encode('ascii'))
+    payload = msgpack.packb(smir, default=_pack_ext)
+
+    tmp_file = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with tmp_file.open('wb') as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp_file, path)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+
+def _pack_ext(value: Any) -> Any:
+    if isinstance(value, int):  # only called for integers that do not fit into 64 bits
+        return msgpack.ExtType(_BIG_INT_EXT, str(value).encode('ascii'))
+    raise TypeError(f'Cannot store {type(value).__name__} in binary SMIR: {value!r}')
+
+
+def _unpack_ext(code: int, data: bytes) -> Any:
+    if code == _BIG_INT_EXT:
+        return int(data)
+    raise ValueError(f'Unknown extension type in binary SMIR: {code}')
@@ -13,11 +13,12 @@ from kmir.kmir import KMIR
 if TYPE_CHECKING:
     from pathlib import Path
 
-    from pytest import FixtureRequest, Parser
+    from pytest import Config, FixtureRequest, Item, Parser
 
 
 def pytest_configure(config) -> None:
     sys.setrecursionlimit(1000000)
+    config.addinivalue_line('markers', 'benchmark: performance measurement, only run with --benchmark')
 
 
 def _normalize_symbol_hashes(text: str) -> str:
@@ -65,6 +66,21 @@ def pytest_addoption(parser: Parser) -> None:
         default=False,
         help='Write expected output files for proof tests',
     )
+    parser.addoption(
+        '--benchmark',
+        action='store_true',
+        default=False,
+        help='Run the benchmarks, which are skipped otherwise',
+    )
+
+
+def pytest_collection_modifyitems(config: Config, items: list[Item]) -> None:
+    if config.getoption('--benchmark'):
+        return
+    skip_benchmark = pytest.mark.skip(reason='benchmark, run with --benchmark')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
 
 
 @pytest.fixture
@@ -3,8 +3,7 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from functools import cached_property
-from typing import TYPE_CHECKING, NamedTuple, NewType
+from typing import TYPE_CHECKING, NamedTuple, NewType, TypeVar
 
 if TYPE_CHECKING:
     from collections.abc import Mapping
@@ -13,6 +12,8 @@ if TYPE_CHECKING:
 
 Ty = NewType('Ty', int)
 
+_T = TypeVar('_T')
+
 
 class IntTy(Enum):
     I8 = 1
@@ -43,7 +44,17 @@ def _cannot_parse_as(name: str, data: Any) -> ValueError:
     return ValueError(f'Cannot parse as {name}: {data}')
 
 
+# Shared instances of layout components, which are repeated across the types of a program and across programs
+_INTERNED: Final[dict[tuple[type, Any], Any]] = {}
+
+
+def _interned(value: _T) -> _T:
+    return _INTERNED.setdefault((type(value), value), value)
+
+
 class TypeMetadata(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_raw(data: Any) -> TypeMetadata:
         if data == 'VoidType':
@@ -67,45 +78,47 @@ class TypeMetadata(ABC):  # noqa: B024
 
 
 class PrimitiveT(TypeMetadata, ABC):
+    __slots__ = ()
+
     @staticmethod
     def from_raw(data: Any) -> PrimitiveT:
         match data['PrimitiveType']:
             case 'Bool':
-                return BoolT()
+                return BOOL_T
             case 'Char':
-                return CharT()
+                return CHAR_T
             case 'Str':
-                return StrT()
+                return STR_T
             case {'Uint': uint_ty}:
-                return UintT(UintTy[uint_ty])
+                return _interned(UintT(UintTy[uint_ty]))
             case {'Int': int_ty}:
-                return IntT(IntTy[int_ty])
+                return _interned(IntT(IntTy[int_ty]))
             case {'Float': float_ty}:
-                return FloatT(FloatTy[float_ty])
+                return _interned(FloatT(FloatTy[float_ty]))
             case _:
                 raise _cannot_parse_as('PrimitiveT', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BoolT(PrimitiveT):
     def nbytes(self, types: Mapping[Ty, TypeMetadata]) -> int:
         return 1
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CharT(PrimitiveT): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StrT(PrimitiveT): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FloatT(PrimitiveT):
     info: FloatTy
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class IntT(PrimitiveT):
     info: IntTy
 
@@ -125,7 +138,7 @@ class IntT(PrimitiveT):
         return self.info.value
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UintT(PrimitiveT):
     info: UintTy
 
@@ -145,12 +158,12 @@ class UintT(PrimitiveT):
         return self.info.value
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EnumT(TypeMetadata):
     name: str
     adt_def: int
-    discriminants: list[int]
-    fields: list[list[Ty]]
+    discriminants: tuple[int, ...]
+    fields: tuple[tuple[Ty, ...], ...]
     layout: LayoutShape | None
 
     @staticmethod
@@ -168,8 +181,8 @@ class EnumT(TypeMetadata):
                 return EnumT(
                     name=name,
                     adt_def=adt_def,
-                    discriminants=list(discriminants),
-                    fields=[list(tys) for tys in fields],
+                    discriminants=tuple(discriminants),
+                    fields=tuple(tuple(tys) for tys in fields),
                     layout=LayoutShape.from_raw(layout) if layout is not None else None,
                 )
             case _:
@@ -183,7 +196,7 @@ class EnumT(TypeMetadata):
                 return size.in_bytes
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LayoutShape:
     fields: FieldsShape
     variants: VariantsShape
@@ -201,52 +214,60 @@ class LayoutShape:
                 'abi_align': abi_align,
                 'size': size,
             }:
-                return LayoutShape(
-                    fields=FieldsShape.from_raw(fields),
-                    variants=VariantsShape.from_raw(variants),
-                    abi=ValueAbi.from_raw(abi),
-                    abi_align=int(abi_align),
-                    size=MachineSize.from_raw(size),
+                return _interned(
+                    LayoutShape(
+                        fields=FieldsShape.from_raw(fields),
+                        variants=VariantsShape.from_raw(variants),
+                        abi=ValueAbi.from_raw(abi),
+                        abi_align=int(abi_align),
+                        size=MachineSize.from_raw(size),
+                    )
                 )
             case _:
                 raise _cannot_parse_as('LayoutShape', data)
 
 
 class FieldsShape(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_raw(data: Any) -> FieldsShape:
         match data:
             case 'Primitive':
-                return PrimitiveFields()
+                return PRIMITIVE_FIELDS
             case {'Union': count}:
-                return UnionFields(count=count)
+                return _interned(UnionFields(count=count))
             case {
                 'Arbitrary': {
                     'offsets': offsets,
                 },
             }:
-                return ArbitraryFields(
-                    offsets=[MachineSize.from_raw(offset) for offset in offsets],
+                return _interned(
+                    ArbitraryFields(
+                        offsets=tuple(MachineSize.from_raw(offset) for offset in offsets),
+                    )
                 )
             case _:
                 raise _cannot_parse_as('FieldsShape', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PrimitiveFields(FieldsShape): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UnionFields(FieldsShape):
     count: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ArbitraryFields(FieldsShape):
-    offsets: list[MachineSize]
+    offsets: tuple[MachineSize, ...]
 
 
 class VariantsShape(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_raw(data: Any) -> VariantsShape:
         match data:
@@ -255,7 +276,7 @@ class VariantsShape(ABC):  # noqa: B024
                     'index': index,
                 },
             }:
-                return Single(index=index)
+                return _interned(Single(index=index))
             case {
                 'Multiple': {
                     'tag': tag,
@@ -264,37 +285,39 @@ class VariantsShape(ABC):  # noqa: B024
                     'variants': variants,
                 },
             }:
-                return Multiple(
-                    tag=Scalar.from_raw(tag),
-                    tag_encoding=TagEncoding.from_raw(tag_encoding),
-                    tag_field=int(tag_field),
-                    variants=[LayoutShape.from_raw(variant) for variant in variants],
+                return _interned(
+                    Multiple(
+                        tag=Scalar.from_raw(tag),
+                        tag_encoding=TagEncoding.from_raw(tag_encoding),
+                        tag_field=int(tag_field),
+                        variants=tuple(LayoutShape.from_raw(variant) for variant in variants),
+                    )
                 )
             case _:
                 raise _cannot_parse_as('FieldsShape', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Single(VariantsShape):
     index: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Multiple(VariantsShape):
     tag: Scalar
     tag_encoding: TagEncoding
     tag_field: int
-    variants: list[LayoutShape]
+    variants: tuple[LayoutShape, ...]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ValueAbi:
     @staticmethod
     def from_raw(data: Any) -> ValueAbi:
-        return ValueAbi()
+        return VALUE_ABI
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MachineSize:
     num_bits: int
 
@@ -304,11 +327,11 @@ class MachineSize:
             case {
                 'num_bits': num_bits,
             }:
-                return MachineSize(num_bits=num_bits)
+                return _interned(MachineSize(num_bits=num_bits))
             case _:
                 raise _cannot_parse_as('MachineSize', data)
 
-    @cached_property
+    @property
     def in_bytes(self) -> int:
         if self.num_bits % 8 != 0:
             raise ValueError('Expected an even number of bytes, got: {self.num_bits} bits')
@@ -316,6 +339,8 @@ class MachineSize:
 
 
 class Scalar(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_raw(data: Any) -> Scalar:
         match data:
@@ -325,34 +350,36 @@ class Scalar(ABC):  # noqa: B024
                     'valid_range': valid_range,
                 },
             }:
-                return Initialized(
-                    value=Primitive.from_raw(value),
-                    valid_range=WrappingRange.from_raw(valid_range),
+                return _interned(
+                    Initialized(
+                        value=Primitive.from_raw(value),
+                        valid_range=WrappingRange.from_raw(valid_range),
+                    )
                 )
             case {
                 'Union': {
                     'value': value,
                 },
             }:
-                return Union(
-                    value=Primitive.from_raw(value),
-                )
+                return _interned(Union(value=Primitive.from_raw(value)))
             case _:
                 raise _cannot_parse_as('Scalar', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Initialized(Scalar):
     value: Primitive
     valid_range: WrappingRange
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Union(Scalar):
     value: Primitive
 
 
 class Primitive(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_raw(data: Any) -> Primitive:
         match data:
@@ -362,19 +389,21 @@ class Primitive(ABC):  # noqa: B024
                     'signed': signed,
                 },
             }:
-                return PrimitiveInt(
-                    length=IntegerLength[str(length)],
-                    signed=bool(signed),
+                return _interned(
+                    PrimitiveInt(
+                        length=IntegerLength[str(length)],
+                        signed=bool(signed),
+                    )
                 )
             case {'Float': _}:
-                return Float()
+                return FLOAT
             case {'Pointer': _}:
-                return Pointer()
+                return POINTER
             case _:
                 raise _cannot_parse_as('Primitive', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PrimitiveInt(Primitive):
     length: IntegerLength
     signed: bool
@@ -393,20 +422,22 @@ class IntegerLength(Enum):
         return (x - y) & mask
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Float(Primitive): ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Pointer(Primitive): ...
 
 
 class TagEncoding(ABC):  # noqa: B024
+    __slots__ = ()
+
     @staticmethod
     def from_raw(data: Any) -> TagEncoding:
         match data:
             case 'Direct':
-                return Direct()
+                return DIRECT
             case {
                 'Niche': {
                     'untagged_variant': untagged_variant,
@@ -414,10 +445,12 @@ class TagEncoding(ABC):  # noqa: B024
                     'niche_start': niche_start,
                 },
             }:
-                return Niche(
-                    untagged_variant=int(untagged_variant),
-                    niche_variants=RangeInclusive.from_raw(niche_variants),
-                    niche_start=int(niche_start),
+                return _interned(
+                    Niche(
+                        untagged_variant=int(untagged_variant),
+                        niche_variants=RangeInclusive.from_raw(niche_variants),
+                        niche_start=int(niche_start),
+                    )
                 )
             case _:
                 raise _cannot_parse_as('TagEncoding', data)
@@ -426,14 +459,14 @@ class TagEncoding(ABC):  # noqa: B024
     def decode(self, tag: int, *, width: IntegerLength) -> int: ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Direct(TagEncoding):
     def decode(self, tag: int, *, width: IntegerLength) -> int:
         # The tag directly stores the discriminant.
         return tag
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Niche(TagEncoding):
     untagged_variant: int
     niche_variants: RangeInclusive
@@ -493,11 +526,11 @@ class WrappingRange(NamedTuple):
                 raise _cannot_parse_as('WrappingRange', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StructT(TypeMetadata):
     name: str
     adt_def: int
-    fields: list[Ty]
+    fields: tuple[Ty, ...]
     layout: LayoutShape | None
 
     @staticmethod
@@ -514,7 +547,7 @@ class StructT(TypeMetadata):
                 return StructT(
                     name=name,
                     adt_def=adt_def,
-                    fields=list(fields),
+                    fields=tuple(fields),
                     layout=LayoutShape.from_raw(layout) if layout is not None else None,
                 )
             case _:
@@ -528,11 +561,11 @@ class StructT(TypeMetadata):
                 return size.in_bytes
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UnionT(TypeMetadata):
     name: str
     adt_def: int
-    fields: list[Ty]
+    fields: tuple[Ty, ...]
     layout: LayoutShape | None
 
     @staticmethod
@@ -549,14 +582,14 @@ class UnionT(TypeMetadata):
                 return UnionT(
                     name=name,
                     adt_def=adt_def,
-                    fields=list(fields),
+                    fields=tuple(fields),
                     layout=LayoutShape.from_raw(layout) if layout is not None else None,
                 )
             case _:
                 raise _cannot_parse_as('UnionT', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ArrayT(TypeMetadata):
     element_type: Ty
     length: int | None
@@ -596,7 +629,7 @@ class ArrayT(TypeMetadata):
         return elem_info.nbytes(types) * self.length
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PtrT(TypeMetadata):
     pointee_type: Ty
 
@@ -613,7 +646,7 @@ class PtrT(TypeMetadata):
                 raise _cannot_parse_as('PtrT', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RefT(TypeMetadata):
     pointee_type: Ty
 
@@ -630,9 +663,9 @@ class RefT(TypeMetadata):
                 raise _cannot_parse_as('RefT', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TupleT(TypeMetadata):
-    components: list[Ty]
+    components: tuple[Ty, ...]
     layout: LayoutShape | None
 
     @staticmethod
@@ -645,7 +678,7 @@ class TupleT(TypeMetadata):
                 }
             }:
                 return TupleT(
-                    components=list(types),
+                    components=tuple(types),
                     layout=LayoutShape.from_raw(layout) if layout is not None else None,
                 )
             case {
@@ -654,7 +687,7 @@ class TupleT(TypeMetadata):
                 }
             }:
                 return TupleT(
-                    components=list(types),
+                    components=tuple(types),
                     layout=None,
                 )
             case _:
@@ -675,7 +708,7 @@ class TupleT(TypeMetadata):
                 return size.in_bytes
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DynT(TypeMetadata):
     name: str
     layout: LayoutShape | None
@@ -697,7 +730,7 @@ class DynT(TypeMetadata):
                 raise _cannot_parse_as('DynT', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FunT(TypeMetadata):
     type_str: str
 
@@ -710,8 +743,16 @@ class FunT(TypeMetadata):
                 raise _cannot_parse_as('FunT', data)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VoidT(TypeMetadata): ...
 
 
 VOID_T: Final = VoidT()
+BOOL_T: Final = BoolT()
+CHAR_T: Final = CharT()
+STR_T: Final = StrT()
+PRIMITIVE_FIELDS: Final = PrimitiveFields()
+VALUE_ABI: Final = ValueAbi()
+FLOAT: Final = Float()
+POINTER: Final = Pointer()
+DIRECT: Final = Direct()
@@ -72,6 +72,40 @@ class RangeValue(Value):
         return KApply('Value::Range', list_of(elem.to_kast() for elem in self.elems))
 
 
+@dataclass
+class IntRangeValue(Value):
+    """Range of integers of a single type, equivalent to a `RangeValue` of `IntValue`s but stored compactly."""
+
+    values: tuple[int, ...]
+    nbits: int
+    signed: bool
+
+    def __init__(self, values: Iterable[int], nbits: int, signed: bool):
+        self.values = tuple(values)
+        self.nbits = nbits
+        self.signed = signed
+
+    def to_kast(self) -> KInner:
+        nbits = intToken(self.nbits)
+        signed = boolToken(self.signed)
+        return KApply(
+            'Value::Range', list_of(KApply('Value::Integer', intToken(value), nbits, signed) for value in self.values)
+        )
+
+
+@dataclass
+class BoolRangeValue(Value):
+    """Range of booleans, equivalent to a `RangeValue` of `BoolValue`s but stored compactly."""
+
+    values: tuple[bool, ...]
+
+    def __init__(self, values: Iterable[bool]):
+        self.values = tuple(values)
+
+    def to_kast(self) -> KInner:
+        return KApply('Value::Range', list_of(KApply('Value::BoolVal', boolToken(value)) for value in self.values))
+
+
 @dataclass
 class AggregateValue(Value):
     variant_idx: int
@@ -5,7 +5,11 @@ from typing import TYPE_CHECKING, NamedTuple
 
 import pytest
 
+from kmir.alloc import AllocInfo
+from kmir.decoding import decode_alloc_or_unable
 from kmir.smir import SMIRInfo
+from kmir.ty import Ty, TypeMetadata
+from kmir.value import IntRangeValue
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -263,7 +267,6 @@ def test_python_decode_value(
     from pyk.kore.tools import kore_print
 
     from kmir.decoding import decode_value
-    from kmir.ty import Ty, TypeMetadata
 
     type_info = TypeMetadata.from_raw(test_data.type_info)
     types = {Ty(ty): TypeMetadata.from_raw(data) for ty, data in test_data.types.items()}
@@ -284,3 +287,37 @@ def test_python_decode_value(
 
     # Then
     assert test_data.expected == actual
+
+
+def test_decode_large_array() -> None:
+    """A 1 MiB `[u8; N]` static is decoded in bulk into a compact range of integers."""
+    # Given
+    size = 1 << 20
+    data = [i % 251 for i in range(size)]
+    types = {
+        Ty(0): TypeMetadata.from_raw({'PrimitiveType': {'Uint': 'U8'}}),
+        Ty(1): TypeMetadata.from_raw({'ArrayType': {'elem_type': 0, 'size': None}}),
+    }
+    alloc_info = AllocInfo.from_dict(
+        {
+            'alloc_id': 0,
+            'ty': 1,
+            'global_alloc': {
+                'Memory': {
+                    'bytes': data,
+                    'provenance': {'ptrs': []},
+                    'align': 1,
+                    'mutability': 'Not',
+                },
+            },
+        }
+    )
+
+    # When
+    value = decode_alloc_or_unable(alloc_info, types)
+
+    # Then
+    assert isinstance(value, IntRangeValue)
+    assert (value.nbits, value.signed) == (8, False)
+    assert len(value.values) == size
+    assert all(value.values[i] == data[i] for i in [0, 1, 250, 251, 252, size // 2, size - 1])
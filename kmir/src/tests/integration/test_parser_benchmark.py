@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from kmir.parse.parser import Parser
+
+if TYPE_CHECKING:
+    from typing import Final
+
+    from kmir.kmir import KMIR
+    from kmir.parse.parser import JSON
+
+
+DATA_DIR: Final = (Path(__file__).parent / 'data').resolve(strict=True)
+SCHEMA_PARSE_DIR: Final = DATA_DIR / 'schema-parse'
+
+
+def _smir_terms(smir: dict) -> list[tuple[JSON, str]]:
+    return [
+        *((item, 'MonoItem') for item in smir['items']),
+        *((type_entry, 'TypeMapping') for type_entry in smir['types']),
+    ]
+
+
+@pytest.fixture(scope='module')
+def schema_parse_terms() -> list[tuple[JSON, str]]:
+    return [
+        (json.loads((test_dir / 'input.json').read_text()), (test_dir / 'reference.sort').read_text().rstrip())
+        for test_dir in sorted(SCHEMA_PARSE_DIR.iterdir())
+    ]
+
+
+@pytest.fixture(scope='module')
+def smir_json_terms() -> list[tuple[JSON, str]]:
+    # the checked-in SMIR JSON files, so that no Rust program needs to be compiled
+    res: list[tuple[JSON, str]] = []
+    for smir_file in sorted(DATA_DIR.glob('**/*.smir.json')):
+        res.extend(_smir_terms(json.loads(smir_file.read_text())))
+    return res
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('data_set', ['schema_parse_terms', 'smir_json_terms'])
+def test_parser_benchmark(data_set: str, kmir: KMIR, request: pytest.FixtureRequest) -> None:
+    """Parse every term of a data set and report the parser throughput and peak memory.
+
+    Memory is traced in a separate pass, so that tracing does not distort the time measurement.
+    """
+    # Given
+    terms: list[tuple[JSON, str]] = request.getfixturevalue(data_set)
+    size = sum(len(json.dumps(term)) for term, _ in terms)
+    Parser(kmir.definition).parse_mir_json(*terms[0])  # warm up the shared caches of the definition
+
+    # When
+    parser = Parser(kmir.definition)
+    start = time.perf_counter()
+    results = [parser.parse_mir_json(term, sort) for term, sort in terms]
+    elapsed = time.perf_counter() - start
+
+    parser = Parser(kmir.definition)
+    tracemalloc.start()
+    try:
+        for term, sort in terms:
+            parser.parse_mir_json(term, sort)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Then
+    print(
+        f'parse_mir_json ({data_set}, {len(terms)} terms, {size / 2**20:.1f} MiB JSON): '
+        f'{len(terms) / elapsed:.0f} terms/s, {size / 2**20 / elapsed:.2f} MiB/s, peak {peak / 2**20:.1f} MiB'
+    )
+    assert all(result is not None for result in results)
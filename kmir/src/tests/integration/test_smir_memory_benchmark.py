@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import gc
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from kmir.linker import link
+from kmir.smir import SMIRInfo
+
+if TYPE_CHECKING:
+    from typing import Final
+
+
+DATA_DIR: Final = (Path(__file__).parent / 'data').resolve(strict=True)
+
+# Frozen, slotted and interned metadata holds about 160 B per entry on the test data, plain dataclasses about 550 B
+MAX_BYTES_PER_ENTRY: Final = 256
+
+
+@pytest.mark.benchmark
+def test_smir_metadata_memory_benchmark() -> None:
+    """Link every SMIR JSON file of the test data and bound the memory held by its type and alloc metadata.
+
+    Only the `types` and `allocs` tables are traced, the JSON document they are built from is loaded beforehand.
+    """
+    # Given
+    smir = link([SMIRInfo.from_file(smir_file) for smir_file in sorted(DATA_DIR.glob('**/*.smir.json'))])
+    raw_types, raw_allocs = smir._smir['types'], smir._smir['allocs']
+    gc.collect()
+
+    # When
+    tracemalloc.start()
+    try:
+        types = smir.types
+        allocs = smir.allocs
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Then
+    print(
+        f'SMIRInfo metadata ({len(types)} types, {len(allocs)} allocs): '
+        f'{held / 2**20:.2f} MiB, {held / (len(types) + len(allocs)):.0f} B per entry'
+    )
+    assert len(types) == len(raw_types)
+    assert len(allocs) == len(raw_allocs)
+    assert held / (len(types) + len(allocs)) <= MAX_BYTES_PER_ENTRY
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+from pyk.kast.inner import KApply, KSort
+from pyk.kore.prelude import int_dv
+from pyk.kore.rpc import KoreClient, kore_server
+from pyk.kore.syntax import App
+
+from kmir.kmir import KMIR
+from kmir.kompile import KompileCache
+from kmir.smir import SMIRInfo
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+    from typing import Any, Final
+
+    from pyk.kore.syntax import Pattern
+
+
+PRIMITIVE_TYPES: Final = ('Bool', 'Char', 'Str')
+SIZES: Final = (1_000, 10_000)
+SAMPLES: Final = 20
+
+
+@pytest.fixture(scope='module')
+def kompile_cache(tmp_path_factory: pytest.TempPathFactory) -> KompileCache:
+    # Both backends are measured on the same kompiled definition
+    return KompileCache(tmp_path_factory.mktemp('kompile-cache'))
+
+
+def _type_table_smir(size: int) -> SMIRInfo:
+    smir: dict[str, Any] = {
+        'name': 'stratification',
+        'crate_id': 0,
+        'allocs': [],
+        'debug': None,
+        'functions': [],
+        'items': [],
+        'machine': None,
+        'spans': [],
+        'uneval_consts': [],
+        'types': [[ty, {'PrimitiveType': PRIMITIVE_TYPES[ty % len(PRIMITIVE_TYPES)]}] for ty in range(size)],
+    }
+    return SMIRInfo(smir)
+
+
+def _expected(kmir: KMIR, size: int, ty: int) -> Pattern:
+    if ty >= size:
+        return kmir.kast_to_kore(KApply('TypeInfo::VoidType', ()), KSort('TypeInfo'))
+    parsed = kmir.parser.parse_mir_json({'PrimitiveType': PRIMITIVE_TYPES[ty % len(PRIMITIVE_TYPES)]}, 'TypeInfo')
+    assert parsed is not None
+    term, sort = parsed
+    return kmir.kast_to_kore(term, sort)
+
+
+def _lookup_tys(kmir: KMIR, backend: str, tys: Sequence[int]) -> tuple[list[Pattern], float]:
+    """Simplify `lookupTy` on each of `tys`, return the results and the time taken.
+
+    With `backend='llvm'`, function equations are evaluated by the LLVM library through the booster.
+    """
+    llvm_definition_dir = kmir.llvm_library_dir if backend == 'llvm' else None
+    with (
+        kore_server(
+            kmir.definition_dir, kmir.definition.main_module_name, llvm_definition_dir=llvm_definition_dir
+        ) as server,
+        KoreClient('localhost', server.port) as client,
+    ):
+        start = time.perf_counter()
+        results = [client.simplify(App('LbllookupTy', (), (App('Lblty', (), (int_dv(ty),)),)))[0] for ty in tys]
+        return results, time.perf_counter() - start
+
+
+@pytest.mark.parametrize('backend', ['haskell', 'llvm'])
+def test_stratified_lookup_small_table(backend: str, kompile_cache: KompileCache, tmp_path: Path) -> None:
+    """A table of a single stratum still looks up missing `Ty`s as `TypeInfo::VoidType`."""
+    # Given
+    size = 10
+    smir_info = _type_table_smir(size)
+    kmir = KMIR.from_kompiled_kore(smir_info, target_dir=tmp_path, symbolic=True, kompile_cache=kompile_cache)
+    tys = [0, size - 1, size, 1000]
+
+    # When
+    results, _ = _lookup_tys(kmir, backend, tys)
+
+    # Then
+    assert results == [_expected(kmir, size, ty) for ty in tys]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('backend', ['haskell', 'llvm'])
+@pytest.mark.parametrize('size', SIZES, ids=str)
+def test_stratified_lookup_benchmark(size: int, backend: str, kompile_cache: KompileCache, tmp_path: Path) -> None:
+    """Check `lookupTy` on a synthetic type table and report the mean lookup time."""
+    # Given
+    smir_info = _type_table_smir(size)
+    kmir = KMIR.from_kompiled_kore(smir_info, target_dir=tmp_path, symbolic=True, kompile_cache=kompile_cache)
+    tys = [*range(0, size, max(1, size // SAMPLES)), size]
+
+    # When
+    results, elapsed = _lookup_tys(kmir, backend, tys)
+
+    # Then
+    print(f'lookupTy ({backend}, {size} types): {elapsed / len(tys) * 1000:.2f} ms per lookup')
+    assert results == [_expected(kmir, size, ty) for ty in tys]
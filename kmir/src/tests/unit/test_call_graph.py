@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from kmir.call_graph import CallGraph
+from kmir.ty import Ty
+
+if TYPE_CHECKING:
+    from typing import Final
+
+
+EDGES: Final = {
+    Ty(0): {Ty(1)},
+    Ty(1): {Ty(2), Ty(4)},
+    Ty(2): {Ty(1), Ty(3)},
+    Ty(3): set(),
+    Ty(4): {Ty(4), Ty(5)},
+    Ty(6): {Ty(0)},
+}
+
+
+def test_call_graph_index() -> None:
+    # When
+    graph = CallGraph(EDGES)
+
+    # Then
+    assert len(graph) == 7
+    assert [graph.tys[graph.ids[ty]] for ty in graph.tys] == list(graph.tys)
+    assert graph.callers(Ty(1)) == {Ty(0), Ty(2)}
+    assert graph.callers(Ty(6)) == set()
+    assert graph.scc[graph.ids[Ty(1)]] == graph.scc[graph.ids[Ty(2)]]
+    assert len(set(graph.scc)) == 6
+    for node, succs in enumerate(graph.succs):
+        assert all(graph.scc[succ] <= graph.scc[node] for succ in succs)
+
+
+@pytest.mark.parametrize(
+    'start,expected',
+    [
+        (0, {0, 1, 2, 3, 4, 5}),
+        (2, {1, 2, 3, 4, 5}),
+        (4, {4, 5}),
+        (5, {5}),
+        (6, {0, 1, 2, 3, 4, 5, 6}),
+        (7, {7}),
+    ],
+    ids=str,
+)
+def test_call_graph_reachable(start: int, expected: set[int]) -> None:
+    # Given
+    graph = CallGraph(EDGES)
+
+    # When
+    actual = graph.reachable(Ty(start))
+
+    # Then
+    assert actual == expected
+    assert graph.reachable(Ty(start)) == actual
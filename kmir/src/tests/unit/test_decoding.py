@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+import pytest
+
+from kmir.alloc import AllocInfo
+from kmir.decoding import (
+    AllocDecoder,
+    TypeLayoutCache,
+    UnableToDecodeValue,
+    decode_alloc_or_unable,
+    decode_value,
+    decode_value_or_unable,
+)
+from kmir.ty import Ty, TypeMetadata
+from kmir.value import AggregateValue, BoolRangeValue, BoolValue, IntRangeValue, IntValue, RangeValue
+
+if TYPE_CHECKING:
+    from typing import Final
+
+    from kmir.ty import EnumT
+
+
+DECODE_VALUE_DIR: Final = Path(__file__).parent.parent / 'integration' / 'data' / 'decode-value'
+
+TYPES: Final = {
+    Ty(0): TypeMetadata.from_raw({'PrimitiveType': {'Uint': 'U16'}}),
+    Ty(1): TypeMetadata.from_raw({'ArrayType': {'elem_type': 0, 'size': None}}),
+    Ty(2): TypeMetadata.from_raw({'TupleType': {'types': [], 'layout': None}}),
+    Ty(3): TypeMetadata.from_raw({'ArrayType': {'elem_type': 2, 'size': None}}),
+    Ty(4): TypeMetadata.from_raw({'PrimitiveType': {'Int': 'I128'}}),
+    Ty(5): TypeMetadata.from_raw({'ArrayType': {'elem_type': 4, 'size': None}}),
+    Ty(6): TypeMetadata.from_raw({'PrimitiveType': 'Bool'}),
+    Ty(7): TypeMetadata.from_raw({'ArrayType': {'elem_type': 6, 'size': None}}),
+}
+
+
+@pytest.mark.parametrize(
+    'data', [b'\x01\x00\x02\x01', bytearray(b'\x01\x00\x02\x01'), memoryview(b'\xff\x01\x00\x02\x01')[1:]]
+)
+def test_decode_array(data: bytes | memoryview) -> None:
+    # When
+    value = decode_value(data, TYPES[Ty(1)], TYPES)
+
+    # Then
+    assert value == IntRangeValue([1, 0x0102], nbits=16, signed=False)
+
+
+PRIMITIVE_ARRAY_TEST_DATA: Final = (
+    ('u16', Ty(1), b'\x01\x00\xff\xff', IntRangeValue([1, 0xFFFF], nbits=16, signed=False)),
+    ('i128', Ty(5), b'\xff' * 16 + b'\x01' + b'\x00' * 15, IntRangeValue([-1, 1], nbits=128, signed=True)),
+    ('bool', Ty(7), b'\x01\x00', BoolRangeValue([True, False])),
+)
+
+
+@pytest.mark.parametrize(
+    'ty,data,expected',
+    [test_data[1:] for test_data in PRIMITIVE_ARRAY_TEST_DATA],
+    ids=[test_id for test_id, *_ in PRIMITIVE_ARRAY_TEST_DATA],
+)
+def test_decode_primitive_array(ty: Ty, data: bytes, expected: IntRangeValue | BoolRangeValue) -> None:
+    # Given
+    elems: list[IntValue | BoolValue]
+    if isinstance(expected, IntRangeValue):
+        elems = [IntValue(value, expected.nbits, expected.signed) for value in expected.values]
+    else:
+        elems = [BoolValue(value) for value in expected.values]
+
+    # When
+    value = decode_value(data, TYPES[ty], TYPES)
+
+    # Then
+    assert value == expected
+    assert value.to_kast() == RangeValue(elems).to_kast()
+
+
+def test_decode_bool_array_invalid() -> None:
+    # When
+    value = decode_value_or_unable(b'\x01\x02', TYPES[Ty(7)], TYPES)
+
+    # Then
+    assert isinstance(value, UnableToDecodeValue)
+    assert "Cannot decode as Bool: b'\\x02'" in value.msg
+
+
+def test_decode_array_partial_element() -> None:
+    # When
+    value = decode_value_or_unable(b'\x01\x00\x02', TYPES[Ty(1)], TYPES)
+
+    # Then
+    assert isinstance(value, UnableToDecodeValue)
+    assert "got: b'\\x02'" in value.msg
+
+
+def test_decode_array_of_zero_sized_elements() -> None:
+    # When
+    empty = decode_value(b'', TYPES[Ty(3)], TYPES)
+    unable = decode_value_or_unable(b'\x00', TYPES[Ty(3)], TYPES)
+
+    # Then
+    assert empty == RangeValue([])
+    assert isinstance(unable, UnableToDecodeValue)
+
+
+def test_decode_alloc_with_uninitialized_bytes() -> None:
+    # Given
+    alloc_info = AllocInfo.from_dict(
+        {
+            'alloc_id': 0,
+            'ty': 1,
+            'global_alloc': {
+                'Memory': {
+                    'bytes': [1, None, None, 1],
+                    'provenance': {'ptrs': []},
+                    'align': 2,
+                    'mutability': 'Not',
+                },
+            },
+        }
+    )
+
+    # When
+    value = decode_alloc_or_unable(alloc_info, TYPES)
+
+    # Then
+    assert value == IntRangeValue([1, 0x0100], nbits=16, signed=False)
+
+
+def _memory_alloc(alloc_id: int, ty: int, bytez: list[int]) -> AllocInfo:
+    return AllocInfo.from_dict(
+        {
+            'alloc_id': alloc_id,
+            'ty': ty,
+            'global_alloc': {
+                'Memory': {'bytes': bytez, 'provenance': {'ptrs': []}, 'align': 1, 'mutability': 'Not'},
+            },
+        }
+    )
+
+
+def test_alloc_decoder() -> None:
+    # Given
+    decoder = AllocDecoder(TYPES)
+    static = AllocInfo.from_dict({'alloc_id': 3, 'ty': 6, 'global_alloc': {'Static': 0}})
+
+    # When
+    first = decoder.decode(_memory_alloc(0, 1, [1, 0]))
+    second = decoder.decode(_memory_alloc(1, 1, [1, 0]))
+    other_ty = decoder.decode(_memory_alloc(2, 5, [1, 0]))
+    unable = [decoder.decode(static), decoder.decode(_memory_alloc(4, 7, [2])), decoder.decode(_memory_alloc(5, 8, []))]
+
+    # Then
+    assert first == IntRangeValue([1], nbits=16, signed=False)
+    assert second is first
+    assert isinstance(other_ty, UnableToDecodeValue)
+    assert all(isinstance(value, UnableToDecodeValue) for value in unable)
+    assert decoder.unable_to_decode == {'ArrayT': 2, 'BoolT': 1, 'unknown type': 1}
+    assert decoder.summary() == 'Unable to decode 4 allocs (ArrayT: 2, BoolT: 1, unknown type: 1)'
+
+
+def test_type_layout_cache_reuses_layouts() -> None:
+    # Given
+    test_data = json.loads((DECODE_VALUE_DIR / 'enum-2-variants-1-field.json').read_text())  # Result<u8, bool>
+    types = TypeLayoutCache({Ty(ty): TypeMetadata.from_raw(raw) for ty, raw in test_data['types']})
+    type_info = TypeMetadata.from_raw(test_data['typeInfo'])
+
+    # When
+    ok = decode_value(b'\x00\x07', type_info, types)
+    err = decode_value(b'\x01\x01', type_info, types)
+    layout = types.enum_layout(cast('EnumT', type_info))
+
+    # Then
+    assert ok == AggregateValue(0, [IntValue(7, 8, False)])
+    assert err == AggregateValue(1, [BoolValue(True)])
+    assert layout is types.enum_layout(cast('EnumT', type_info))
+    assert types.nbytes(type_info) == type_info.nbytes(types)
+    assert list(types) == [Ty(0), Ty(1)]
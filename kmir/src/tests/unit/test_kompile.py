@@ -1,8 +1,31 @@
 from __future__ import annotations
 
-from pyk.kore.syntax import And, App, Axiom, EVar, Rewrites, SortApp, Top
+import os
+from typing import TYPE_CHECKING
 
-from kmir.kompile import _add_exists_quantifiers, _collect_evars
+import pytest
+from pyk.kast.inner import KApply
+from pyk.kore.prelude import int_dv
+from pyk.kore.rule import FunctionRule, Rule
+from pyk.kore.syntax import DV, And, App, Axiom, EVar, Rewrites, SortApp, Top
+
+from kmir.kompile import (
+    KompileCache,
+    TermCache,
+    _add_exists_quantifiers,
+    _collect_evars,
+    _insert_rules_and_write,
+    _link_kompiled,
+    _link_static_artefacts,
+    _make_stratified_rules,
+    _run_concurrently,
+    _strata_layout,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pyk.kore.syntax import Pattern
 
 
 def test_collect_evars() -> None:
@@ -37,3 +60,256 @@ def test_add_exists_quantifiers() -> None:
     assert result.text.count(r'\exists') == 2
     assert 'VarA' in result.text
     assert 'VarB' in result.text
+
+
+def test_kompile_cache_builds_once(tmp_path: Path) -> None:
+    cache = KompileCache(tmp_path / 'cache')
+    built: list[Path] = []
+
+    def build(output_dir: Path) -> None:
+        built.append(output_dir)
+        (output_dir / 'llvm').mkdir()
+        (output_dir / 'llvm' / 'interpreter').write_text('interpreter')
+
+    entry = cache.get_or_build('key', build)
+    assert cache.get_or_build('key', build) == entry
+    assert len(built) == 1
+    assert (entry / 'llvm' / 'interpreter').read_text() == 'interpreter'
+
+    target_dir = tmp_path / 'target'
+    target_dir.mkdir()
+    _link_kompiled(entry, target_dir, ['llvm'])
+    assert (target_dir / 'llvm').is_symlink()
+    assert (target_dir / 'llvm' / 'interpreter').read_text() == 'interpreter'
+
+
+def test_kompile_cache_failed_build_leaves_no_entry(tmp_path: Path) -> None:
+    cache = KompileCache(tmp_path)
+
+    def build(output_dir: Path) -> None:
+        raise RuntimeError('kompilation failed')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_build('key', build)
+
+    assert cache.lookup('key') is None
+    assert cache.entries() == []
+
+
+def test_kompile_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = KompileCache(tmp_path, max_size=250)
+
+    def build(output_dir: Path) -> None:
+        (output_dir / 'data').write_bytes(bytes(100))
+
+    for i, key in enumerate(['a', 'b', 'c']):
+        entry = cache.get_or_build(key, build)
+        os.utime(entry, ns=(i, i))
+        cache.release(key)
+    cache.lookup('a')  # 'a' becomes the most recently used entry
+
+    evicted = cache.evict()
+
+    assert evicted == [cache.entry_dir('b')]
+    assert [entry.name for entry in cache.entries()] == ['c', 'a']
+
+
+def test_kompile_cache_keeps_leased_entries(tmp_path: Path) -> None:
+    # Given
+    cache = KompileCache(tmp_path, max_size=0)
+
+    def build(output_dir: Path) -> None:
+        (output_dir / 'data').write_bytes(bytes(100))
+
+    for key in ['a', 'b', 'c']:
+        cache.get_or_build(key, build)
+    cache.release('b')
+    cache.release('c')
+    assert cache.acquire('c') == cache.entry_dir('c')
+
+    # When
+    evicted = KompileCache(tmp_path, max_size=0).evict()
+
+    # Then
+    assert evicted == [cache.entry_dir('b')]
+    assert [entry.name for entry in cache.entries()] == ['a', 'c']
+    assert KompileCache(tmp_path).acquire('b') is None
+
+
+def test_term_cache_round_trip(tmp_path: Path) -> None:
+    term_cache = KompileCache(tmp_path).term_cache()
+    terms = {'a': int_dv(1), 'b': App('Lblfoo', (), (int_dv(2), App('Lblbar')))}
+
+    term_cache.put_many(terms.items())
+
+    assert term_cache.get_many(['a', 'b', 'c']) == terms
+    assert KompileCache(tmp_path).term_cache().get_many(['b']) == {'b': terms['b']}
+
+
+def test_term_cache_prunes_least_recently_used(tmp_path: Path) -> None:
+    term_cache = KompileCache(tmp_path).term_cache()
+    term_cache.max_entries = 3
+    for key in ['a', 'b', 'c']:
+        term_cache.put_many([(key, int_dv(0))])
+    term_cache.get_many(['a'])  # 'a' becomes more recently used than 'b'
+
+    term_cache.put_many([('d', int_dv(0))])
+
+    assert set(term_cache.get_many(['a', 'b', 'c', 'd'])) == {'a', 'c', 'd'}
+
+
+def test_term_cache_key() -> None:
+    key = TermCache.key('def', 'TypeMapping', [1, {'a': 1, 'b': 2}])
+
+    assert key == TermCache.key('def', 'TypeMapping', [1, {'b': 2, 'a': 1}])
+    assert key != TermCache.key('def', 'TypeMapping', [2, {'a': 1, 'b': 2}])
+    assert key != TermCache.key('def', 'MonoItem', [1, {'a': 1, 'b': 2}])
+    assert key != TermCache.key('other', 'TypeMapping', [1, {'a': 1, 'b': 2}])
+
+
+def test_link_static_artefacts(tmp_path: Path) -> None:
+    source_dir = tmp_path / 'source'
+    (source_dir / 'sub').mkdir(parents=True)
+    (source_dir / 'compiled.json').write_text('{}')
+    (source_dir / 'sub' / 'file.txt').write_text('sub')
+    (source_dir / 'definition.kore').write_text('module')
+    target_dir = tmp_path / 'target'
+    target_dir.mkdir()
+
+    _link_static_artefacts(source_dir, target_dir, exclude=('definition.kore',))
+
+    assert (target_dir / 'compiled.json').read_text() == '{}'
+    assert (target_dir / 'compiled.json').samefile(source_dir / 'compiled.json')
+    assert (target_dir / 'sub' / 'file.txt').read_text() == 'sub'
+    assert not (target_dir / 'definition.kore').exists()
+
+
+@pytest.mark.parametrize('jobs', [1, 2], ids=['sequential', 'concurrent'])
+def test_run_concurrently(jobs: int) -> None:
+    done: list[str] = []
+
+    def fail() -> None:
+        raise RuntimeError('llvm-kompile failed')
+
+    _run_concurrently([lambda: done.append('llvm'), lambda: done.append('haskell')], jobs=jobs)
+    assert sorted(done) == ['haskell', 'llvm']
+
+    with pytest.raises(RuntimeError):
+        _run_concurrently([fail, lambda: done.append('haskell')], jobs=jobs)
+
+
+@pytest.mark.parametrize('trailing_newline', [True, False], ids=['trailing-newline', 'no-trailing-newline'])
+def test_insert_rules_and_write(tmp_path: Path, trailing_newline: bool) -> None:
+    base = '[]\nmodule FOO\n  axiom{} \\top{SortInt{}}() []\n' + 'endmodule [topCellInitializer{}()]'
+    input_file = tmp_path / 'definition.kore'
+    input_file.write_text(base + ('\n' if trailing_newline else ''))
+    output_file = tmp_path / 'output.kore'
+    axiom = Axiom(vars=(), pattern=Top(SortApp('SortInt')), attrs=())
+
+    _insert_rules_and_write(input_file, iter([axiom, axiom]), output_file)
+
+    expected = (
+        '[]\nmodule FOO\n  axiom{} \\top{SortInt{}}() []\n'
+        f'\n// Generated from file {input_file}\n\n'
+        f'{axiom.text}\n{axiom.text}\n'
+        '\nendmodule [topCellInitializer{}()]' + ('\n' if trailing_newline else '')
+    )
+    assert output_file.read_text() == expected
+
+
+@pytest.mark.parametrize('size', [0, 1, 64, 65, 1000, 5000, 20000, 10**6])
+def test_strata_layout(size: int) -> None:
+    # When
+    radix, depth = _strata_layout(size)
+
+    # Then
+    assert radix <= 16
+    assert radix**depth * 64 >= size
+    assert depth >= 1
+    assert (radix - 1) ** depth * 64 < size or radix <= 2
+
+
+def _eval_int(pattern: Pattern, n: int) -> int:
+    match pattern:
+        case EVar('VarN'):
+            return n
+        case DV(value=value):
+            return int(value.value)
+        case App("Lbl'UndsPerc'Int'Unds'", args=(left, right)):
+            return _eval_int(left, n) % _eval_int(right, n)
+        case App("Lbl'UndsSlsh'Int'Unds'", args=(left, right)):
+            return _eval_int(left, n) // _eval_int(right, n)
+        case _:
+            raise AssertionError(pattern)
+
+
+def _lookup(rules: list[FunctionRule], fun: str, n: int) -> Pattern:
+    """Evaluate `fun(ty(n))` by following the stratified `rules`."""
+    symbol = 'Lbl' + fun
+    while True:
+        candidates = [rule for rule in rules if rule.lhs.symbol == symbol]
+        for rule in sorted(candidates, key=lambda rule: rule.priority):
+            (arg,) = rule.lhs.args
+            if isinstance(arg, App):  # the root function takes `ty(N)`
+                (arg,) = arg.args
+            if isinstance(arg, DV) and int(arg.value.value) != n:
+                continue
+            if rule.req is not None:
+                assert isinstance(rule.req, App)
+                left, right = rule.req.args
+                if _eval_int(left, n) != _eval_int(right, n):
+                    continue
+            if isinstance(rule.rhs, App) and rule.rhs.symbol.startswith(symbol):
+                symbol = rule.rhs.symbol
+                break
+            return rule.rhs
+        else:
+            raise AssertionError(f'No rule applies to {symbol}({n})')
+
+
+@pytest.mark.parametrize('layout', [None, (1, 1), (10, 1), (3, 2), (2, 4)], ids=str)
+def test_make_stratified_rules(layout: tuple[int, int] | None) -> None:
+    # Given
+    ids = [0, 1, 2, 5, 9, 10, 17, 26, 27, 100]
+    assocs = [(i, App('Lblinfo', (), (int_dv(i),))) for i in ids]
+    not_found = App('LblnotFound')
+
+    # When
+    sentences = _make_stratified_rules(
+        lambda term, sort: not_found, 'lookupTy', 'Ty', 'TypeInfo', 'ty', list(assocs), KApply('notFound'), layout
+    )
+    rules = [Rule.from_axiom(sentence) for sentence in sentences if isinstance(sentence, Axiom)]
+
+    # Then
+    assert all(isinstance(rule, FunctionRule) for rule in rules)
+    function_rules = [rule for rule in rules if isinstance(rule, FunctionRule)]
+    for i in range(max(ids) + 2):
+        expected = App('Lblinfo', (), (int_dv(i),)) if i in ids else not_found
+        assert _lookup(function_rules, 'lookupTy', i) == expected
+
+
+@pytest.mark.parametrize('size', [1, 10, 64, 65], ids=str)
+def test_make_stratified_rules_small_table(size: int) -> None:
+    # Given
+    assocs: list[tuple[int, Pattern]] = [(i, App('Lblinfo', (), (int_dv(i),))) for i in range(size)]
+    void_type = App("LblTypeInfo'ColnColn'VoidType")
+
+    # When
+    sentences = _make_stratified_rules(
+        lambda term, sort: void_type, 'lookupTy', 'Ty', 'TypeInfo', 'ty', assocs, KApply('TypeInfo::VoidType')
+    )
+    rules = [Rule.from_axiom(sentence) for sentence in sentences if isinstance(sentence, Axiom)]
+    function_rules = [rule for rule in rules if isinstance(rule, FunctionRule)]
+
+    # Then
+    assert _lookup(function_rules, 'lookupTy', size) == void_type
+    assert _lookup(function_rules, 'lookupTy', size - 1) == App('Lblinfo', (), (int_dv(size - 1),))
+    # the root only dispatches, so its `owise` rule in the base semantics never applies
+    assert all(rule.priority < 200 for rule in function_rules if rule.lhs.symbol == 'LbllookupTy')
+
+
+def test_make_stratified_rules_rejects_depth_0() -> None:
+    with pytest.raises(ValueError):
+        _make_stratified_rules(
+            lambda term, sort: App('LblnotFound'), 'lookupTy', 'Ty', 'TypeInfo', 'ty', [], KApply('notFound'), (1, 0)
+        )
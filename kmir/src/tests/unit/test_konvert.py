@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from pyk.kast.inner import KApply, KLabel, KSort, KToken, KVariable
+from pyk.kast.outer import KDefinition, KFlatModule, KNonTerminal, KProduction, KTerminal
+from pyk.konvert import kast_to_kore
+
+from kmir.konvert import KoreConverter, convert_sharded
+
+if TYPE_CHECKING:
+    from typing import Final
+
+    from pyk.kast.inner import KInner
+    from pyk.kore.syntax import Pattern
+
+
+INT: Final = KSort('Int')
+FOO: Final = KSort('Foo')
+BAR: Final = KSort('Bar')
+
+DEFINITION: Final = KDefinition(
+    'TEST',
+    [
+        KFlatModule(
+            'TEST',
+            [
+                KProduction(
+                    FOO, [KTerminal('foo'), KTerminal('('), KNonTerminal(INT), KTerminal(')')], klabel=KLabel('foo')
+                ),
+                KProduction(
+                    BAR,
+                    [
+                        KTerminal('bar'),
+                        KTerminal('('),
+                        KNonTerminal(BAR),
+                        KTerminal(','),
+                        KNonTerminal(BAR),
+                        KTerminal(')'),
+                    ],
+                    klabel=KLabel('bar'),
+                ),
+                KProduction(BAR, [KTerminal('nil')], klabel=KLabel('nil')),
+                KProduction(BAR, [KNonTerminal(FOO)]),
+            ],
+        )
+    ],
+)
+
+
+def foo(n: int) -> KApply:
+    return KApply('foo', (KToken(str(n), INT),))
+
+
+def bar(*args: KInner) -> KApply:
+    return KApply('bar', args)
+
+
+NIL: Final = KApply('nil')
+
+TEST_DATA: Final = (
+    ('token', KToken('1', INT), INT),
+    ('injected', foo(1), BAR),
+    ('nested', bar(foo(1), bar(NIL, foo(2))), BAR),
+    ('variable', bar(KApply('foo', (KVariable('X'),)), NIL), BAR),
+    ('repeated', bar(bar(foo(3), foo(3)), bar(foo(3), foo(3))), BAR),
+)
+
+
+@pytest.mark.parametrize('name,term,sort', TEST_DATA, ids=[name for name, *_ in TEST_DATA])
+def test_kore_converter(name: str, term: KInner, sort: KSort) -> None:
+    # Given
+    expected = kast_to_kore(DEFINITION, term, sort)
+
+    # When
+    actual = KoreConverter(DEFINITION)(term, sort)
+
+    # Then
+    assert actual == expected
+
+
+def test_kore_converter_shares_equal_subterms() -> None:
+    # Given
+    converter = KoreConverter(DEFINITION)
+
+    # When
+    first = converter(bar(foo(1), NIL), BAR)
+    second = converter(bar(NIL, foo(1)), BAR)
+
+    # Then
+    assert first.patterns[0] is second.patterns[1]
+
+
+def test_kore_converter_falls_back_on_sort_error() -> None:
+    # Given
+    fallback_calls: list[KInner] = []
+
+    def fallback(term: KInner, sort: KSort) -> Pattern:
+        fallback_calls.append(term)
+        return kast_to_kore(DEFINITION, term, sort)
+
+    converter = KoreConverter(DEFINITION, fallback)
+
+    # When
+    with pytest.raises(ValueError):
+        converter(NIL, FOO)
+
+    # Then
+    assert fallback_calls == [NIL]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_convert_sharded(jobs: int) -> None:
+    # Given
+    terms = [(bar(foo(i), bar(NIL, foo(i + 1))), BAR) for i in range(20)]
+    expected = [kast_to_kore(DEFINITION, term, sort) for term, sort in terms]
+
+    # When
+    actual = convert_sharded(KoreConverter(DEFINITION), terms, jobs=jobs)
+
+    # Then
+    assert actual == expected
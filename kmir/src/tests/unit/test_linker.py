@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+from pathlib import Path
 from typing import TYPE_CHECKING, NamedTuple
 
 import pytest
@@ -129,3 +131,173 @@ def test_mono_item_fn_name(
 
     # Then
     assert expected == actual
+
+
+def test_demangle_symbols() -> None:
+    from kmir.linker import demangle_symbols
+
+    # Given
+    symbols = [symbol for symbol, *_ in TEST_DATA]
+    expected = {symbol: demangled for symbol, _, demangled, _ in TEST_DATA}
+
+    # When
+    actual = demangle_symbols(symbols + symbols)
+
+    # Then
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    'symbol,expected',
+    [
+        ('', ['']),
+        ('a::b', ['a', 'b']),
+        ('a::<b::c>::d', ['a', '<b::c>', 'd']),
+        ('f::<fn(&u8) -> u8>::g', ['f', '<fn(&u8) -> u8>', 'g']),
+        ('{closure@src/main.rs:19:29: 19:32}::a', ['{closure@src/main.rs:19:29: 19:32}', 'a']),
+        ('a:', ['a:']),
+    ],
+    ids=['empty', 'path', 'generic', 'arrow', 'single-colon', 'trailing-colon'],
+)
+def test_symbol_segments(symbol: str, expected: list[str]) -> None:
+    from kmir.linker import _symbol_segments
+
+    # When
+    actual = list(_symbol_segments(symbol))
+
+    # Then
+    assert actual == expected
+
+
+DATA_DIR: Final = Path(__file__).parent.parent / 'integration' / 'data'
+LINK_FILES: Final = (
+    DATA_DIR / 'prove-rs' / 'arith.smir.json',
+    DATA_DIR / 'exec-smir' / 'arithmetic' / 'unary.smir.json',
+)
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_link_leaves_inputs_unchanged(jobs: int) -> None:
+    from kmir.linker import link
+    from kmir.smir import SMIRInfo
+
+    # Given
+    expected = [json.loads(smir_file.read_text()) for smir_file in LINK_FILES]
+    smirs = [SMIRInfo(json.loads(smir_file.read_text())) for smir_file in LINK_FILES]
+
+    # When
+    linked = link(smirs, jobs=jobs)
+
+    # Then
+    assert [smir._smir for smir in smirs] == expected
+    assert len(linked._smir['items']) == sum(len(smir['items']) for smir in expected)
+    assert linked._smir['items'][-1]['mono_item_kind'] != expected[-1]['items'][-1]['mono_item_kind']
+
+
+@pytest.mark.parametrize('deduplicate', [False, True], ids=['offset', 'deduplicate'])
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_link_files(jobs: int, deduplicate: bool, tmp_path: Path) -> None:
+    from kmir.linker import link, link_files
+    from kmir.smir import SMIRInfo
+
+    # Given
+    output_file = tmp_path / 'linked.smir.json'
+    smirs = [SMIRInfo.from_file(smir_file) for smir_file in LINK_FILES]
+    expected = json.loads(json.dumps(link(smirs, deduplicate=deduplicate)._smir))
+
+    # When
+    link_files(LINK_FILES, output_file, jobs=jobs, deduplicate=deduplicate)
+
+    # Then
+    assert json.loads(output_file.read_text()) == expected
+
+
+@pytest.mark.parametrize('smir_file', LINK_FILES, ids=lambda smir_file: smir_file.stem)
+def test_link_deduplicates_repeated_crate(smir_file: Path) -> None:
+    from kmir.linker import link
+    from kmir.smir import SMIRInfo
+
+    # Given
+    smir = SMIRInfo.from_file(smir_file)
+    expected = link([smir], deduplicate=True)._smir
+
+    # When
+    actual = link([smir, smir], deduplicate=True)._smir
+
+    # Then
+    assert {key: value for key, value in actual.items() if key != 'name'} == {
+        key: value for key, value in expected.items() if key != 'name'
+    }
+    assert len(actual['items']) == len(smir._smir['items'])
+    assert len(actual['types']) <= len(smir._smir['types'])
+    assert len(actual['spans']) <= len(smir._smir['spans'])
+    assert sorted(ty for ty, _ in actual['types']) == list(range(len(actual['types'])))
+
+
+def test_link_files_incremental(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from kmir import linker
+    from kmir.smir import SMIRInfo
+
+    # Given
+    smir_files = [tmp_path / smir_file.name for smir_file in LINK_FILES]
+    for smir_file, original_file in zip(smir_files, LINK_FILES, strict=True):
+        smir_file.write_text(original_file.read_text())
+    output_file = tmp_path / 'linked.smir.json'
+    fragment_dir = tmp_path / 'fragments'
+    linked_files: list[Path] = []
+    link_file = linker._link_file
+
+    def _link_file(task: tuple[Path, int, Path]) -> None:
+        linked_files.append(task[0])
+        link_file(task)
+
+    monkeypatch.setattr(linker, '_link_file', _link_file)
+    linker.link_files(smir_files, output_file, fragment_dir=fragment_dir)
+    linked_files.clear()
+
+    # When
+    linker.link_files(smir_files, output_file, fragment_dir=fragment_dir)
+    unchanged = list(linked_files)
+    changed = json.loads(smir_files[-1].read_text())
+    changed['items'] = changed['items'][:-1]
+    smir_files[-1].write_text(json.dumps(changed, indent=1))
+    linker.link_files(smir_files, output_file, fragment_dir=fragment_dir)
+
+    # Then
+    expected = linker.link([SMIRInfo.from_file(smir_file) for smir_file in smir_files])._smir
+    assert unchanged == []
+    assert linked_files == smir_files[-1:]
+    assert json.loads(output_file.read_text()) == json.loads(json.dumps(expected))
+    assert len([path for path in fragment_dir.iterdir() if path.is_dir()]) == len(smir_files)
+
+
+def test_link_keeps_missing_tys_apart() -> None:
+    from kmir.linker import link
+    from kmir.smir import SMIRInfo
+
+    # Given
+    smir = SMIRInfo(
+        {
+            'name': 'a',
+            'machine': {},
+            'allocs': [],
+            'functions': [],
+            'items': [],
+            'spans': [],
+            # references to the `Ty`s 3 and 4, which are in neither the types nor the functions
+            'types': [
+                [1, {'RefType': {'pointee_type': 3}}],
+                [2, {'RefType': {'pointee_type': 4}}],
+                [5, {'PrimitiveType': 'Bool'}],
+            ],
+        }
+    )
+
+    # When
+    actual = link([smir], deduplicate=True)._smir
+    repeated = link([smir, smir], deduplicate=True)._smir
+
+    # Then
+    (_, first), (_, second), _ = actual['types']
+    assert first['RefType']['pointee_type'] != second['RefType']['pointee_type']
+    assert repeated['types'] == actual['types']
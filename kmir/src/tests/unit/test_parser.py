@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from pyk.kast.att import Atts, KAtt
+from pyk.kast.inner import KApply, KSort, KToken
+from pyk.kast.outer import KDefinition, KFlatModule, KNonTerminal, KProduction, KTerminal
+
+from kmir.parse.parser import Parser
+
+if TYPE_CHECKING:
+    from typing import Final
+
+    from pyk.kast.inner import KInner
+
+    from kmir.parse.parser import JSON
+
+
+def _prod(sort: str, items: list[str], group: str, symbol: str) -> KProduction:
+    # items starting with an upper case letter are non-terminals
+    return KProduction(
+        KSort(sort),
+        [KNonTerminal(KSort(item)) if item[:1].isupper() else KTerminal(item) for item in items],
+        att=KAtt([Atts.GROUP(group), Atts.SYMBOL(symbol)]),
+    )
+
+
+# A tree with a named field, an enum with a terminal and a single unnamed argument, and lists and options of trees
+DEFINITION: Final = KDefinition(
+    'TREE',
+    [
+        KFlatModule(
+            'TREE',
+            [
+                _prod('MIRInt', ['Int'], 'mir-int', 'MIRInt::Int'),
+                _prod('Tree', ['tree', '(', 'Shape', ',', 'Trees', ')'], 'mir---shape--children', 'tree'),
+                _prod('Shape', ['shapeLeaf'], 'mir-enum', 'Shape::Leaf'),
+                _prod('Shape', ['shapeSized', '(', 'MIRInt', ')'], 'mir-enum', 'Shape::Sized'),
+                _prod('Trees', ['Tree', '', 'Trees'], 'mir-list', 'Trees::append'),
+                _prod('MaybeTree', ['someTree', '(', 'Tree', ')'], 'mir-option', 'someTree'),
+                _prod('MaybeTree', ['noTree'], 'mir-option', 'noTree'),
+            ],
+        )
+    ],
+)
+
+
+def _tree(shape: KInner, *children: KInner) -> KApply:
+    trees: KInner = KApply('Trees::empty')
+    for child in reversed(children):
+        trees = KApply('Trees::append', child, trees)
+    return KApply('tree', shape, trees)
+
+
+LEAF: Final = _tree(KApply('Shape::Leaf'))
+
+PARSE_TEST_DATA: Final = (
+    ('leaf', {'shape': 'Leaf', 'children': []}, 'Tree', LEAF),
+    (
+        'nested',
+        {'shape': {'Sized': 2}, 'children': [{'shape': 'Leaf', 'children': []}] * 2},
+        'Tree',
+        _tree(KApply('Shape::Sized', KToken('2', 'Int')), LEAF, LEAF),
+    ),
+    ('none', None, 'MaybeTree', KApply('noTree')),
+    ('some', {'shape': 'Leaf', 'children': []}, 'MaybeTree', KApply('someTree', LEAF)),
+)
+
+
+@pytest.mark.parametrize(
+    'json,sort,expected',
+    [test_data[1:] for test_data in PARSE_TEST_DATA],
+    ids=[test_id for test_id, *_ in PARSE_TEST_DATA],
+)
+def test_parse_mir_json(json: JSON, sort: str, expected: KInner) -> None:
+    # Given
+    parser = Parser(DEFINITION)
+
+    # When
+    actual = parser.parse_mir_json(json, sort)
+
+    # Then
+    assert actual == (expected, KSort(sort))
+
+
+def test_parse_mir_json_unknown_enumerator() -> None:
+    # Given
+    parser = Parser(DEFINITION)
+
+    # Then
+    with pytest.raises(AssertionError, match='Shape::Round'):
+        parser.parse_mir_json({'shape': 'Round', 'children': []}, 'Tree')
+
+
+def test_parse_mir_json_shares_leaves() -> None:
+    # Given
+    parser = Parser(DEFINITION)
+    json = {'shape': {'Sized': 2}, 'children': [{'shape': 'Leaf', 'children': []}] * 2}
+
+    # When
+    first = parser.parse_mir_json(json, 'Tree')
+    second = parser.parse_mir_json(json, 'Tree')
+
+    # Then
+    assert first is not None and second is not None
+    first_tree, second_tree = first[0], second[0]
+    assert isinstance(first_tree, KApply) and isinstance(second_tree, KApply)
+    assert first_tree == second_tree
+    assert first_tree is not second_tree
+    assert first_tree.args[0] is second_tree.args[0]  # Shape::Sized(2)
+    children = first_tree.args[1]
+    assert isinstance(children, KApply) and isinstance(children.args[1], KApply)
+    assert children.args[0] is children.args[1].args[0]  # both leaf children
+
+
+def test_parse_mir_json_deeply_nested() -> None:
+    # Given
+    parser = Parser(DEFINITION)
+    depth = 10_000  # well beyond the default recursion limit
+    json: JSON = {'shape': 'Leaf', 'children': []}
+    for _ in range(depth):
+        json = {'shape': 'Leaf', 'children': [json]}
+
+    # When
+    actual = parser.parse_mir_json(json, 'Tree')
+
+    # Then
+    assert actual is not None
+    tree: KInner
+    tree, sort = actual
+    assert sort == KSort('Tree')
+    nesting = 0
+    while True:
+        assert isinstance(tree, KApply) and tree.label.name == 'tree'
+        children = tree.args[1]
+        assert isinstance(children, KApply)
+        if children.label.name == 'Trees::empty':
+            break
+        assert children.args[1] == KApply('Trees::empty')
+        tree = children.args[0]
+        nesting += 1
+    assert nesting == depth
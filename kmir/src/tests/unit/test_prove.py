@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from kmir import _prove
+from kmir.options import ProveOpts
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any
+
+    from kmir.smir import SMIRInfo
+
+
+class _SMIRInfo:
+    items: dict[str, Any] = {}
+
+    def reduce_to(self, start_symbol: str) -> _SMIRInfo:
+        return self
+
+    def reduce_to_many(self, start_symbols: list[str]) -> _SMIRInfo:
+        return self
+
+
+@pytest.mark.parametrize('keep_proofs', [False, True], ids=['temporary', 'proof-dir'])
+def test_prove_batch_without_kompile_cache(keep_proofs: bool, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Given
+    rs_file = tmp_path / 'main.rs'
+    rs_file.touch()
+    proof_dir = tmp_path / 'proofs' if keep_proofs else None
+    opts = ProveOpts(rs_file, proof_dir=proof_dir, start_symbols=['a', 'b'], kompile_cache=False)
+    used_caches: list[tuple[bool, Path | None]] = []
+
+    def _prove_in_target(opts: ProveOpts, smir_info: SMIRInfo | None = None) -> Any:
+        used_caches.append((opts.kompile_cache, opts.kompile_cache_dir))
+        assert opts.kompile_cache_dir is None or opts.kompile_cache_dir.is_dir()
+
+    monkeypatch.setattr(_prove, '_load_smir', lambda opts: _SMIRInfo())
+    monkeypatch.setattr(_prove, '_prove_in_target', _prove_in_target)
+
+    # When
+    proofs = _prove.prove_batch(opts)
+
+    # Then
+    assert list(proofs) == ['a', 'b']
+    assert not opts.kompile_cache
+    if keep_proofs:
+        # the kompiled definitions in the proof directories must outlive the batch
+        assert used_caches == [(False, None), (False, None)]
+    else:
+        # proofs in temporary directories share a temporary cache
+        assert used_caches[0] == used_caches[1]
+        assert used_caches[0][0]
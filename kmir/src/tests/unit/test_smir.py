@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import json
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import pytest
 
 from kmir.smir import SMIRInfo
 from kmir.testing.fixtures import assert_or_update_show_output
+from kmir.ty import EnumT, StructT, TupleT
+
+if TYPE_CHECKING:
+    from kmir.ty import LayoutShape
 
 
 def _test_smir_property(smir_file: Path, property_name: str, update_expected_output: bool) -> None:
@@ -45,3 +51,119 @@ def test_function_symbols_reverse(smir_file: Path, update_expected_output: bool)
 def test_function_tys(smir_file: Path, update_expected_output: bool) -> None:
     """Test function_tys using actual SMIR JSON data."""
     _test_smir_property(smir_file, 'function_tys', update_expected_output)
+
+
+def test_digest_is_canonical() -> None:
+    # Given
+    smir = {'name': 'a', 'types': [[1, {'x': 1, 'y': [2, 3]}]], 'items': []}
+    reordered = {'items': [], 'types': [[1, {'y': [2, 3], 'x': 1}]], 'name': 'a'}
+    expected = hashlib.sha256(json.dumps(smir, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+    # When
+    digest = SMIRInfo(smir).digest
+
+    # Then
+    assert digest == expected
+    assert SMIRInfo(reordered).digest == digest
+    assert SMIRInfo({**smir, 'name': 'b'}).digest != digest
+
+
+def test_digest_stored_with_dumped_file(tmp_path: Path) -> None:
+    # Given
+    smir_file = tmp_path / 'a.smir.json'
+    smir_info = SMIRInfo({'name': 'a', 'items': []})
+    smir_info.dump(smir_file)
+    digest_file = smir_file.with_name('a.smir.json.digest')
+    stored = json.loads(digest_file.read_text())
+    digest_file.write_text(json.dumps({**stored, 'digest': 'stored'}))
+
+    # When
+    reloaded = SMIRInfo.from_file(smir_file).digest
+    smir_file.write_text(json.dumps({'name': 'b', 'items': []}))
+    changed = SMIRInfo.from_file(smir_file).digest
+
+    # Then
+    assert stored['digest'] == smir_info.digest
+    assert reloaded == 'stored'
+    assert changed == SMIRInfo({'name': 'b', 'items': []}).digest
+
+
+def test_binary_cache_used_while_up_to_date(tmp_path: Path) -> None:
+    # Given
+    smir_file = tmp_path / 'smir.json'
+    SMIRInfo({'name': 'a', 'items': []}).dump(smir_file, binary_cache=True)
+    assert (tmp_path / 'smir.bin').is_file()
+
+    # When
+    cached = SMIRInfo.from_file(smir_file)
+    smir_file.write_text(json.dumps({'name': 'b', 'items': []}))
+    changed = SMIRInfo.from_file(smir_file)
+
+    # Then
+    assert isinstance(cached._smir, dict)
+    assert cached.name == 'a'
+    assert changed.name == 'b'
+    assert SMIRInfo.from_file(tmp_path / 'smir.bin').digest == cached.digest
+
+
+def test_reduce_to_many() -> None:
+    # Given
+    smir_info = SMIRInfo.from_file(INTRINSIC_SMIR_FILE)
+    start_names = ['main', 'std::rt::lang_start::<()>::{closure#0}', '<&u32 as std::fmt::Debug>::fmt']
+    expected = {sym for name in start_names for sym in smir_info.reduce_to(name).items}
+
+    # When
+    reduced = smir_info.reduce_to_many(start_names)
+
+    # Then
+    assert set(reduced.items) == expected
+    assert reduced.items == {sym: smir_info.items[sym] for sym in reduced.items}
+    assert reduced.digest == smir_info.reduce_to_many(reversed(start_names)).digest
+    assert set(smir_info.reduce_to_many(['main']).items) == set(smir_info.reduce_to('main').items)
+
+
+def _allocated(*alloc_ids: int) -> dict:
+    return {'Allocated': {'bytes': [0] * 8, 'provenance': {'ptrs': [[0, alloc_id] for alloc_id in alloc_ids]}}}
+
+
+def test_used_alloc_ids() -> None:
+    # Given
+    smir_info = SMIRInfo(
+        {
+            'items': [{'symbol_name': 'f', 'mono_item_kind': {'MonoItemFn': {'body': [{'const_': _allocated(3)}]}}}],
+            'allocs': [
+                {'alloc_id': alloc_id, 'global_alloc': {'Memory': _allocated(*refs)['Allocated']}}
+                for alloc_id, refs in [(1, ()), (2, (1,)), (3, (2, 4)), (5, (2,))]
+            ],
+        }
+    )
+
+    # When
+    used = smir_info.used_alloc_ids
+
+    # Then
+    assert used == [1, 2, 3]
+
+
+def _layouts(smir_info: SMIRInfo) -> list[LayoutShape]:
+    return [
+        type_info.layout
+        for type_info in smir_info.types.values()
+        if isinstance(type_info, (EnumT, StructT, TupleT)) and type_info.layout is not None
+    ]
+
+
+def test_type_metadata_shares_layouts() -> None:
+    # Given
+    first = SMIRInfo.from_file(INTRINSIC_SMIR_FILE)
+    second = SMIRInfo.from_file(INTRINSIC_SMIR_FILE)
+
+    # When
+    layouts = _layouts(first)
+
+    # Then
+    assert layouts
+    assert all(layout is other for layout, other in zip(layouts, _layouts(second), strict=True))
+    assert len({id(layout) for layout in layouts}) < len(layouts)
+    assert all(not hasattr(type_info, '__dict__') for type_info in first.types.values())
+    assert all(not hasattr(alloc_info, '__dict__') for alloc_info in first.allocs.values())
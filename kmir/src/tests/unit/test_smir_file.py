@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import copy
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from kmir.smir_file import (
+    SMIRFile,
+    dump_smir,
+    dump_smir_binary,
+    is_smir_binary,
+    load_smir_binary,
+    read_smir_binary_digest,
+)
+
+if TYPE_CHECKING:
+    from typing import Final
+
+
+SMIR_FILE: Final = (
+    Path(__file__).parent.parent / 'integration' / 'data' / 'exec-smir' / 'intrinsic' / 'blackbox.smir.json'
+)
+
+
+def test_sections_decoded_lazily() -> None:
+    # Given
+    expected = json.loads(SMIR_FILE.read_text())
+
+    # When
+    smir = SMIRFile.load(SMIR_FILE)
+    assert isinstance(smir, SMIRFile)
+    name = smir['name']
+
+    # Then
+    assert name == expected['name']
+    assert list(smir._sections) == ['name']
+    assert list(smir) == list(expected)
+    assert dict(smir) == expected
+
+
+def test_item_decoded_alone() -> None:
+    # Given
+    expected = json.loads(SMIR_FILE.read_text())['items']
+    smir = SMIRFile.load(SMIR_FILE)
+    assert isinstance(smir, SMIRFile)
+
+    # When
+    actual = [smir.item(item['symbol_name']) for item in expected]
+
+    # Then
+    assert actual == expected
+    assert 'items' not in smir._sections
+    assert smir.item('no-such-symbol') is None
+
+
+def test_copy_shadows_sections() -> None:
+    # Given
+    smir = SMIRFile.load(SMIR_FILE)
+    assert isinstance(smir, SMIRFile)
+
+    # When
+    copied = copy.copy(smir)
+    copied['items'] = []
+    del copied['spans']
+
+    # Then
+    assert copied['items'] == []
+    assert 'spans' not in copied
+    assert smir['items']
+    assert 'spans' in smir
+
+
+def test_dump_round_trip(tmp_path: Path) -> None:
+    # Given
+    expected = json.loads(SMIR_FILE.read_text())
+    smir_file = tmp_path / 'a.smir.json'
+
+    # When
+    dump_smir(expected, smir_file)
+    smir = SMIRFile.load(smir_file)
+
+    # Then
+    assert isinstance(smir, SMIRFile)
+    assert [smir.item(item['symbol_name']) for item in expected['items']] == expected['items']
+    assert 'items' not in smir._sections
+    assert dict(smir) == expected
+
+
+@pytest.mark.parametrize(
+    'text',
+    ['{"name": "a", "items": [{"symbol_name": "f"}]}', '[]'],
+    ids=['compact', 'array'],
+)
+def test_load_eagerly(text: str, tmp_path: Path) -> None:
+    # Given
+    smir_file = tmp_path / 'a.smir.json'
+    smir_file.write_text(text)
+
+    # When
+    smir = SMIRFile.load(smir_file)
+
+    # Then
+    assert not isinstance(smir, SMIRFile)
+    assert smir == json.loads(text)
+
+
+def test_unexpected_layout_falls_back(tmp_path: Path) -> None:
+    # Given
+    smir_file = tmp_path / 'a.smir.json'
+    smir_file.write_text('{\n  "name": "a",\n  "items": [\n    {\n    "symbol_name": "f"\n    }\n  ]\n}\n')
+
+    # When
+    smir = SMIRFile.load(smir_file)
+    assert isinstance(smir, SMIRFile)
+    items = smir['items']
+
+    # Then
+    assert items == [{'symbol_name': 'f'}]
+    assert smir.item('f') == {'symbol_name': 'f'}
+
+
+def test_binary_round_trip(tmp_path: Path) -> None:
+    # Given
+    expected = json.loads(SMIR_FILE.read_text())
+    smir_file = tmp_path / 'a.smir.bin'
+
+    # When
+    dump_smir_binary(expected, 'digest', smir_file)
+    actual, digest = load_smir_binary(smir_file)
+
+    # Then
+    assert is_smir_binary(smir_file)
+    assert actual == expected
+    assert digest == read_smir_binary_digest(smir_file) == 'digest'
+    assert len(smir_file.read_bytes()) < len(json.dumps(expected, separators=(',', ':')))
+
+
+def test_binary_big_ints(tmp_path: Path) -> None:
+    # Given
+    smir_file = tmp_path / 'a.smir.bin'
+    smir = {'valid_range': {'start': -(2**70), 'end': 2**128 - 1}, 'size': 2**64 - 1}
+
+    # When
+    dump_smir_binary(smir, 'digest', smir_file)
+    actual, _ = load_smir_binary(smir_file)
+
+    # Then
+    assert actual == smir
+
+
+def test_load_binary_rejects_malformed_payload(tmp_path: Path) -> None:
+    # Given
+    smir_file = tmp_path / 'a.smir.bin'
+    dump_smir_binary({'name': 'a', 'items': [1, 2, 3]}, 'digest', smir_file)
+    data = smir_file.read_bytes()
+
+    # Then
+    for payload in [data[:-1], data + b'\x00', data[:-4] + b'\xc1' * 4, data[:-1] + b'\xd4']:
+        smir_file.write_bytes(payload)
+        with pytest.raises(ValueError, match='Malformed binary SMIR file'):
+            load_smir_binary(smir_file)
+
+
+def test_load_binary_rejects_other_files(tmp_path: Path) -> None:
+    # Given
+    smir_file = tmp_path / 'a.smir.bin'
+    dump_smir_binary({'name': 'a'}, 'digest', smir_file)
+    data = smir_file.read_bytes()
+    smir_file.write_bytes(data[:8] + b'\xff' + data[9:])
+
+    # Then
+    assert read_smir_binary_digest(smir_file) is None
+    with pytest.raises(ValueError, match='Unsupported binary SMIR format'):
+        load_smir_binary(smir_file)
+    with pytest.raises(ValueError, match='Not a binary SMIR file'):
+        load_smir_binary(SMIR_FILE)